@@ -1,17 +1,37 @@
-import json
 import logging
 import subprocess
-from pathlib import WindowsPath, Path
+from pathlib import Path
+
+import eel
+import gevent.lock
 
 import app
 import app.mod
 import app.util.utils
 from app.app_settings import AppSettings
+from app.events import ScanCancelEvent
 from app.mod import get_available_mods
+from app.util import json_codec
 from app.util.manifest_worker import run_update_steam_apps
 from app.util.custom_app import create_custom_app, scan_custom_library
+from app.util.known_apps import KnownApps
+from app.util.library_store import entry_digest
+from app.util.scan_checkpoint import ScanCheckpoint
+from app.util.scan_report import ScanReport
 from app.util.utils import get_name_id
 
+# -- Held while the library or single apps get scanned, scans share ScanCancelEvent and the ScanIndex
+SCAN_LOCK = gevent.lock.BoundedSemaphore()
+
+# -- Digest of every app entry as last saved or loaded and the digest of its stored, reduced entry
+_saved_apps = dict()
+_MOD_SETTINGS_KEYS = {getattr(app.mod, name).VAR_NAMES['settings'] for name in app.mod.BaseModType.mod_types.values()}
+# -- Entry keys reduce_steam_apps_for_export reads
+_SAVE_KEYS = {'name', 'sizeGb', 'path', 'openVrDllPaths', 'openVrDllPathsSelected', 'executablePaths',
+              'executablePathsSelected', 'openVr', 'SizeOnDisk', 'appid', 'scanKey', 'buildid', 'fsr_compatible',
+              *(v for name in app.mod.BaseModType.mod_types.values()
+                for v in getattr(app.mod, name).VAR_NAMES.values())}
+
 
 def reduce_steam_apps_for_export(steam_apps) -> dict:
     reduced_dict = dict()
@@ -29,6 +49,8 @@ def reduce_steam_apps_for_export(steam_apps) -> dict:
         reduced_dict[app_id]['openVr'] = entry.get('openVr')
         reduced_dict[app_id]['SizeOnDisk'] = entry.get('SizeOnDisk')
         reduced_dict[app_id]['appid'] = entry.get('appid')
+        reduced_dict[app_id]['scanKey'] = entry.get('scanKey')
+        reduced_dict[app_id]['buildid'] = entry.get('buildid')
 
         # Mod specific data
         if entry.get('openVr') or entry.get('vrpInstalled'):
@@ -36,7 +58,8 @@ def reduce_steam_apps_for_export(steam_apps) -> dict:
                 reduced_dict[app_id][mod.VAR_NAMES['settings']] = mod.settings.to_js(export=True)
                 reduced_dict[app_id][mod.VAR_NAMES['installed']] = entry.get(mod.VAR_NAMES['installed'], False)
                 reduced_dict[app_id][mod.VAR_NAMES['version']] = entry.get(mod.VAR_NAMES['version'], '')
-            reduced_dict[app_id]['fsr_compatible'] = entry.get('fsr_compatible', True)
+            reduced_dict[app_id]['fsr_compatible'] = KnownApps.get(app_id).get(
+                'fsr_compatible', entry.get('fsr_compatible', True))
 
     return reduced_dict
 
@@ -53,6 +76,51 @@ def _load_steam_apps_with_mod_settings(steam_apps, scan_mod=False):
     return steam_apps
 
 
+def _reuse_unchanged_apps(steam_apps: dict, cached_steam_apps: dict) -> dict:
+    """ Remove apps whose Steam manifest did not change since the last scan from steam_apps
+        and return them updated with their cached scan results and mod state. Their mod settings
+        stay reduced, they are flagged as summary so the FrontEnd loads complete entries on demand.
+    """
+    unchanged_apps = dict()
+
+    # -- Re-scan everything between versions
+    if app.globals.get_version() != AppSettings.previous_version:
+        return unchanged_apps
+
+    for app_id in list(steam_apps.keys()):
+        manifest, cached_entry = steam_apps[app_id], cached_steam_apps.get(app_id)
+        if not cached_entry or not manifest.get('scanKey') or cached_entry.get('openVrDllPaths') is None:
+            continue
+        # -- App got installed, updated or moved
+        if cached_entry.get('scanKey') != manifest['scanKey'] or cached_entry.get('path') != manifest.get('path'):
+            continue
+
+        manifest.update(cached_entry)
+        manifest['summary'] = True
+        unchanged_apps[app_id] = steam_apps.pop(app_id)
+
+    return unchanged_apps
+
+
+def _restore_cached_app(app_id: str, manifest: dict, cached_steam_apps: dict):
+    """ Restore cached selected installation paths and mod settings of a freshly scanned app """
+    cached_entry = cached_steam_apps.get(app_id)
+    if cached_entry is None:
+        return
+
+    for mod in get_available_mods(dict()):
+        if mod.DLL_LOC_KEY_SELECTED in cached_entry:
+            manifest[mod.DLL_LOC_KEY_SELECTED] = cached_entry[mod.DLL_LOC_KEY_SELECTED]
+
+    _load_steam_apps_with_mod_settings({app_id: manifest}, scan_mod=True)
+
+
+def push_scan_chunk(apps: dict):
+    """ Push finished app entries to the FrontEnd while a library scan is still running """
+    if apps and hasattr(eel, 'scan_chunk'):
+        eel.scan_chunk(json_codec.dumps({'data': apps}))
+
+
 @app.utils.capture_app_exceptions
 def save_steam_lib(steam_apps):
     logging.info('Updating SteamApp disk cache.')
@@ -64,14 +132,62 @@ def save_steam_lib(steam_apps):
         if entry.get('_showDetails'):
             entry.pop('_showDetails')
 
-    AppSettings.save_steam_apps(reduce_steam_apps_for_export(steam_apps))
+    # -- Reduce and store only apps changed since the last save
+    changed_apps, digests = _get_changed_apps(steam_apps)
+    if AppSettings.update_steam_apps(reduce_steam_apps_for_export(changed_apps), steam_apps.keys()):
+        _record_saved_apps(digests)
+    else:
+        _saved_apps.clear()
     AppSettings.save()
 
 
+def _get_save_digest(entry: dict) -> str:
+    """ Digest of the entry data reduce_steam_apps_for_export reads, mod settings only by key, parent and value """
+    return entry_digest({k: [(s.get('key'), s.get('parent'), s.get('value')) for s in v]
+                         if k in _MOD_SETTINGS_KEYS and isinstance(v, list) else v
+                         for k, v in entry.items() if k in _SAVE_KEYS})
+
+
+def _get_changed_apps(steam_apps: dict):
+    """ Apps changed since they were last saved or loaded and the digest of every app. Apps whose
+        stored entry was written by another path since, eg. a custom library scan, count as changed.
+    """
+    stored_apps = AppSettings.get_stored_apps()
+    changed_apps, digests = dict(), dict()
+
+    for app_id, entry in steam_apps.items():
+        digests[app_id] = _get_save_digest(entry)
+        stored_digest = stored_apps.get(app_id, (None, None))[1]
+        if _saved_apps.get(app_id) != (digests[app_id], stored_digest):
+            changed_apps[app_id] = entry
+
+    logging.debug('Saving %s of %s apps.', len(changed_apps), len(steam_apps))
+    return changed_apps, digests
+
+
+def _record_loaded_apps(steam_apps: dict):
+    """ Record apps just loaded from the store as saved, save_steam_lib skips them while they are unchanged """
+    stored_apps = AppSettings.get_stored_apps()
+    for app_id, entry in steam_apps.items():
+        if app_id in stored_apps:
+            _saved_apps[app_id] = (_get_save_digest(entry), stored_apps[app_id][1])
+
+
+def _record_saved_apps(digests: dict):
+    stored_apps = AppSettings.get_stored_apps()
+    for app_id in [a for a in _saved_apps if a not in stored_apps]:
+        _saved_apps.pop(app_id)
+    for app_id, digest in digests.items():
+        if app_id in stored_apps:
+            _saved_apps[app_id] = (digest, stored_apps[app_id][1])
+
+
 @app.utils.capture_app_exceptions
 def load_steam_lib_fn():
-    """ Load saved SteamApps from disk """
-    steam_apps = _load_steam_apps_with_mod_settings(AppSettings.load_steam_apps())
+    """ Load the summary of every saved app, complete entries are loaded by load_steam_app_fn """
+    steam_apps = AppSettings.load_steam_app_summaries()
+    for entry in steam_apps.values():
+        entry['summary'] = True
 
     re_scan_required = False
 
@@ -84,44 +200,92 @@ def load_steam_lib_fn():
         re_scan_required = True
 
     logging.debug(f'Loaded {len(steam_apps.keys())} Steam Apps from disk.')
-    return json.dumps({'result': True, 'data': steam_apps, 'reScanRequired': re_scan_required})
+    return json_codec.dumps({'result': True, 'data': steam_apps, 'reScanRequired': re_scan_required})
 
 
-def scan_custom_libs(dir_id: str):
+@app.utils.capture_app_exceptions
+def load_steam_app_fn(app_id: str):
+    """ Load the complete entry of a saved app including all mod settings """
+    entry = AppSettings.load_steam_app(app_id)
+    if entry is None:
+        return json_codec.dumps({'result': False, 'msg': f'Could not find app with id {app_id}'})
+
+    _load_steam_apps_with_mod_settings({app_id: entry})
+    return json_codec.dumps({'result': True, 'data': entry})
+
+
+@app.utils.capture_app_exceptions
+def save_steam_app_fn(entry: dict):
+    """ Save a single complete app entry loaded by load_steam_app_fn """
+    app_id = entry.get('id') or entry.get('appid')
+    if not app_id or entry.get('summary'):
+        return json_codec.dumps({'result': False, 'msg': 'Only complete app entries can be saved'})
+
+    entry.pop('_showDetails', None)
+    result = AppSettings.save_steam_app(app_id, reduce_steam_apps_for_export({app_id: entry})[app_id])
+    return json_codec.dumps({'result': result, 'msg': '' if result else f'Could not save app {app_id}'})
+
+
+def scan_custom_libs(dir_id: str, scan_report: ScanReport = None, cached_apps: dict = None):
     """ Scan and save a custom library """
     logging.debug(f'Reading Custom Library: {dir_id}')
     if dir_id not in AppSettings.user_app_directories:
-        return json.dumps({'result': False, 'msg': f'Unknown Custom library with id: {dir_id}'})
+        return json_codec.dumps({'result': False, 'msg': f'Unknown Custom library with id: {dir_id}'})
 
     path = Path(AppSettings.user_app_directories.get(dir_id))
     if not path.exists():
         AppSettings.user_app_directories.pop(dir_id)
         AppSettings.save()
-        return json.dumps({'result': False, 'msg': f'Non Existing library {path.as_posix()} removed.'})
+        return json_codec.dumps({'result': False, 'msg': f'Non Existing library {path.as_posix()} removed.'})
 
-    result_apps = scan_custom_library(dir_id, path)
+    result_apps = scan_custom_library(dir_id, path, scan_report, cached_apps)
+    if ScanCancelEvent.is_set():
+        return json_codec.dumps({'result': False, 'msg': f'Scan of custom library {dir_id} cancelled.'})
     if not result_apps:
-        return json.dumps({'result': False, 'msg': f'No Apps found in {dir_id}: {path.as_posix()}'})
+        return json_codec.dumps({'result': False, 'msg': f'No Apps found in {dir_id}: {path.as_posix()}'})
 
     AppSettings.save_custom_dir_apps(dir_id, reduce_steam_apps_for_export(result_apps))
 
-    return json.dumps({'result': True, 'data': result_apps})
+    return json_codec.dumps({'result': True, 'data': result_apps})
 
 
 @app.utils.capture_app_exceptions
-def scan_app_lib_fn():
-    """ Refresh SteamLib and re-scan every app directory """
+def scan_app_lib_fn(stream: bool = False, cold: bool = False):
+    """ Refresh SteamLib and re-scan every app directory
+
+    :param stream: Push finished apps to the FrontEnd while scanning and only return a summary
+    :param cold: Scan every app again, ignore unchanged apps and the checkpoint of an interrupted scan
+    """
+    with SCAN_LOCK:
+        return _scan_app_lib(stream, cold)
+
+
+def _scan_app_lib(stream: bool, cold: bool = False):
     logging.debug('Reading Steam Library')
+    ScanCancelEvent.reset()
+
+    # -- Resume an interrupted scan from its checkpoint, a cold scan discards it
+    checkpoint = ScanCheckpoint.load()
+    if cold:
+        checkpoint.remove()
 
     # -- Load currently cached custom apps before
     #    they get overwritten by the scan
     cached_custom_apps = AppSettings.load_custom_dir_apps()
+    scan_report = ScanReport()
 
     # -- Read custom libraries and store result to disk
     #    Custom Apps will be loaded with AppSettings.load_steam_apps
     dir_ids = set(AppSettings.user_app_directories.keys())
     for dir_id in dir_ids:
-        scan_custom_libs(dir_id)
+        if dir_id in checkpoint.custom_dirs:
+            logging.debug('Custom Library %s already scanned by the interrupted scan.', dir_id)
+            continue
+        scan_custom_libs(dir_id, scan_report, cached_custom_apps)
+        if ScanCancelEvent.is_set():
+            return _cancel_scan(checkpoint, scan_report)
+        checkpoint.add_custom_dir(dir_id)
+        checkpoint.save()
 
     try:
         # -- Read this machines Steam library
@@ -137,13 +301,46 @@ def scan_app_lib_fn():
     except Exception as e:
         msg = f'Error getting Steam Lib: {e}'
         logging.error(msg)
-        return json.dumps({'result': False, 'msg': msg})
-
-    logging.debug('Acquiring OpenVR Dll locations for %s Steam Apps.', len(steam_apps.keys()))
-    steam_apps = run_update_steam_apps(steam_apps)
+        return json_codec.dumps({'result': False, 'msg': msg})
 
-    # -- Restore Mod settings cached on disk and add custom apps
+    # -- Load cached apps and skip apps with unchanged manifests
     cached_steam_apps = AppSettings.load_steam_apps()
+    _record_loaded_apps(cached_steam_apps)
+    unchanged_apps = dict() if cold else _reuse_unchanged_apps(steam_apps, cached_steam_apps)
+    # -- Rebuild the mod settings of apps finished by an interrupted scan
+    unchanged_apps.update(_load_steam_apps_with_mod_settings(checkpoint.take_finished_apps(steam_apps), scan_mod=True))
+    if stream:
+        push_scan_chunk(unchanged_apps)
+
+    restored_ids = set()
+
+    def _restore_chunk(manifest_ls: list):
+        chunk_apps = dict()
+        for manifest in manifest_ls:
+            app_id = manifest.get('appid')
+            _restore_cached_app(app_id, manifest, cached_steam_apps)
+            restored_ids.add(app_id)
+            chunk_apps[app_id] = manifest
+
+        checkpoint.add_apps(manifest_ls)
+
+        if stream:
+            push_scan_chunk(chunk_apps)
+
+    logging.debug('Acquiring OpenVR Dll locations for %s Steam Apps, re-using %s unchanged Apps.',
+                  len(steam_apps.keys()), len(unchanged_apps.keys()))
+    scanned_count = len(steam_apps.keys())
+    steam_apps = run_update_steam_apps(steam_apps, _restore_chunk, scan_report, cached_steam_apps)
+    if ScanCancelEvent.is_set():
+        return _cancel_scan(checkpoint, scan_report)
+
+    # -- Store scan telemetry
+    scan_report.finish()
+    scan_report.save()
+
+    # -- Restore apps of chunks that failed to report back
+    for app_id in set(steam_apps.keys()).difference(restored_ids):
+        _restore_cached_app(app_id, steam_apps[app_id], cached_steam_apps)
 
     # -- Restore cached selected installation paths for custom apps
     for app_id, cached_entry in cached_custom_apps.items():
@@ -151,19 +348,18 @@ def scan_app_lib_fn():
             if mod.DLL_LOC_KEY_SELECTED in cached_entry:
                 cached_steam_apps[app_id][mod.DLL_LOC_KEY_SELECTED] = cached_entry[mod.DLL_LOC_KEY_SELECTED]
 
+    # -- Add custom apps
+    custom_apps = dict()
     for app_id, cached_entry in cached_steam_apps.items():
-        if app_id in steam_apps:
-            # -- Restore cached selected installation paths for steam apps
-            for mod in get_available_mods(dict()):
-                if mod.DLL_LOC_KEY_SELECTED in cached_entry:
-                    steam_apps[app_id][mod.DLL_LOC_KEY_SELECTED] = cached_entry[mod.DLL_LOC_KEY_SELECTED]
-
-            steam_apps.update(_load_steam_apps_with_mod_settings({app_id: steam_apps[app_id]}, scan_mod=True))
-
-        # -- Add custom apps
         for dir_id in AppSettings.user_app_directories:
             if app_id.startswith(dir_id):
-                steam_apps[app_id] = cached_entry
+                custom_apps[app_id] = cached_entry
+
+    if stream:
+        push_scan_chunk(custom_apps)
+
+    steam_apps.update(custom_apps)
+    steam_apps.update(unchanged_apps)
 
     # -- Cache updated SteamApps to disk
     try:
@@ -171,10 +367,79 @@ def scan_app_lib_fn():
     except Exception as e:
         msg = f'Error saving Steam Lib data: {e}'
         logging.error(msg)
-        return json.dumps({'result': False, 'msg': msg})
+        return json_codec.dumps({'result': False, 'msg': msg})
+
+    checkpoint.remove()
+    AppSettings.backup_steam_apps()
+
+    if stream:
+        logging.debug('Finished streaming Steam Library to Front End [%s]', len(steam_apps.keys()))
+        return json_codec.dumps({'result': True, 'streamed': True, 'summary': {
+            'apps': len(steam_apps.keys()), 'scanned': scanned_count,
+            'unchanged': len(unchanged_apps.keys()), 'custom': len(custom_apps.keys())}})
 
     logging.debug('Providing Front End with Steam Library [%s]', len(steam_apps.keys()))
-    return json.dumps({'result': True, 'data': steam_apps})
+    return json_codec.dumps({'result': True, 'data': steam_apps})
+
+
+def push_library_update(apps: dict, removed: list):
+    """ Push apps changed outside of a library scan to the FrontEnd """
+    if (apps or removed) and hasattr(eel, 'library_update'):
+        eel.library_update(json_codec.dumps({'data': apps, 'removed': removed}))
+
+
+@app.utils.capture_app_exceptions
+def update_changed_apps_fn(app_ids: list):
+    """ Re-scan Steam apps whose appmanifest changed and remove uninstalled apps without a library scan """
+    with SCAN_LOCK:
+        ScanCancelEvent.reset()
+        steam_apps, removed = app.steam.SteamApps().read_app_manifests(app_ids)
+        cached_steam_apps = AppSettings.load_steam_apps_by_id(app_ids)
+        steam_apps = run_update_steam_apps(steam_apps, cached_apps=cached_steam_apps)
+
+        # -- Keep the cached entries instead of saving partially scanned manifests
+        if ScanCancelEvent.is_set():
+            ScanCancelEvent.reset()
+            return json_codec.dumps({'result': False, 'cancelled': True, 'msg': 'Update of changed apps cancelled.'})
+
+        for app_id, manifest in steam_apps.items():
+            _restore_cached_app(app_id, manifest, cached_steam_apps)
+
+        # -- Store only the changed and removed apps
+        removed = [app_id for app_id in removed if app_id in cached_steam_apps]
+        AppSettings.store_changed_apps(reduce_steam_apps_for_export(steam_apps), removed)
+
+    logging.info('Updated %s changed and removed %s uninstalled Steam Apps.', len(steam_apps.keys()), len(removed))
+    push_library_update(steam_apps, removed)
+    return json_codec.dumps({'result': True, 'data': steam_apps, 'removed': removed})
+
+
+def _cancel_scan(checkpoint: ScanCheckpoint, scan_report: ScanReport):
+    """ Keep the progress of a cancelled scan so the next scan resumes from here """
+    # -- The scan returned, later operations must not see its cancellation
+    ScanCancelEvent.reset()
+    checkpoint.save()
+    scan_report.finish()
+    scan_report.save()
+
+    msg = (f'Library scan cancelled. {len(checkpoint.apps.keys())} finished Apps will be re-used '
+           f'by the next scan.')
+    logging.info(msg)
+    return json_codec.dumps({'result': False, 'cancelled': True, 'msg': msg})
+
+
+def cancel_scan_fn():
+    """ Request the running library scan to stop after the directory currently listed """
+    ScanCancelEvent.set()
+    return json_codec.dumps({'result': True, 'msg': 'Library scan cancellation requested.'})
+
+
+def get_scan_report_fn():
+    """ Provide the telemetry report of the last library scan """
+    report = ScanReport.load()
+    if report is None:
+        return json_codec.dumps({'result': False, 'msg': 'No library scan report available.'})
+    return json_codec.dumps({'result': True, 'data': report})
 
 
 @app.utils.capture_app_exceptions
@@ -182,23 +447,23 @@ def remove_custom_app_fn(app_dict: dict):
     custom_apps = AppSettings.load_custom_dir_apps()
 
     if app_dict.get('appid') not in custom_apps:
-        return json.dumps({'result': False, 'msg': f'Could not find app with Id: {app_dict.get("appid")}'})
+        return json_codec.dumps({'result': False, 'msg': f'Could not find app with Id: {app_dict.get("appid")}'})
 
     entry = custom_apps.pop(app_dict.get('appid'))
     save_steam_lib(custom_apps)
     logging.debug('App entry: %s %s removed', entry.get('name'), entry.get('appid'))
-    return json.dumps({'result': True, 'msg': f'App entry {entry.get("name")} {entry.get("appid")} removed.'})
+    return json_codec.dumps({'result': True, 'msg': f'App entry {entry.get("name")} {entry.get("appid")} removed.'})
 
 
 @app.utils.capture_app_exceptions
 def add_custom_app_fn(app_dict: dict):
     # -- Check path
     if app_dict.get('path') in (None, ''):
-        return json.dumps({'result': False, 'msg': 'No valid path provided.'})
+        return json_codec.dumps({'result': False, 'msg': 'No valid path provided.'})
 
     path = Path(app_dict.get('path'))
     if not path.exists():
-        return json.dumps({'result': False, 'msg': 'Provided path does not exist.'})
+        return json_codec.dumps({'result': False, 'msg': 'Provided path does not exist.'})
 
     user_apps = dict()
     for entry_id, entry in AppSettings.load_custom_dir_apps().items():
@@ -207,8 +472,8 @@ def add_custom_app_fn(app_dict: dict):
 
         user_apps[entry_id] = entry
         if Path(entry.get('path')) == path:
-            return json.dumps({'result': False, 'msg': f'Entry already exists as '
-                                                       f'{entry.get("name")}, Id: {entry_id}.'})
+            return json_codec.dumps({'result': False, 'msg': f'Entry already exists as '
+                                                             f'{entry.get("name")}, Id: {entry_id}.'})
 
     # -- Create User Apps custom dir entry
     if app.globals.USER_APP_PREFIX not in AppSettings.user_app_directories:
@@ -219,17 +484,81 @@ def add_custom_app_fn(app_dict: dict):
     app_id = f'{app.globals.USER_APP_PREFIX}_{get_name_id(path.stem)}'
     manifest = create_custom_app(app_id, path, app_dict.get('name'))
     if not manifest:
-        return json.dumps({'result': False, 'msg': f'No OpenVR dll or Executables found in: {path.as_posix()} or '
-                                                   f'any sub directory.'})
+        return json_codec.dumps({'result': False, 'msg': f'No OpenVR dll or Executables found in: {path.as_posix()} or '
+                                                         f'any sub directory.'})
 
     # -- Save custom app
     user_apps[app_id] = manifest
     result = AppSettings.save_custom_dir_apps(app.globals.USER_APP_PREFIX, reduce_steam_apps_for_export(user_apps))
 
     if result:
-        return json.dumps({'result': result, 'msg': f'App entry {app_id} created.'})
+        return json_codec.dumps({'result': result, 'msg': f'App entry {app_id} created.'})
     else:
-        return json.dumps({'result': result, 'msg': f'Could not create user app settings.'})
+        return json_codec.dumps({'result': result, 'msg': f'Could not create user app settings.'})
+
+
+@app.utils.capture_app_exceptions
+def import_steam_shortcuts_fn(vr_only: bool = True):
+    """ Create user app entries for the non-Steam game shortcuts of the Steam client
+
+    :param vr_only: Only import shortcuts flagged as VR apps in Steam
+    """
+    with SCAN_LOCK:
+        return _import_steam_shortcuts(vr_only)
+
+
+def _import_steam_shortcuts(vr_only: bool):
+    user_apps = {i: e for i, e in AppSettings.load_custom_dir_apps().items()
+                 if i.startswith(app.globals.USER_APP_PREFIX)}
+    known_paths = {Path(e.get('path')) for e in user_apps.values() if e.get('path')}
+
+    # -- Create entries for shortcuts not yet added
+    new_apps, shortcut_exes = dict(), dict()
+    for shortcut in app.steam.SteamApps.read_shortcuts():
+        path = Path(shortcut['startDir'])
+        if (vr_only and not shortcut['openVr']) or path in known_paths or not path.exists():
+            continue
+
+        app_id = f'{app.globals.USER_APP_PREFIX}_{get_name_id(path.stem)}'
+        manifest = create_custom_app(app_id, path, shortcut['name'], scan=False)
+        if manifest:
+            known_paths.add(path)
+            new_apps[app_id], shortcut_exes[app_id] = manifest, shortcut['exe']
+
+    if not new_apps:
+        return json_codec.dumps({'result': False, 'msg': 'No new Steam shortcuts found to import.'})
+
+    # -- Scan all imported apps at once
+    ScanCancelEvent.reset()
+    new_apps = run_update_steam_apps(new_apps)
+    if ScanCancelEvent.is_set():
+        ScanCancelEvent.reset()
+        return json_codec.dumps({'result': False, 'cancelled': True, 'msg': 'Import of Steam shortcuts cancelled.'})
+
+    for app_id, manifest in new_apps.items():
+        # -- Steam already knows the executable to launch
+        exe = shortcut_exes[app_id]
+        if exe not in manifest.get('executablePaths', list()) and Path(exe).exists():
+            manifest['executablePaths'] = [exe] + manifest.get('executablePaths', list())
+            manifest['executablePathsSelected'] = [exe] + manifest.get('executablePathsSelected', list())
+
+    imported = {i: m for i, m in new_apps.items() if m.get('openVrDllPaths') or m.get('executablePaths')}
+    if not imported:
+        return json_codec.dumps({'result': False, 'msg': 'No OpenVR dll or Executables found for Steam shortcuts.'})
+
+    # -- Create User Apps custom dir entry
+    if app.globals.USER_APP_PREFIX not in AppSettings.user_app_directories:
+        AppSettings.user_app_directories[app.globals.USER_APP_PREFIX] = app.globals.get_settings_dir().as_posix()
+        AppSettings.save()
+
+    user_apps.update(imported)
+    result = AppSettings.save_custom_dir_apps(app.globals.USER_APP_PREFIX, reduce_steam_apps_for_export(user_apps))
+    if not result:
+        return json_codec.dumps({'result': False, 'msg': 'Could not create user app settings.'})
+
+    logging.debug('Imported %s Steam shortcuts: %s', len(imported), ', '.join(m['name'] for m in imported.values()))
+    return json_codec.dumps({'result': True, 'msg': f'Imported {len(imported)} Steam shortcuts.',
+                             'data': list(imported.keys())})
 
 
 @app.utils.capture_app_exceptions
@@ -240,43 +569,46 @@ def get_custom_dirs_fn():
 @app.utils.capture_app_exceptions
 def remove_custom_dir_fn(dir_id: str):
     if dir_id not in AppSettings.user_app_directories:
-        return json.dumps({'result': False, 'msg': f'Path id {dir_id} is unknown.'})
+        return json_codec.dumps({'result': False, 'msg': f'Path id {dir_id} is unknown.'})
 
     entry = AppSettings.user_app_directories.pop(dir_id)
     result = AppSettings.remove_custom_dir_apps(dir_id)
     if not result:
-        return json.dumps({'result': True, 'msg': f'Could not remove custom apps cache file.'})
+        return json_codec.dumps({'result': True, 'msg': f'Could not remove custom apps cache file.'})
 
     AppSettings.save()
-    return json.dumps({'result': True, 'msg': f'Custom library {entry} removed.'})
+    return json_codec.dumps({'result': True, 'msg': f'Custom library {entry} removed.'})
 
 
 @app.utils.capture_app_exceptions
 def add_custom_dir_fn(path: str):
     path = Path(path)
     if not path.exists():
-        return json.dumps({'result': False, 'msg': 'No valid path provided.'})
+        return json_codec.dumps({'result': False, 'msg': 'No valid path provided.'})
 
     for dir_id, usr_dir_path in AppSettings.user_app_directories.items():
         if Path(usr_dir_path) == path:
-            return json.dumps({'result': False, 'msg': f'Directory already added {dir_id}: {path.as_posix()}'})
+            return json_codec.dumps({'result': False, 'msg': f'Directory already added {dir_id}: {path.as_posix()}'})
 
     new_dir_id = f'{app.globals.CUSTOM_APP_PREFIX}{get_name_id(path.as_posix())}'
     AppSettings.user_app_directories[new_dir_id] = path.as_posix()
     AppSettings.save()
 
     # -- Scan custom app dir
-    result_dict = json.loads(scan_custom_libs(new_dir_id))
+    with SCAN_LOCK:
+        ScanCancelEvent.reset()
+        result_dict = json_codec.loads(scan_custom_libs(new_dir_id))
+        ScanCancelEvent.reset()
     if not result_dict['result']:
-        return json.dumps(result_dict)
+        return json_codec.dumps(result_dict)
 
-    return json.dumps({'result': True, 'msg': f'Added custom location {path.as_posix()}'})
+    return json_codec.dumps({'result': True, 'msg': f'Added custom location {path.as_posix()}'})
 
 
 @app.utils.capture_app_exceptions
 def get_mod_dir_fn(mod_type: int):
     mod = app.mod.get_mod(dict(), mod_type)
-    return str(WindowsPath(mod.get_source_dir()))
+    return str(Path(mod.get_source_dir()))
 
 
 @app.utils.capture_app_exceptions
@@ -291,27 +623,27 @@ def set_mod_dir_fn(directory_str, mod_type: int):
 
     # -- Set
     if app.mod.check_mod_data_dir(Path(directory_str), mod_type):
-        AppSettings.mod_data_dirs[mod_type] = str(WindowsPath(directory_str))
+        AppSettings.mod_data_dirs[mod_type] = str(Path(directory_str))
         AppSettings.save()
         result = True
 
     AppSettings.save()
-    return json.dumps({'result': result})
+    return json_codec.dumps({'result': result})
 
 
 @app.utils.capture_app_exceptions
 def update_mod_fn(manifest: dict, mod_type: int = 0, write: bool = False):
     mod = app.mod.get_mod(manifest, mod_type)
     if not mod:
-        return json.dumps({'result': False, 'msg': 'No Mod Type provided', 'manifest': manifest})
+        return json_codec.dumps({'result': False, 'msg': 'No Mod Type provided', 'manifest': manifest})
 
     if write:
         update_result = mod.write_updated_cfg()
     else:
         update_result = mod.update_from_disk()
 
-    return json.dumps({'result': all((update_result, not mod.error)),
-                       'msg': mod.error, 'manifest': mod.manifest})
+    return json_codec.dumps({'result': all((update_result, not mod.error)),
+                             'msg': mod.error, 'manifest': mod.manifest})
 
 
 @app.utils.capture_app_exceptions
@@ -320,21 +652,21 @@ def toggle_mod_install_fn(manifest: dict, mod_type: int = 0):
     mod_installed = mod.manifest.get(mod.VAR_NAMES['installed'], False)
 
     if not mod:
-        return json.dumps({'result': False, 'msg': 'No Mod Type provided or could not get install state.',
-                           'manifest': manifest})
+        return json_codec.dumps({'result': False, 'msg': 'No Mod Type provided or could not get install state.',
+                                 'manifest': manifest})
 
     # -- Install
     if not mod_installed:
         install_result = mod.install()
         mod.update_from_disk()
-        return json.dumps({'result': install_result, 'msg': mod.error, 'manifest': mod.manifest})
+        return json_codec.dumps({'result': install_result, 'msg': mod.error, 'manifest': mod.manifest})
     # -- Uninstall
     elif mod_installed is True:
         uninstall_result = mod.uninstall()
         mod.update_from_disk()
         if uninstall_result:
             mod.manifest[mod.VAR_NAMES['version']] = str()
-        return json.dumps({'result': uninstall_result, 'msg': mod.error, 'manifest': mod.manifest})
+        return json_codec.dumps({'result': uninstall_result, 'msg': mod.error, 'manifest': mod.manifest})
 
 
 @app.utils.capture_app_exceptions
@@ -343,19 +675,19 @@ def reset_mod_settings_fn(manifest: dict, mod_type: int = 0):
 
     if mod.reset_settings():
         update_result = mod.write_updated_cfg()
-        return json.dumps({'result': update_result, 'msg': mod.error, 'manifest': mod.manifest})
+        return json_codec.dumps({'result': update_result, 'msg': mod.error, 'manifest': mod.manifest})
 
-    return json.dumps({'result': False, 'msg': mod.error, 'manifest': mod.manifest})
+    return json_codec.dumps({'result': False, 'msg': mod.error, 'manifest': mod.manifest})
 
 
 @app.utils.capture_app_exceptions
 def launch_app_fn(manifest: dict):
     app_id = manifest.get('appid')
     if not app_id:
-        return json.dumps({'result': False, 'msg': 'Could not find valid Steam App ID'})
+        return json_codec.dumps({'result': False, 'msg': 'Could not find valid Steam App ID'})
 
     cmd = f'explorer "steam://rungameid/{app_id}"'
     logging.info('Launching %s', cmd)
 
     subprocess.Popen(cmd)
-    return json.dumps({'result': True, 'msg': f'Launched: {cmd}'})
+    return json_codec.dumps({'result': True, 'msg': f'Launched: {cmd}'})
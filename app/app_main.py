@@ -5,10 +5,13 @@ import gevent.event
 
 from . import app_fn
 from .app_settings import AppSettings
+from app.events import cancel_scan
+from app.util.library_watcher import LibraryWatcher
 from app.util.runasadmin import run_as_admin
 
 CLOSE_EVENT = gevent.event.Event()
 BROWSER_ALIVE = gevent.event.Event()
+_library_watcher = None
 
 
 def expose_main():
@@ -18,6 +21,7 @@ def expose_main():
 
 def request_close():
     logging.info('Received close request.')
+    cancel_scan()
     CLOSE_EVENT.set()
     if hasattr(eel, 'closeApp'):
         eel.closeApp()(close_js_result)
@@ -27,6 +31,29 @@ def close_js_result(result):
     logging.info('JS close app result: %s', result)
 
 
+def start_library_watcher():
+    """ Re-scan apps installed, updated or removed by Steam while the app is running """
+    global _library_watcher
+    if not AppSettings.watch_steam_library or _library_watcher is not None:
+        return
+
+    watcher = LibraryWatcher(app_fn.update_changed_apps_fn, interval=AppSettings.library_watch_interval,
+                             is_busy=app_fn.SCAN_LOCK.locked)
+    try:
+        watcher.run_in_greenlet()
+    except Exception as e:
+        logging.error('Could not start Steam library watcher: %s', e)
+        return
+    _library_watcher = watcher
+
+
+def stop_library_watcher():
+    global _library_watcher
+    if _library_watcher is not None:
+        _library_watcher.stop()
+        _library_watcher = None
+
+
 @eel.expose
 def close_request():
     request_close()
@@ -43,9 +70,26 @@ def load_steam_lib():
 
 
 @eel.expose
-def scan_app_lib():
+def load_steam_app(app_id: str):
+    return app_fn.load_steam_app_fn(app_id)
+
+
+@eel.expose
+def scan_app_lib(stream: bool = False):
     """ Refresh SteamLib and re-scan every app directory """
-    return app_fn.scan_app_lib_fn()
+    return app_fn.scan_app_lib_fn(stream)
+
+
+@eel.expose
+def cancel_app_lib_scan():
+    """ Stop a running library scan, finished apps are kept for the next scan """
+    return app_fn.cancel_scan_fn()
+
+
+@eel.expose
+def get_scan_report():
+    """ Telemetry of the last library scan: slowest apps, syscalls and throughput per library """
+    return app_fn.get_scan_report_fn()
 
 
 @eel.expose
@@ -53,6 +97,11 @@ def save_steam_lib(steam_apps):
     return app_fn.save_steam_lib(steam_apps)
 
 
+@eel.expose
+def save_steam_app(entry: dict):
+    return app_fn.save_steam_app_fn(entry)
+
+
 @eel.expose
 def remove_custom_app(app: dict):
     return app_fn.remove_custom_app_fn(app)
@@ -63,6 +112,12 @@ def add_custom_app(app: dict):
     return app_fn.add_custom_app_fn(app)
 
 
+@eel.expose
+def import_steam_shortcuts(vr_only: bool = True):
+    """ Import non-Steam game shortcuts of the Steam client as user apps """
+    return app_fn.import_steam_shortcuts_fn(vr_only)
+
+
 @eel.expose
 def add_custom_dir(path: str):
     return app_fn.add_custom_dir_fn(path)
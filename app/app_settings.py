@@ -1,8 +1,10 @@
-import json
 import logging
 from pathlib import Path
+from typing import List, Optional
 
 import app.globals as app_globals
+from app.util.library_store import LibraryStore, STEAM_DIR_ID
+from app.util.safe_file import read_json, write_json_atomic
 from app.util.utils import JsonRepr
 
 
@@ -56,6 +58,20 @@ class AppSettings(JsonRepr):
     # Default plugin paths
     mod_data_dirs = dict()
 
+    # Concurrent scan workers per volume, user set limits and measured throughput per worker count
+    scan_volume_workers = dict()
+    scan_volume_throughput = dict()
+
+    # Directories skipped by the app scanner added to or removed from the defaults in
+    # app_globals.SCAN_PRUNE_DIRS, see get_scan_prune_dirs. Maximum directory depth, 0 for unlimited
+    scan_prune_dirs = list()
+    scan_prune_dirs_removed = list()
+    scan_max_depth = app_globals.SCAN_MAX_DEPTH
+
+    # Watch Steam libraries for installed, updated or removed apps, polling interval in seconds
+    watch_steam_library = True
+    library_watch_interval = 5.0
+
     SETTINGS_FILE_OVR = ''
 
     def __init__(self):
@@ -82,9 +98,7 @@ class AppSettings(JsonRepr):
         file = cls._get_settings_file()
 
         try:
-            with open(file.as_posix(), 'w') as f:
-                # noinspection PyTypeChecker
-                f.write(json.dumps(cls.to_js_object(cls)))
+            write_json_atomic(file, cls.to_js_object(cls))
         except Exception as e:
             logging.error('Could not save application settings! %s', e)
             return False
@@ -95,11 +109,10 @@ class AppSettings(JsonRepr):
         file = cls._get_settings_file()
 
         try:
-            if file.exists():
-                with open(file.as_posix(), 'r') as f:
-                    # -- Load Settings
-                    # noinspection PyTypeChecker
-                    cls.from_js_dict(cls, json.loads(f.read()))
+            # -- Load Settings, from the backup if the settings file got damaged
+            data = read_json(file)
+            if data is not None:
+                cls.from_js_dict(cls, data)
         except Exception as e:
             logging.error('Could not load application settings! %s', e)
             return False
@@ -116,6 +129,16 @@ class AppSettings(JsonRepr):
         BrowserSettings.from_settings(AppSettings.browser_settings)
         return True
 
+    @classmethod
+    def get_scan_prune_dirs(cls) -> List[str]:
+        """ Default prune directories merged with the user's overrides. Only the overrides are saved
+            so later changes of the defaults also reach existing settings files.
+        """
+        removed = {d.casefold() for d in cls.scan_prune_dirs_removed}
+        prune_dirs = [d for d in app_globals.SCAN_PRUNE_DIRS if d.casefold() not in removed]
+        default_dirs = {d.casefold() for d in prune_dirs}
+        return prune_dirs + [d for d in cls.scan_prune_dirs if d.casefold() not in default_dirs]
+
     @classmethod
     def extract_custom_apps(cls, steam_apps: dict) -> dict:
         # -- Setup custom apps dict
@@ -137,6 +160,14 @@ class AppSettings(JsonRepr):
 
         return custom_apps
 
+    @classmethod
+    def _get_library_store(cls):
+        """ Library store with the JSON caches of earlier versions migrated """
+        files = {STEAM_DIR_ID: cls._get_steam_apps_file()}
+        files.update({dir_id: cls._get_custom_dir_file(dir_id) for dir_id in AppSettings.user_app_directories})
+        LibraryStore.migrate(files)
+        return LibraryStore
+
     @classmethod
     def save_steam_apps(cls, steam_apps: dict) -> bool:
         # -- Save apps in custom app dirs
@@ -148,90 +179,162 @@ class AppSettings(JsonRepr):
             return True
 
         # -- Save steam apps
-        file = cls._get_steam_apps_file()
+        try:
+            cls._get_library_store().save_apps(STEAM_DIR_ID, steam_apps)
+        except Exception as e:
+            logging.error('Could not store steam apps! %s', e)
+            return False
+        return True
+
+    @classmethod
+    def get_app_dir_id(cls, app_id: str) -> str:
+        for dir_id in AppSettings.user_app_directories:
+            if app_id.startswith(dir_id):
+                return dir_id
+        return STEAM_DIR_ID
+
+    @classmethod
+    def get_stored_apps(cls) -> dict:
+        """ Directory id and content digest of every cached app, app_id: (dir_id, digest) """
+        try:
+            return cls._get_library_store().get_stored_apps()
+        except Exception as e:
+            logging.error('Could not read stored apps! %s', e)
+            return dict()
+
+    @classmethod
+    def update_steam_apps(cls, changed_apps: dict, app_ids) -> bool:
+        """ Store changed apps only and remove cached apps missing in app_ids with the same rules as
+            save_steam_apps. Directories without changed or removed apps are not written.
+
+        :param changed_apps: app_id: entry of added or changed apps
+        :param app_ids: ids of all apps of the library including unchanged ones
+        """
+        app_ids = set(app_ids)
+        has_steam_apps = any(cls.get_app_dir_id(app_id) == STEAM_DIR_ID for app_id in app_ids)
+        removed_ids = [app_id for app_id, (dir_id, _) in cls.get_stored_apps().items() if app_id not in app_ids
+                       and (dir_id in AppSettings.user_app_directories or (dir_id == STEAM_DIR_ID and has_steam_apps))]
+
+        return cls.store_changed_apps(changed_apps, removed_ids)
+
+    @classmethod
+    def store_changed_apps(cls, changed_apps: dict, removed_ids) -> bool:
+        """ Store added or changed apps and remove the apps of removed_ids, other cached apps are not touched """
+        changed_by_dir = dict()
+        for app_id, entry in changed_apps.items():
+            changed_by_dir.setdefault(cls.get_app_dir_id(app_id), dict())[app_id] = entry
 
         try:
-            with open(file.as_posix(), 'w') as f:
-                # noinspection PyTypeChecker
-                f.write(json.dumps(steam_apps))
+            store = cls._get_library_store()
+            for dir_id, apps in changed_by_dir.items():
+                store.save_apps(dir_id, apps, replace=False)
+            if removed_ids:
+                store.remove_apps(removed_ids)
         except Exception as e:
-            logging.error('Could not store steam apps to file! %s', e)
+            logging.error('Could not store changed apps! %s', e)
             return False
         return True
 
+    @classmethod
+    def backup_steam_apps(cls) -> bool:
+        """ Keep the current app library as last-known-good backup """
+        try:
+            return cls._get_library_store().backup()
+        except Exception as e:
+            logging.error('Could not back up steam apps! %s', e)
+            return False
+
     @classmethod
     def load_steam_apps(cls) -> dict:
         # -- Add custom dir apps
         custom_apps = cls.load_custom_dir_apps()
 
-        # -- Locate cached steam apps
-        file = cls._get_steam_apps_file()
-        if not file.exists():
-            return custom_apps
-
         try:
-            with open(file.as_posix(), 'r') as f:
-                # noinspection PyTypeChecker
-                steam_apps = json.load(f)
+            steam_apps = cls._get_library_store().load_apps([STEAM_DIR_ID])
         except Exception as e:
-            logging.error('Could not load steam apps from file! %s', e)
+            logging.error('Could not load steam apps! %s', e)
             return dict()
 
-        # -- Add Known Apps data
-        for app_id, entry in steam_apps.items():
-            if app_id in app_globals.KNOWN_APPS:
-                entry.update(app_globals.KNOWN_APPS[app_id])
-
         # -- Merge in custom apps
         steam_apps.update(custom_apps)
 
         return steam_apps
 
     @classmethod
-    def save_custom_dir_apps(cls, dir_id, custom_apps) -> bool:
-        file = cls._get_custom_dir_file(dir_id)
+    def load_steam_app_summaries(cls) -> dict:
+        """ Name, path, size, OpenVR flag and mod install state of every cached app """
+        try:
+            summaries = cls._get_library_store().load_summaries([STEAM_DIR_ID, *AppSettings.user_app_directories])
+        except Exception as e:
+            logging.error('Could not load steam app summaries! %s', e)
+            return dict()
+
+        for app_id, summary in summaries.items():
+            if cls.get_app_dir_id(app_id) != STEAM_DIR_ID:
+                summary['userApp'] = True
+
+        return summaries
+
+    @classmethod
+    def load_steam_apps_by_id(cls, app_ids: List[str]) -> dict:
+        """ Cached entries of the Steam library apps in app_ids, custom apps are not included """
+        try:
+            return cls._get_library_store().load_apps([STEAM_DIR_ID], app_ids)
+        except Exception as e:
+            logging.error('Could not load steam apps! %s', e)
+            return dict()
+
+    @classmethod
+    def load_steam_app(cls, app_id: str) -> Optional[dict]:
+        """ Cached entry of a single Steam or custom app, None if the app is not cached """
+        dir_id = cls.get_app_dir_id(app_id)
+        try:
+            entry = cls._get_library_store().load_apps([dir_id], [app_id]).get(app_id)
+        except Exception as e:
+            logging.error('Could not load app %s! %s', app_id, e)
+            return None
+
+        if entry is not None and dir_id != STEAM_DIR_ID:
+            entry['userApp'] = True
+        return entry
 
+    @classmethod
+    def save_steam_app(cls, app_id: str, entry: dict) -> bool:
+        """ Store a single Steam or custom app, other cached apps are not touched """
         try:
-            with open(file.as_posix(), 'w') as f:
-                # noinspection PyTypeChecker
-                f.write(json.dumps(custom_apps))
+            cls._get_library_store().save_apps(cls.get_app_dir_id(app_id), {app_id: entry}, replace=False)
         except Exception as e:
-            logging.error('Could not store custom apps to file! %s', e)
+            logging.error('Could not store app %s! %s', app_id, e)
             return False
         return True
 
     @classmethod
-    def remove_custom_dir_apps(cls, dir_id) -> bool:
-        file = cls._get_custom_dir_file(dir_id)
+    def save_custom_dir_apps(cls, dir_id, custom_apps) -> bool:
+        try:
+            cls._get_library_store().save_apps(dir_id, custom_apps)
+        except Exception as e:
+            logging.error('Could not store custom apps! %s', e)
+            return False
+        return True
 
+    @classmethod
+    def remove_custom_dir_apps(cls, dir_id) -> bool:
         try:
-            file.unlink()
+            cls._get_library_store().remove_dir(dir_id)
+            # -- Remove the JSON cache of earlier versions
+            cls._get_custom_dir_file(dir_id).unlink(missing_ok=True)
         except Exception as e:
-            logging.error('Could not remove custom apps cache file! %s', e)
+            logging.error('Could not remove custom apps! %s', e)
             return False
         return True
 
     @classmethod
     def load_custom_dir_apps(cls) -> dict:
-        custom_apps = dict()
-
-        for dir_id in AppSettings.user_app_directories:
-            custom_apps[dir_id] = dict()
-            file = cls._get_custom_dir_file(dir_id)
-            if not file.exists():
-                continue
-
-            try:
-                with open(file.as_posix(), 'r') as f:
-                    # noinspection PyTypeChecker
-                    custom_apps[dir_id] = json.load(f)
-            except Exception as e:
-                logging.error('Could not load custom apps from file! %s', e)
-                return dict()
-
-        result_apps = dict()
-        for dir_id in custom_apps:
-            result_apps.update(custom_apps[dir_id])
+        try:
+            result_apps = cls._get_library_store().load_apps(AppSettings.user_app_directories)
+        except Exception as e:
+            logging.error('Could not load custom apps! %s', e)
+            return dict()
 
         for app_id in result_apps:
             result_apps[app_id]['userApp'] = True
@@ -0,0 +1,219 @@
+"""
+    Headless command line interface driving app_fn without starting the browser frontend
+
+    python -m app.cli scan [--repeat N] [--cold] [--full]
+    python -m app.cli list [--vr] [--mod MOD] [--installed]
+    python -m app.cli install|uninstall APP_ID --mod MOD
+    python -m app.cli set APP_ID --mod MOD KEY=VALUE [KEY=VALUE ...] [--parent PARENT]
+
+    Every command prints a JSON object to stdout and exits with 1 if the command failed.
+    --steam-path DIR scans the Steam library in DIR instead of the located Steam installation.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from typing import Callable, List, Optional
+
+import app.mod
+from app import app_fn
+from app.app_settings import AppSettings
+from app.events import ScanCancelEvent
+from app.globals import APP_NAME
+from app.log import setup_logging
+from app.mod import BaseModType
+from app.util import json_codec
+from app.util.manifest_worker import ManifestWorker
+from app.util.scan_report import ScanReport
+from app.util.utils import AppExceptionHook
+from app.valve.steam import SteamApps
+from app.valve.steam_locator import ExplicitPathLocator
+
+MOD_TYPES = {'fsr': BaseModType.fsr, 'foveated': BaseModType.foveated, 'vrp': BaseModType.vrp,
+             'vrp_rsf': BaseModType.vrp_rsf}
+
+
+def _setup_cli_logging(verbose: bool):
+    """ Keep stdout for JSON results, console log output goes to stderr """
+    setup_logging()
+    for logger in (logging.getLogger(), logging.getLogger(APP_NAME)):
+        for handler in logger.handlers:
+            if type(handler) is logging.StreamHandler:
+                handler.setStream(sys.stderr)
+                handler.setLevel(logging.DEBUG if verbose else logging.WARNING)
+
+
+def _call(func: Callable, *args) -> dict:
+    """ Call an app_fn function and decode its JSON result. Exceptions captured by the app are reported as failure """
+    result = func(*args)
+    if result is None:
+        return {'result': False, 'msg': AppExceptionHook.gui_msg or f'{func.__name__} failed'}
+    return json_codec.loads(result)
+
+
+def _get_var_names(mod_type: int) -> dict:
+    return getattr(app.mod, BaseModType.mod_types.get(mod_type)).VAR_NAMES
+
+
+def _load_lib() -> dict:
+    return _call(app_fn.load_steam_lib_fn).get('data') or dict()
+
+
+def _parse_value(value: str):
+    """ Settings values are JSON values like true, 0.77 or "text", anything else is used as string """
+    try:
+        return json_codec.loads(value)
+    except Exception:
+        # -- Codecs raise different decode errors
+        return value
+
+
+def cmd_scan(args) -> dict:
+    ManifestWorker.use_scan_index = ManifestWorker.use_scan_hints = not args.cold
+    runs, result = list(), dict()
+
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        try:
+            result = _call(app_fn.scan_app_lib_fn, False, args.cold)
+        except KeyboardInterrupt:
+            ScanCancelEvent.set()
+            return {'result': False, 'cancelled': True, 'msg': 'Scan interrupted.', 'runs': runs}
+
+        run = {'result': result.get('result', False), 'duration': round(time.perf_counter() - start, 4),
+               'apps': len(result.get('data') or dict())}
+        if not result.get('result'):
+            run['msg'] = result.get('msg')
+        runs.append(run)
+
+    output = {'result': all(r['result'] for r in runs), 'runs': runs, 'report': ScanReport.load()}
+    if args.full:
+        output['data'] = result.get('data')
+    return output
+
+
+def cmd_list(args) -> dict:
+    apps = list()
+    mod_types = [MOD_TYPES[args.mod]] if args.mod else list(MOD_TYPES.values())
+
+    for app_id, manifest in _load_lib().items():
+        installed = [name for name, mod_type in MOD_TYPES.items()
+                     if mod_type in mod_types and manifest.get(_get_var_names(mod_type)['installed'])]
+        if args.vr and not manifest.get('openVr'):
+            continue
+        if args.installed and not installed:
+            continue
+        apps.append({'appid': app_id, 'name': manifest.get('name'), 'path': manifest.get('path'),
+                     'openVr': manifest.get('openVr', False), 'installed': installed})
+
+    return {'result': True, 'data': apps}
+
+
+def _run_mod_fn(app_id: str, mod_type: int, func: Callable[[dict], dict]) -> dict:
+    """ Run a mod operation on the cached app entry and store the updated entry """
+    manifest = _call(app_fn.load_steam_app_fn, app_id).get('data')
+    if manifest is None:
+        return {'result': False, 'msg': f'Unknown app id {app_id}, run a scan first.'}
+
+    start = time.perf_counter()
+    result = func(manifest)
+    result['duration'] = round(time.perf_counter() - start, 4)
+
+    if result.get('manifest'):
+        app_fn.save_steam_app_fn(result['manifest'])
+        result['installed'] = result['manifest'].get(_get_var_names(mod_type)['installed'], False)
+        result.pop('manifest')
+    return result
+
+
+def cmd_install(args, install: bool = True) -> dict:
+    mod_type = MOD_TYPES[args.mod]
+
+    def _toggle(manifest: dict) -> dict:
+        if bool(manifest.get(_get_var_names(mod_type)['installed'])) == install:
+            return {'result': True, 'msg': f'{args.mod} already {"installed" if install else "uninstalled"}.'}
+        return _call(app_fn.toggle_mod_install_fn, manifest, mod_type)
+
+    return _run_mod_fn(args.app_id, mod_type, _toggle)
+
+
+def cmd_uninstall(args) -> dict:
+    return cmd_install(args, install=False)
+
+
+def cmd_set(args) -> dict:
+    mod_type = MOD_TYPES[args.mod]
+    settings_key = _get_var_names(mod_type)['settings']
+
+    def _set(manifest: dict) -> dict:
+        # -- Read current settings from disk before updating them
+        manifest = _call(app_fn.update_mod_fn, manifest, mod_type, False).get('manifest') or manifest
+
+        for setting in args.settings:
+            key, _, value = setting.partition('=')
+            options = [o for o in manifest.get(settings_key, list())
+                       if o.get('key') == key and (args.parent is None or o.get('parent') == args.parent)]
+            if not options:
+                return {'result': False, 'msg': f'Unknown {args.mod} setting: {key}'}
+            for option in options:
+                option['value'] = _parse_value(value)
+
+        return _call(app_fn.update_mod_fn, manifest, mod_type, True)
+
+    return _run_mod_fn(args.app_id, mod_type, _set)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m app.cli', description=f'{APP_NAME} command line interface')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log debug output to stderr')
+    parser.add_argument('--steam-path', help='Steam installation directory to use instead of the located one')
+    sub_parsers = parser.add_subparsers(dest='command', required=True)
+
+    scan = sub_parsers.add_parser('scan', help='Re-scan the Steam and custom libraries')
+    scan.add_argument('--repeat', type=int, default=1, help='Number of consecutive scans to run and time')
+    scan.add_argument('--cold', action='store_true',
+                      help='Scan every app directory completely, ignore the directory index, scan hints, '
+                           'unchanged apps and the checkpoint of an interrupted scan')
+    scan.add_argument('--full', action='store_true', help='Print the scanned apps of the last scan')
+    scan.set_defaults(func=cmd_scan)
+
+    ls = sub_parsers.add_parser('list', help='List apps of the last scan')
+    ls.add_argument('--vr', action='store_true', help='Only list OpenVR apps')
+    ls.add_argument('--mod', choices=MOD_TYPES.keys(), help='Only report this mod')
+    ls.add_argument('--installed', action='store_true', help='Only list apps with a mod installed')
+    ls.set_defaults(func=cmd_list)
+
+    for name, func, help_text in (('install', cmd_install, 'Install a mod into an app'),
+                                  ('uninstall', cmd_uninstall, 'Remove a mod from an app')):
+        mod_parser = sub_parsers.add_parser(name, help=help_text)
+        mod_parser.add_argument('app_id')
+        mod_parser.add_argument('--mod', choices=MOD_TYPES.keys(), required=True)
+        mod_parser.set_defaults(func=func)
+
+    set_parser = sub_parsers.add_parser('set', help='Update and write mod settings of an app')
+    set_parser.add_argument('app_id')
+    set_parser.add_argument('settings', nargs='+', metavar='KEY=VALUE', help='Setting key and JSON value')
+    set_parser.add_argument('--mod', choices=MOD_TYPES.keys(), required=True)
+    set_parser.add_argument('--parent', help='Parent key of nested settings')
+    set_parser.set_defaults(func=cmd_set)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = create_parser().parse_args(argv)
+    _setup_cli_logging(args.verbose)
+    AppSettings.load()
+
+    if args.steam_path:
+        SteamApps.locators = [ExplicitPathLocator(args.steam_path)]
+
+    output = args.func(args)
+    # -- Indented for humans, json_codec only produces compact output
+    print(json.dumps(output, indent=2))
+    return 0 if output.get('result') else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import logging
+import threading
 from typing import Optional
 
 import gevent
@@ -35,6 +36,27 @@ def progress_update(message):
     ProgressEvent.set(message)
 
 
+class ScanCancelEvent:
+    """ Cancellation token of the running library scan, checked from the scan worker threads """
+    event = threading.Event()
+
+    @classmethod
+    def set(cls):
+        cls.event.set()
+
+    @classmethod
+    def is_set(cls) -> bool:
+        return cls.event.is_set()
+
+    @classmethod
+    def reset(cls):
+        cls.event.clear()
+
+
+def cancel_scan():
+    ScanCancelEvent.set()
+
+
 IGNORE_ERROR = Hub.SYSTEM_ERROR + Hub.NOT_ERROR
 
 
@@ -29,48 +29,25 @@ UPDATE_INSTALL_FILE = 'OpenVR-FSR-App_{version}_win64'
 
 DEFAULT_LOG_LEVEL = 'DEBUG'
 
-KNOWN_APPS = {
-    "365960": {
-        "name": "rFactor 2",
-        "installdir": "rFactor 2",
-        "executable": "rFactor2.exe",
-        "exe_sub_path": "Bin64/",
-    },
-    "908520": {
-        "name": "fpsVR",
-        "installdir": "fpsVR",
-        "executable": "fpsVR.exe",
-        "exe_sub_path": ""
-    },
-    # "Half-Life: Alyx"
-    "546560": {"fsr_compatible": False},
-    # "STAR WARS: Squadrons"
-    "1222730": {"fsr_compatible": False},
-    # "Automobilista 2"
-    "1066890": {"fsr_compatible": False},
-    # "Project CARS 2"
-    "378860": {"fsr_compatible": False},
-    # "DOOM VFR"
-    "650000": {"fsr_compatible": False},
-    # "Microsoft Flight Simulator"
-    "1250410": {"fsr_compatible": False},
-    # "PAYDAY 2"
-    "218620": {"fsr_compatible": False},
-    # "Euro Truck Simulator 2"
-    "227300": {"fsr_compatible": True},
-    # "American Truck Simulator"
-    "270880": {"fsr_compatible": True},
-    # "Radial-G : Racing Revolved"
-    "330770": {"fsr_compatible": False},
-    # "Creed: Rise to Glory"
-    "804490": {"fsr_compatible": False},
-    # "RaceRoom Racing Experience"
-    "211500": {"fsr_compatible": False},
-    # "Onward"
-    "496240": {"fsr_compatible": False},
-}
-
-RF2_APPID = [k for k in KNOWN_APPS.keys()][0]
+# Directories skipped by the app scanner, matched case-insensitive against the end of the path relative
+# to the installation directory. OpenVR dll's live next to the binaries eg. <Game>_Data/Plugins/x86_64 in
+# Unity or Engine/Binaries/ThirdParty/OpenVR/OpenVRv1_x/Win64 in Unreal titles, never inside asset trees.
+# Only directories of engine managed content are listed, a plain "Movies" dir may well hold a launcher.
+SCAN_PRUNE_DIRS = [
+    # Unreal Engine packaged content, engine assets and shaders
+    'Content/Paks', 'Content/Movies', 'Engine/Content', 'Engine/Shaders', 'DerivedDataCache',
+    # Unity asset bundles and managed assemblies
+    '*_Data/StreamingAssets', '*_Data/Managed', '*_Data/il2cpp_data',
+    # Shader caches and Steam's redistributable installers
+    'ShaderCache', 'shader_cache', '_CommonRedist',
+]
+SCAN_MAX_DEPTH = 10  # Deepest known OpenVR location is Engine/Binaries/ThirdParty/OpenVR/OpenVRv1_x/Win64
+
+# Apps needing special treatment, see app.util.known_apps.KnownApps
+KNOWN_APPS_FILE_NAME = 'known_apps.json'
+KNOWN_APPS_VERSION = 1
+
+RF2_APPID = '365960'
 
 # Frozen or Debugger
 if getattr(sys, 'frozen', False):
@@ -104,6 +81,26 @@ if not PYTEST:
 else:
     CUSTOM_APPS_STORE_FILE_NAME = '_apps_tests.json'
 
+if not PYTEST:
+    LIBRARY_STORE_FILE_NAME = 'library.db'
+else:
+    LIBRARY_STORE_FILE_NAME = 'library_tests.db'
+
+if not PYTEST:
+    SCAN_INDEX_FILE_NAME = 'scan_index.json'
+else:
+    SCAN_INDEX_FILE_NAME = 'scan_index_tests.json'
+
+if not PYTEST:
+    SCAN_REPORT_FILE_NAME = 'scan_report.json'
+else:
+    SCAN_REPORT_FILE_NAME = 'scan_report_tests.json'
+
+if not PYTEST:
+    SCAN_CHECKPOINT_FILE_NAME = 'scan_checkpoint.jsonl'
+else:
+    SCAN_CHECKPOINT_FILE_NAME = 'scan_checkpoint_tests.jsonl'
+
 
 def check_and_create_dir(directory: Union[str, Path]) -> str:
     if not os.path.exists(directory):
@@ -1,4 +1,4 @@
-from pathlib import Path, WindowsPath
+from pathlib import Path
 from typing import Dict, Optional
 
 import app.mod
@@ -44,7 +44,7 @@ def update_mod_data_dirs() -> Dict[int, str]:
 
     for mod_type in BaseModType.mod_types.keys():
         data_dir_name = BaseModType.mod_data_dir_names[mod_type]
-        mod_dirs[mod_type] = str(WindowsPath(get_data_dir() / data_dir_name))
+        mod_dirs[mod_type] = str(Path(get_data_dir() / data_dir_name))
 
         custom_src_data_dir = AppSettings.mod_data_dirs.get(mod_type)
 
@@ -4,7 +4,9 @@ from typing import Optional
 
 import app
 import app.mod
+from app.util.dir_walker import walk_app_dir
 from app.util.manifest_worker import ManifestWorker, run_update_steam_apps
+from app.util.scan_report import ScanReport
 from app.util.utils import get_name_id
 
 
@@ -24,8 +26,9 @@ def create_custom_app(app_id: str, path: Path, name: str = None, scan=True) -> O
 
     # -- Check and find OpenVR / Executables
     if scan:
-        openvr_paths = [p for p in ManifestWorker.find_open_vr_dll(path)]
-        executable_path_ls = [p for p in ManifestWorker.find_executables(path)]
+        walk_result = walk_app_dir(path, prune_rules=ManifestWorker.get_prune_rules())
+        openvr_paths = walk_result.open_vr_dll_paths
+        executable_path_ls = walk_result.executable_paths
         if not openvr_paths and not executable_path_ls:
             return
 
@@ -50,7 +53,8 @@ def create_custom_app(app_id: str, path: Path, name: str = None, scan=True) -> O
     return manifest
 
 
-def scan_custom_library(dir_id: str, path: Path):
+def scan_custom_library(dir_id: str, path: Path, scan_report: Optional[ScanReport] = None,
+                        cached_apps: Optional[dict] = None):
     custom_apps = dict()
 
     for app_dir in path.glob('*'):
@@ -64,12 +68,12 @@ def scan_custom_library(dir_id: str, path: Path):
 
     if custom_apps:
         # -- Scan
-        custom_apps = run_update_steam_apps(custom_apps)
+        custom_apps = run_update_steam_apps(custom_apps, scan_report=scan_report, cached_apps=cached_apps)
 
     # -- Remove empty entries
     remove_ids = set()
     for app_id, entry in custom_apps.items():
-        if not entry['openVrDllPaths'] and not entry['executablePaths']:
+        if not entry.get('openVrDllPaths') and not entry.get('executablePaths'):
             remove_ids.add(app_id)
     for app_id in remove_ids:
         custom_apps.pop(app_id)
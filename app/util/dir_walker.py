@@ -0,0 +1,196 @@
+"""
+    Single pass directory walker to locate mod relevant files inside an app installation directory
+"""
+import fnmatch
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from app.globals import OPEN_VR_DLL, DXGI_DLL, EXE_NAME
+from app.util.scan_index import ScanIndex
+
+_OPEN_VR_DLL_NAME = OPEN_VR_DLL.casefold()
+_DXGI_DLL_NAME = DXGI_DLL.casefold()
+_EXE_SUFFIX = EXE_NAME.lstrip('*').casefold()
+
+
+class WalkResult:
+    """ Collected file hits and statistics of a single directory walk """
+    def __init__(self, base_path: Path):
+        self.base_path = base_path
+        self.open_vr_dll_paths: List[Path] = list()
+        self.dxgi_dll_paths: List[Path] = list()
+        self.executable_paths: List[Path] = list()
+
+        self.dirs_visited = 0
+        self.dirs_cached = 0
+        self.dirs_pruned = 0
+        self.files_examined = 0
+        self.syscalls = 0
+        self.cancelled = False
+        self.hint = None  # True if scan hints located the files, False if they missed and the tree got walked
+
+    def add_file(self, path: str, name: str) -> bool:
+        """ Sort a file into the matching hit list, name is expected to be casefolded """
+        if name == _OPEN_VR_DLL_NAME:
+            self.open_vr_dll_paths.append(Path(path))
+        elif name == _DXGI_DLL_NAME:
+            self.dxgi_dll_paths.append(Path(path))
+        elif name.endswith(_EXE_SUFFIX):
+            self.executable_paths.append(Path(path))
+        else:
+            return False
+        return True
+
+
+class PruneRules:
+    """ Directories to skip while walking an app directory. Patterns are glob patterns matched
+        case-insensitive against the end of the directory path relative to the walked directory.
+        A max_depth of 0 does not limit the depth.
+    """
+    def __init__(self, patterns: Iterable[str] = (), max_depth: int = 0):
+        self.patterns = list(patterns)
+        self.max_depth = max_depth
+
+        regex_ls = [fnmatch.translate(p) for pattern in self.patterns for p in (pattern, f'*/{pattern}')]
+        self._regex = re.compile('|'.join(regex_ls), re.IGNORECASE) if regex_ls else None
+
+    def is_pruned(self, rel_dir: str, depth: int) -> bool:
+        if self.max_depth and depth > self.max_depth:
+            return True
+        return self._regex is not None and self._regex.match(rel_dir) is not None
+
+
+def _push_sub_dirs(dir_stack: list, rel_dir: str, sub_dirs: List[str], result: WalkResult,
+                   prune_rules: Optional[PruneRules]):
+    """ Add sub directories not pruned to the stack, in listing order """
+    depth = rel_dir.count('/') + 2 if rel_dir else 1
+    rel_sub_dirs = list()
+
+    for d in sub_dirs:
+        rel_sub_dir = f'{rel_dir}/{d}' if rel_dir else d
+        if prune_rules is not None and prune_rules.is_pruned(rel_sub_dir, depth):
+            result.dirs_pruned += 1
+            continue
+        rel_sub_dirs.append(rel_sub_dir)
+
+    dir_stack.extend(reversed(rel_sub_dirs))
+
+
+def walk_app_dir(base_path: Path, index: Optional[ScanIndex] = None,
+                 prune_rules: Optional[PruneRules] = None,
+                 cancel_event: Optional[threading.Event] = None) -> WalkResult:
+    """ Walk the directory tree below base_path once with os.scandir and collect
+        openvr_api.dll, dxgi.dll and executable locations. File names are matched
+        case-insensitive like a glob on Windows would. Symlinked directories are
+        not followed to avoid walking in circles.
+
+        If a ScanIndex is provided, directories with an unchanged modification time
+        are not listed again but restored from the index. The index tree of base_path
+        gets replaced with the directories visited by this walk.
+
+        Sub directories matching the PruneRules are skipped and counted as pruned.
+
+        The cancel_event is checked before every directory. A cancelled walk returns
+        an incomplete result flagged as cancelled and leaves the index untouched.
+    """
+    result = WalkResult(base_path)
+    base_dir = base_path.as_posix()
+    cached_tree = index.get_tree(base_path) if index is not None else dict()
+    new_tree = dict()
+    dir_stack = ['']
+
+    while dir_stack:
+        if cancel_event is not None and cancel_event.is_set():
+            result.cancelled = True
+            return result
+
+        rel_dir = dir_stack.pop()
+        current_dir = f'{base_dir}/{rel_dir}' if rel_dir else base_dir
+
+        mtime = None
+        if index is not None:
+            try:
+                result.syscalls += 1
+                mtime = os.stat(current_dir).st_mtime_ns
+            except OSError as e:
+                logging.debug('Could not read directory %s: %s', current_dir, e)
+                continue
+
+            # -- Restore unchanged directory from index
+            cached_entry = cached_tree.get(rel_dir)
+            if cached_entry is not None and cached_entry[0] == mtime:
+                result.dirs_cached += 1
+                new_tree[rel_dir] = cached_entry
+                for name in cached_entry[2]:
+                    result.add_file(f'{current_dir}/{name}', name.casefold())
+                _push_sub_dirs(dir_stack, rel_dir, cached_entry[1], result, prune_rules)
+                continue
+
+        try:
+            result.syscalls += 1
+            with os.scandir(current_dir) as scandir_it:
+                entries = list(scandir_it)
+        except OSError as e:
+            logging.debug('Could not read directory %s: %s', current_dir, e)
+            continue
+
+        result.dirs_visited += 1
+        sub_dirs, matched_files = list(), list()
+
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    sub_dirs.append(entry.name)
+                    continue
+            except OSError:
+                continue
+
+            result.files_examined += 1
+            if result.add_file(entry.path, entry.name.casefold()):
+                matched_files.append(entry.name)
+
+        if index is not None:
+            new_tree[rel_dir] = [mtime, sub_dirs, matched_files]
+
+        _push_sub_dirs(dir_stack, rel_dir, sub_dirs, result, prune_rules)
+
+    if index is not None:
+        index.set_tree(base_path, new_tree)
+
+    return result
+
+
+def probe_app_dirs(base_path: Path, rel_dirs: Iterable[str]) -> WalkResult:
+    """ List only the directories rel_dirs below base_path without descending into their
+        sub directories. Used to verify scan hints instead of walking the whole tree,
+        paths are reported in the same format as walk_app_dir.
+    """
+    result = WalkResult(base_path)
+    base_dir = base_path.as_posix()
+
+    for rel_dir in rel_dirs:
+        current_dir = f'{base_dir}/{rel_dir}' if rel_dir else base_dir
+        try:
+            result.syscalls += 1
+            with os.scandir(current_dir) as scandir_it:
+                entries = list(scandir_it)
+        except OSError as e:
+            logging.debug('Could not read hinted directory %s: %s', current_dir, e)
+            continue
+
+        result.dirs_visited += 1
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+
+            result.files_examined += 1
+            result.add_file(entry.path, entry.name.casefold())
+
+    return result
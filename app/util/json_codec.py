@@ -0,0 +1,111 @@
+"""
+    JSON serializer used for the library store, settings files and eel responses. Uses orjson or
+    msgspec if installed and the standard library otherwise, all codecs read each others output.
+"""
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Optional, Type, Union
+
+JSON_CODEC_ENV = 'OPENVR_FSR_APP_JSON_CODEC'
+
+
+class JsonCodec:
+    """ dumps returns str so results can be handed to eel and written to text files as before """
+    name = 'json'
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    @classmethod
+    def dumps(cls, obj: Any, sort_keys: bool = False, default: Optional[Callable] = None) -> str:
+        return json.dumps(obj, sort_keys=sort_keys, default=default)
+
+    @classmethod
+    def loads(cls, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    name = 'orjson'
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import orjson
+        except ImportError:
+            return False
+        return True
+
+    @classmethod
+    def dumps(cls, obj: Any, sort_keys: bool = False, default: Optional[Callable] = None) -> str:
+        import orjson
+
+        # -- Settings use int dict keys, the standard library converts them to str as well
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=default, option=option).decode('utf-8')
+
+    @classmethod
+    def loads(cls, data: Union[str, bytes]) -> Any:
+        import orjson
+        return orjson.loads(data)
+
+
+class MsgspecCodec(JsonCodec):
+    name = 'msgspec'
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import msgspec
+        except ImportError:
+            return False
+        return True
+
+    @classmethod
+    def dumps(cls, obj: Any, sort_keys: bool = False, default: Optional[Callable] = None) -> str:
+        import msgspec
+
+        encoder = msgspec.json.Encoder(enc_hook=default, order='sorted' if sort_keys else None)
+        return encoder.encode(obj).decode('utf-8')
+
+    @classmethod
+    def loads(cls, data: Union[str, bytes]) -> Any:
+        import msgspec
+        return msgspec.json.decode(data)
+
+
+# -- In order of preference
+CODECS: Dict[str, Type[JsonCodec]] = {c.name: c for c in (OrjsonCodec, MsgspecCodec, JsonCodec)}
+
+_codec: Optional[Type[JsonCodec]] = None
+
+
+def get_codec() -> Type[JsonCodec]:
+    """ Codec set by set_codec or the environment, otherwise the fastest installed one """
+    global _codec
+    if _codec is None:
+        set_codec(os.environ.get(JSON_CODEC_ENV))
+    return _codec
+
+
+def set_codec(name: Optional[str] = None) -> Type[JsonCodec]:
+    """ Use the codec of that name or the fastest installed codec if name is empty """
+    global _codec
+    codec = CODECS.get(name) if name else None
+    if name and (codec is None or not codec.is_available()):
+        logging.warning('JSON codec %s is not available, using the fastest installed codec.', name)
+        codec = None
+
+    _codec = codec or next(c for c in CODECS.values() if c.is_available())
+    logging.debug('Using JSON codec %s', _codec.name)
+    return _codec
+
+
+def dumps(obj: Any, sort_keys: bool = False, default: Optional[Callable] = None) -> str:
+    return get_codec().dumps(obj, sort_keys, default)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return get_codec().loads(data)
@@ -0,0 +1,76 @@
+"""
+    Registry of apps needing special treatment, loaded once from data/known_apps.json
+"""
+import json
+import logging
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
+
+import app.globals as app_globals
+
+_EMPTY = MappingProxyType(dict())
+
+
+class KnownApps:
+    """ Entries are overlaid onto app manifests by app id when the Steam library is read, the shared
+        entries and the manifests read from disk are never changed. Keys starting with an underscore
+        only document the entry and are not applied. Supported keys:
+
+        name, installdir, executable, exe_sub_path  locate apps not installed by Steam
+        simmon_method, simmon_method_args           KnownAppsMethods used to locate the installation
+        fsr_compatible                              False if the FSR mod does not work with the app
+        scan_hints                                  Directories relative to the installation root known to hold
+                                                    mod dll's, Steam app paths do not include exe_sub_path
+    """
+    file: Optional[Path] = None  # Override the data file, used by tests
+    _apps: Optional[Dict[str, Mapping]] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_file(cls) -> Path:
+        return cls.file or app_globals.get_data_dir() / app_globals.KNOWN_APPS_FILE_NAME
+
+    @classmethod
+    def _load(cls) -> Dict[str, Mapping]:
+        file = cls._get_file()
+        try:
+            with open(file.as_posix(), 'r', encoding='utf-8') as f:
+                # noinspection PyTypeChecker
+                data = json.load(f)
+        except Exception as e:
+            logging.error('Could not load known apps from %s: %s', file.as_posix(), e)
+            return dict()
+
+        if data.get('version', 0) > app_globals.KNOWN_APPS_VERSION:
+            logging.warning('Known apps file version %s is newer than the supported version %s.',
+                            data.get('version'), app_globals.KNOWN_APPS_VERSION)
+
+        return {str(app_id): MappingProxyType({k: v for k, v in entry.items() if not k.startswith('_')})
+                for app_id, entry in data.get('apps', dict()).items()}
+
+    @classmethod
+    def apps(cls) -> Dict[str, Mapping]:
+        """ All entries, loaded on first access """
+        if cls._apps is None:
+            with cls._lock:
+                if cls._apps is None:
+                    cls._apps = cls._load()
+        return cls._apps
+
+    @classmethod
+    def get(cls, app_id: str) -> Mapping:
+        """ Read-only entry of an app, empty if the app is not known """
+        return cls.apps().get(str(app_id), _EMPTY)
+
+    @classmethod
+    def overlay(cls, app_id: str, entry: dict) -> dict:
+        """ New dict of entry with the known app values applied, entry itself is not changed """
+        known = cls.get(app_id)
+        return {**entry, **known} if known else entry
+
+    @classmethod
+    def reset(cls):
+        """ Read the data file again on next access """
+        cls._apps = None
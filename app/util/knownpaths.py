@@ -28,7 +28,7 @@ KNOWNFOLDERID Docs: https://docs.microsoft.com/en-us/windows/win32/shell/knownfo
 import sys
 import logging
 import ctypes
-from ctypes import windll, wintypes
+from ctypes import wintypes
 from typing import Optional
 from uuid import UUID
 
@@ -150,14 +150,28 @@ class UserHandle:   # [3]
     common  = wintypes.HANDLE(-1)
 
 
-_CoTaskMemFree = windll.ole32.CoTaskMemFree     # [4]
-_CoTaskMemFree.restype = None
-_CoTaskMemFree.argtypes = [ctypes.c_void_p]
+_shell_functions = None
 
-_SHGetKnownFolderPath = windll.shell32.SHGetKnownFolderPath     # [5] [3]
-_SHGetKnownFolderPath.argtypes = [
-    ctypes.POINTER(GUID), wintypes.DWORD, wintypes.HANDLE, ctypes.POINTER(ctypes.c_wchar_p)
-]
+
+def _get_shell_functions():
+    """ Load the Windows shell functions on first use, windll only exists on Windows """
+    global _shell_functions
+    if _shell_functions is not None:
+        return _shell_functions
+
+    from ctypes import windll
+
+    _CoTaskMemFree = windll.ole32.CoTaskMemFree     # [4]
+    _CoTaskMemFree.restype = None
+    _CoTaskMemFree.argtypes = [ctypes.c_void_p]
+
+    _SHGetKnownFolderPath = windll.shell32.SHGetKnownFolderPath     # [5] [3]
+    _SHGetKnownFolderPath.argtypes = [
+        ctypes.POINTER(GUID), wintypes.DWORD, wintypes.HANDLE, ctypes.POINTER(ctypes.c_wchar_p)
+    ]
+
+    _shell_functions = _CoTaskMemFree, _SHGetKnownFolderPath
+    return _shell_functions
 
 
 class PathNotFoundException(Exception):
@@ -165,6 +179,7 @@ class PathNotFoundException(Exception):
 
 
 def get_path(folder_id, user_handle=UserHandle.common):
+    _CoTaskMemFree, _SHGetKnownFolderPath = _get_shell_functions()
     fid = GUID(folder_id)
     pPath = ctypes.c_wchar_p()
     S_OK = 0
@@ -0,0 +1,387 @@
+"""
+    SQLite store of the cached app library. Apps, their dll and executable paths, mod state and scan
+    metadata live in normalized tables, saving a library only writes the rows of apps that changed.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import app.globals as app_globals
+from app.util import json_codec
+from app.util.safe_file import get_backup_file
+
+STEAM_DIR_ID = 'steam'
+SCHEMA_VERSION = 1
+
+# -- Entry keys stored in columns, everything else ends up in the extra JSON column
+APP_COLUMNS = {'appid': 'appid', 'name': 'name', 'path': 'path', 'openVr': 'open_vr'}
+SCAN_COLUMNS = {'scanKey': 'scan_key', 'buildid': 'build_id', 'SizeOnDisk': 'size_on_disk', 'sizeGb': 'size_gb'}
+PATH_KEYS = ('openVrDllPaths', 'openVrDllPathsSelected', 'executablePaths', 'executablePathsSelected')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS store_info (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS apps (
+    app_id TEXT PRIMARY KEY,
+    dir_id TEXT NOT NULL,
+    appid,
+    name TEXT,
+    path TEXT,
+    open_vr INTEGER,
+    extra TEXT NOT NULL DEFAULT '{}',
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS apps_dir_id ON apps (dir_id);
+CREATE TABLE IF NOT EXISTS app_paths (
+    app_id TEXT NOT NULL REFERENCES apps (app_id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (app_id, kind, position)
+);
+CREATE TABLE IF NOT EXISTS mod_settings (
+    app_id TEXT NOT NULL REFERENCES apps (app_id) ON DELETE CASCADE,
+    mod_type INTEGER NOT NULL,
+    installed INTEGER,
+    version TEXT,
+    settings TEXT,
+    PRIMARY KEY (app_id, mod_type)
+);
+CREATE TABLE IF NOT EXISTS scan_meta (
+    app_id TEXT PRIMARY KEY REFERENCES apps (app_id) ON DELETE CASCADE,
+    scan_key TEXT,
+    build_id,
+    size_on_disk,
+    size_gb
+);
+"""
+
+
+@lru_cache(maxsize=1)
+def _mod_var_names() -> Tuple[Tuple[int, dict], ...]:
+    """ Entry keys of every mod type, app.mod imports AppSettings so it is imported on first use """
+    import app.mod
+    return tuple((mod_type, getattr(app.mod, name).VAR_NAMES)
+                 for mod_type, name in app.mod.BaseModType.mod_types.items())
+
+
+def entry_digest(entry: dict) -> str:
+    data = json_codec.dumps(entry, sort_keys=True, default=str)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _split_entry(app_id: str, entry: dict) -> Tuple[tuple, tuple, List[tuple], List[tuple]]:
+    """ Split an app entry into its apps, scan_meta, app_paths and mod_settings rows """
+    used_keys = set(APP_COLUMNS) | set(SCAN_COLUMNS)
+
+    path_rows = list()
+    for kind in PATH_KEYS:
+        paths = entry.get(kind)
+        if isinstance(paths, list):
+            used_keys.add(kind)
+            path_rows += [(app_id, kind, position, p) for position, p in enumerate(paths)]
+
+    mod_rows = list()
+    for mod_type, var_names in _mod_var_names():
+        keys = (var_names['installed'], var_names['version'], var_names['settings'])
+        if not any(k in entry for k in keys):
+            continue
+        used_keys.update(keys)
+        installed, version = entry.get(keys[0]), entry.get(keys[1])
+        settings = json_codec.dumps(entry[keys[2]]) if keys[2] in entry else None
+        mod_rows.append((app_id, mod_type, installed, version, settings))
+
+    extra = {k: v for k, v in entry.items() if k not in used_keys}
+    open_vr = entry.get('openVr')
+    app_row = (entry.get('appid'), entry.get('name'), entry.get('path'),
+               None if open_vr is None else int(bool(open_vr)), json_codec.dumps(extra))
+    scan_row = tuple(entry.get(k) for k in SCAN_COLUMNS)
+
+    return app_row, scan_row, path_rows, mod_rows
+
+
+class LibraryStore:
+    """ One connection per process in WAL mode, re-opened when the settings directory changes """
+    file: Optional[Path] = None  # Override the database file, used by tests
+    _conn: Optional[sqlite3.Connection] = None
+    _conn_file: Optional[Path] = None
+    _migrated: Set[str] = set()
+    _lock = threading.RLock()
+
+    @classmethod
+    def get_file(cls) -> Path:
+        return cls.file or app_globals.get_settings_dir() / app_globals.LIBRARY_STORE_FILE_NAME
+
+    @staticmethod
+    def _open(file: Path) -> sqlite3.Connection:
+        conn = sqlite3.connect(file.as_posix(), check_same_thread=False, isolation_level=None)
+        try:
+            if conn.execute('PRAGMA quick_check').fetchone()[0] != 'ok':
+                raise sqlite3.DatabaseError('quick_check failed')
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            conn.executescript(_SCHEMA)
+            conn.execute('INSERT OR IGNORE INTO store_info (key, value) VALUES (?, ?)',
+                         ('schema_version', str(SCHEMA_VERSION)))
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    @classmethod
+    def _connect(cls) -> sqlite3.Connection:
+        file = cls.get_file()
+        if cls._conn is not None and cls._conn_file == file:
+            return cls._conn
+
+        cls.close()
+        try:
+            conn = cls._open(file)
+        except sqlite3.DatabaseError as e:
+            # -- Keep the damaged store for inspection and continue with the last-known-good backup
+            logging.error('Library store %s is damaged, restoring backup: %s', file.as_posix(), e)
+            for suffix in ('', '-wal', '-shm'):
+                damaged = file.with_name(f'{file.name}{suffix}')
+                if damaged.exists():
+                    os.replace(damaged.as_posix(), damaged.with_name(f'{damaged.name}.damaged').as_posix())
+            backup = get_backup_file(file)
+            if backup.exists():
+                shutil.copyfile(backup.as_posix(), file.as_posix())
+            try:
+                conn = cls._open(file)
+            except sqlite3.DatabaseError as e:
+                logging.error('Library store backup is damaged, starting with an empty store: %s', e)
+                file.unlink()
+                conn = cls._open(file)
+
+        cls._conn, cls._conn_file = conn, file
+        cls._migrated = {r[0][len('migrated:'):] for r in conn.execute(
+            "SELECT key FROM store_info WHERE key LIKE 'migrated:%'")}
+        return conn
+
+    @classmethod
+    def close(cls):
+        with cls._lock:
+            if cls._conn is not None:
+                cls._conn.close()
+            cls._conn, cls._conn_file = None, None
+
+    @classmethod
+    def backup(cls) -> bool:
+        """ Replace the last-known-good backup with a consistent copy of the store """
+        with cls._lock:
+            conn = cls._connect()
+            file = cls.get_file()
+            tmp_file = file.with_name(f'.{file.name}.tmp')
+            try:
+                backup_conn = sqlite3.connect(tmp_file.as_posix())
+                try:
+                    conn.backup(backup_conn)
+                finally:
+                    backup_conn.close()
+                os.replace(tmp_file.as_posix(), get_backup_file(file).as_posix())
+            except Exception as e:
+                logging.error('Could not back up library store! %s', e)
+                tmp_file.unlink(missing_ok=True)
+                return False
+        return True
+
+    @classmethod
+    def migrate(cls, files: Dict[str, Path]):
+        """ Import the JSON caches of earlier versions once per directory id. The files are left
+            in place so an earlier version still finds its cache.
+        """
+        with cls._lock:
+            conn = cls._connect()
+            for dir_id, file in files.items():
+                if dir_id in cls._migrated:
+                    continue
+
+                if file.exists():
+                    try:
+                        with open(file.as_posix(), 'rb') as f:
+                            apps = json_codec.loads(f.read())
+                        cls.save_apps(dir_id, apps)
+                        logging.info('Migrated %s cached apps from %s', len(apps), file.name)
+                    except Exception as e:
+                        logging.error('Could not migrate cached apps from %s: %s', file.as_posix(), e)
+                        continue
+
+                conn.execute('INSERT OR REPLACE INTO store_info (key, value) VALUES (?, ?)',
+                             (f'migrated:{dir_id}', file.name))
+                cls._migrated.add(dir_id)
+
+    @classmethod
+    def save_apps(cls, dir_id: str, apps: dict, replace: bool = True) -> int:
+        """ Write the apps of a directory, unchanged apps are skipped by their content digest
+
+        :param dir_id: STEAM_DIR_ID or the id of a custom app directory
+        :param apps: app_id: entry
+        :param replace: remove stored apps of the directory missing in apps
+        :return: number of apps written
+        """
+        with cls._lock:
+            conn = cls._connect()
+            stored = dict(conn.execute('SELECT app_id, digest FROM apps WHERE dir_id = ?', (dir_id,)))
+            written = 0
+
+            conn.execute('BEGIN')
+            try:
+                for app_id, entry in apps.items():
+                    digest = entry_digest(entry)
+                    if stored.get(app_id) == digest:
+                        continue
+                    cls._write_app(conn, dir_id, app_id, entry, digest)
+                    written += 1
+
+                if replace:
+                    removed = [(app_id,) for app_id in stored if app_id not in apps]
+                    conn.executemany('DELETE FROM apps WHERE app_id = ?', removed)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        logging.debug('Library store wrote %s of %s apps in %s', written, len(apps), dir_id)
+        return written
+
+    @staticmethod
+    def _write_app(conn: sqlite3.Connection, dir_id: str, app_id: str, entry: dict, digest: str):
+        app_row, scan_row, path_rows, mod_rows = _split_entry(app_id, entry)
+
+        conn.execute('INSERT INTO apps (app_id, dir_id, appid, name, path, open_vr, extra, digest) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (app_id) DO UPDATE SET '
+                     'dir_id = excluded.dir_id, appid = excluded.appid, name = excluded.name, '
+                     'path = excluded.path, open_vr = excluded.open_vr, extra = excluded.extra, '
+                     'digest = excluded.digest', (app_id, dir_id, *app_row, digest))
+        conn.execute('INSERT INTO scan_meta (app_id, scan_key, build_id, size_on_disk, size_gb) '
+                     'VALUES (?, ?, ?, ?, ?) ON CONFLICT (app_id) DO UPDATE SET '
+                     'scan_key = excluded.scan_key, build_id = excluded.build_id, '
+                     'size_on_disk = excluded.size_on_disk, size_gb = excluded.size_gb', (app_id, *scan_row))
+
+        conn.execute('DELETE FROM app_paths WHERE app_id = ?', (app_id,))
+        conn.executemany('INSERT INTO app_paths (app_id, kind, position, path) VALUES (?, ?, ?, ?)', path_rows)
+
+        conn.executemany('INSERT INTO mod_settings (app_id, mod_type, installed, version, settings) '
+                         'VALUES (?, ?, ?, ?, ?) ON CONFLICT (app_id, mod_type) DO UPDATE SET '
+                         'installed = excluded.installed, version = excluded.version, '
+                         'settings = excluded.settings', mod_rows)
+        mod_types = [r[1] for r in mod_rows]
+        conn.execute(f'DELETE FROM mod_settings WHERE app_id = ? AND mod_type NOT IN '
+                     f'({",".join("?" * len(mod_types))})', (app_id, *mod_types))
+
+    @classmethod
+    def remove_apps(cls, app_ids: Iterable[str]) -> int:
+        with cls._lock:
+            conn = cls._connect()
+            conn.execute('BEGIN')
+            try:
+                removed = conn.executemany('DELETE FROM apps WHERE app_id = ?', [(a,) for a in app_ids]).rowcount
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return removed
+
+    @classmethod
+    def get_stored_apps(cls) -> Dict[str, Tuple[str, str]]:
+        """ Directory id and content digest of every stored app, app_id: (dir_id, digest) """
+        with cls._lock:
+            return {app_id: (dir_id, digest) for app_id, dir_id, digest in cls._connect().execute(
+                'SELECT app_id, dir_id, digest FROM apps')}
+
+    @staticmethod
+    def _where(dir_ids: List[str], app_ids: Optional[List[str]] = None) -> Tuple[str, list]:
+        """ WHERE clause and parameters selecting apps of the directories, optionally only app_ids """
+        where = f'a.dir_id IN ({",".join("?" * len(dir_ids))})'
+        if app_ids is None:
+            return where, dir_ids
+        return f'{where} AND a.app_id IN ({",".join("?" * len(app_ids))})', dir_ids + app_ids
+
+    @staticmethod
+    def _add_mod_state(conn: sqlite3.Connection, apps: dict, where: str, params: list, settings: bool):
+        var_names = dict(_mod_var_names())
+        columns = 'installed, version, settings' if settings else 'installed, version, NULL'
+        for app_id, mod_type, installed, version, mod_settings in conn.execute(
+                f'SELECT m.app_id, mod_type, {columns} FROM mod_settings m '
+                f'JOIN apps a USING (app_id) WHERE {where}', params):
+            names = var_names.get(mod_type)
+            if names is None:
+                continue
+            if installed is not None:
+                apps[app_id][names['installed']] = bool(installed)
+            if version is not None:
+                apps[app_id][names['version']] = version
+            if mod_settings is not None:
+                apps[app_id][names['settings']] = json_codec.loads(mod_settings)
+
+    @classmethod
+    def load_apps(cls, dir_ids: Iterable[str], app_ids: Optional[Iterable[str]] = None) -> dict:
+        """ Entries of all apps stored for the directories or only of app_ids, app_id: entry """
+        dir_ids = list(dir_ids)
+        app_ids = None if app_ids is None else list(app_ids)
+        if not dir_ids or app_ids == list():
+            return dict()
+
+        where, params = cls._where(dir_ids, app_ids)
+        apps = dict()
+        with cls._lock:
+            conn = cls._connect()
+            for app_id, appid, name, path, open_vr, extra in conn.execute(
+                    f'SELECT app_id, appid, name, path, open_vr, extra FROM apps a WHERE {where}', params):
+                apps[app_id] = {'appid': appid, 'name': name, 'path': path,
+                                'openVr': None if open_vr is None else bool(open_vr),
+                                **{k: list() for k in PATH_KEYS}}
+                apps[app_id].update(json_codec.loads(extra))
+
+            for app_id, *values in conn.execute(
+                    f'SELECT s.app_id, scan_key, build_id, size_on_disk, size_gb FROM scan_meta s '
+                    f'JOIN apps a USING (app_id) WHERE {where}', params):
+                apps[app_id].update(zip(SCAN_COLUMNS, values))
+
+            for app_id, kind, path in conn.execute(
+                    f'SELECT p.app_id, kind, p.path FROM app_paths p JOIN apps a USING (app_id) '
+                    f'WHERE {where} ORDER BY p.app_id, kind, position', params):
+                apps[app_id][kind].append(path)
+
+            cls._add_mod_state(conn, apps, where, params, settings=True)
+
+        return apps
+
+    @classmethod
+    def load_summaries(cls, dir_ids: Iterable[str]) -> dict:
+        """ Name, path, size, OpenVR flag and mod install state of all apps stored for the directories.
+            Paths, mod settings and extra values are not read.
+        """
+        dir_ids = list(dir_ids)
+        if not dir_ids:
+            return dict()
+
+        where, params = cls._where(dir_ids)
+        apps = dict()
+        with cls._lock:
+            conn = cls._connect()
+            for app_id, appid, name, path, open_vr, size_gb in conn.execute(
+                    f'SELECT a.app_id, appid, name, path, open_vr, size_gb FROM apps a '
+                    f'LEFT JOIN scan_meta s USING (app_id) WHERE {where}', params):
+                apps[app_id] = {'appid': appid, 'name': name, 'path': path, 'sizeGb': size_gb,
+                                'openVr': None if open_vr is None else bool(open_vr)}
+
+            cls._add_mod_state(conn, apps, where, params, settings=False)
+
+        return apps
+
+    @classmethod
+    def remove_dir(cls, dir_id: str) -> int:
+        """ Remove all apps of a directory, returns the number of removed apps """
+        with cls._lock:
+            return cls._connect().execute('DELETE FROM apps WHERE dir_id = ?', (dir_id,)).rowcount
@@ -0,0 +1,193 @@
+"""
+    Watch Steam library folders for changed appmanifest files to re-scan single apps instead of the library
+"""
+import fnmatch
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import gevent
+
+from app.valve.steam import SteamApps, STEAM_LIBRARY_FILE, STEAM_MANIFEST_PATTERN
+
+_WATCHED_PATTERNS = (STEAM_MANIFEST_PATTERN, STEAM_LIBRARY_FILE)
+
+
+def is_watched_file(name: str) -> bool:
+    name = name.casefold()
+    return any(fnmatch.fnmatch(name, pattern.casefold()) for pattern in _WATCHED_PATTERNS)
+
+
+class WatchBackend:
+    """ Reports changed appmanifest and libraryfolders files of the watched library folders """
+    name = 'base'
+
+    def start(self, folders: List[Path]):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+    def poll(self) -> Set[Path]:
+        """ Files created, modified or removed since the last poll """
+        raise NotImplementedError
+
+
+class PollingBackend(WatchBackend):
+    """ Lists the library folders and compares modification time and size of the watched files only """
+    name = 'polling'
+
+    def __init__(self):
+        self.folders: List[Path] = list()
+        self._snapshot: Dict[Path, Tuple[int, int]] = dict()
+
+    def _read_snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = dict()
+        for folder in self.folders:
+            try:
+                with os.scandir(folder) as scandir_it:
+                    for entry in scandir_it:
+                        if not is_watched_file(entry.name):
+                            continue
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        snapshot[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+            except OSError as e:
+                logging.debug('Could not list watched library %s: %s', folder, e)
+        return snapshot
+
+    def start(self, folders: List[Path]):
+        self.folders = list(folders)
+        self._snapshot = self._read_snapshot()
+
+    def poll(self) -> Set[Path]:
+        snapshot = self._read_snapshot()
+        changed = {f for f in snapshot.keys() | self._snapshot.keys() if snapshot.get(f) != self._snapshot.get(f)}
+        self._snapshot = snapshot
+        return changed
+
+
+class WatchdogBackend(WatchBackend):
+    """ Native change notifications of the optional watchdog package, inotify on Linux and
+        ReadDirectoryChangesW on Windows. Events arrive in the observer thread and are collected until polled.
+    """
+    name = 'watchdog'
+
+    def __init__(self):
+        from watchdog.observers import Observer
+
+        self._observer_type = Observer
+        self._observer = None
+        self._changed: Set[Path] = set()
+        self._lock = threading.Lock()
+
+    def dispatch(self, event):
+        """ Called by the watchdog observer thread for every file system event """
+        for path in (getattr(event, 'src_path', ''), getattr(event, 'dest_path', '')):
+            if path and is_watched_file(os.path.basename(path)):
+                with self._lock:
+                    self._changed.add(Path(os.fsdecode(path)))
+
+    def start(self, folders: List[Path]):
+        self._observer = self._observer_type()
+        for folder in folders:
+            if folder.is_dir():
+                self._observer.schedule(self, folder.as_posix(), recursive=False)
+        self._observer.start()
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def poll(self) -> Set[Path]:
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        return changed
+
+
+def get_watch_backend() -> WatchBackend:
+    """ Native notifications if watchdog is installed, otherwise poll the library folders """
+    try:
+        return WatchdogBackend()
+    except ImportError:
+        return PollingBackend()
+
+
+class LibraryWatcher:
+    """ Collects app ids of changed appmanifest files and hands them to on_change once
+        the manifest did not change for settle_time seconds. Steam rewrites manifests
+        continuously while an app downloads, so only finished changes trigger a re-scan.
+    """
+    def __init__(self, on_change: Callable[[List[str]], None], backend: Optional[WatchBackend] = None,
+                 interval: float = 5.0, settle_time: Optional[float] = None,
+                 is_busy: Optional[Callable[[], bool]] = None,
+                 find_libraries: Callable[[], Iterable[Path]] = SteamApps.find_steam_libraries):
+        self.on_change = on_change
+        self.backend = backend or get_watch_backend()
+        self.interval = interval
+        self.settle_time = interval if settle_time is None else settle_time
+        self.is_busy = is_busy
+        self.find_libraries = find_libraries
+
+        self.pending: Dict[str, float] = dict()
+        self._greenlet = None
+
+    def start(self):
+        folders = list(self.find_libraries() or list())
+        self.backend.start(folders)
+        logging.info('Watching %s Steam libraries with %s backend.', len(folders), self.backend.name)
+
+    def stop(self):
+        if self._greenlet is not None:
+            self._greenlet.kill()
+            self._greenlet = None
+        self.backend.stop()
+
+    def check(self, now: Optional[float] = None) -> List[str]:
+        """ Poll the backend and hand settled app ids to on_change
+
+        :return: App ids handed to on_change
+        """
+        now = time.monotonic() if now is None else now
+
+        for file in self.backend.poll():
+            if file.name.casefold() == STEAM_LIBRARY_FILE.casefold():
+                logging.info('Steam library folders changed, restarting library watcher.')
+                self.backend.stop()
+                self.start()
+                continue
+
+            app_id = SteamApps.get_manifest_app_id(file)
+            if app_id is not None:
+                self.pending[app_id] = now
+
+        settled = sorted(a for a, t in self.pending.items() if now - t >= self.settle_time)
+        if not settled or (self.is_busy is not None and self.is_busy()):
+            return list()
+
+        for app_id in settled:
+            self.pending.pop(app_id)
+
+        logging.debug('Steam manifests changed for apps: %s', ', '.join(settled))
+        try:
+            self.on_change(settled)
+        except Exception as e:
+            logging.error('Error updating changed Steam apps: %s', e)
+        return settled
+
+    def _run(self):
+        while True:
+            gevent.sleep(self.interval)
+            self.check()
+
+    def run_in_greenlet(self):
+        """ Start watching and check for changes every interval inside the gevent event loop """
+        self.start()
+        self._greenlet = gevent.spawn(self._run)
@@ -1,66 +1,148 @@
+import contextlib
+import functools
 import threading
+import time
 from queue import Queue
 import concurrent.futures
 import logging
 import os
 from pathlib import Path
-from typing import Optional, List
+from typing import Callable, Optional, List
 
 import gevent
+import gevent.event
 
-from app.globals import OPEN_VR_DLL, EXE_NAME
+from app.app_settings import AppSettings
 from app.mod import get_available_mods
-from app.events import progress_update
+from app.util.dir_walker import PruneRules, WalkResult, probe_app_dirs, walk_app_dir
+from app.util.known_apps import KnownApps
+from app.util.scan_index import ScanIndex
+from app.util.scan_report import ScanReport
+from app.events import progress_update, ScanCancelEvent
 
 
-def run_update_steam_apps(steam_apps: dict) -> dict:
-    """ Calls ManifestWorker.update_steam_apps from thread to not block the event loop """
-    q = Queue()
-    t = threading.Thread(target=ManifestWorker.update_steam_apps, args=(steam_apps, q))
+def run_update_steam_apps(steam_apps: dict, chunk_callback: Optional[Callable[[list], None]] = None,
+                          scan_report: Optional[ScanReport] = None, cached_apps: Optional[dict] = None) -> dict:
+    """ Calls ManifestWorker.update_steam_apps from thread to not block the event loop
+
+        The worker thread wakes up the waiting greenlet through a threadsafe async watcher
+        of the gevent hub as soon as a chunk of manifests or the final result is ready.
+
+    :param steam_apps: Apps dict to scan
+    :param chunk_callback: Called inside the event loop with every finished list of manifests
+    :param scan_report: Collects per app scan statistics if provided
+    :param cached_apps: Results of the previous scan to take scan hints from
+    :return: The updated apps dict
+    """
+    hub = gevent.get_hub()
+    watcher = hub.loop.async_()
+    wake_up = gevent.event.Event()
+    chunk_queue, result_queue = Queue(), Queue()
+
+    def _put_chunk(manifest_ls: list):
+        chunk_queue.put(manifest_ls)
+        watcher.send()
+
+    def _run():
+        try:
+            ManifestWorker.update_steam_apps(steam_apps, result_queue, _put_chunk, scan_report, cached_apps)
+        except Exception as e:
+            logging.error('Error updating Steam Apps: %s', e)
+            result_queue.put(steam_apps)
+        watcher.send()
+
+    def _drain_chunks():
+        while not chunk_queue.empty():
+            manifest_ls = chunk_queue.get_nowait()
+            if chunk_callback is not None:
+                chunk_callback(manifest_ls)
+
+    watcher.start(wake_up.set)
+    t = threading.Thread(target=_run)
     t.start()
 
-    # -- Wait for thread to finish
-    while t.is_alive():
-        gevent.sleep(1)
-        t.join(timeout=0.1)
+    try:
+        # -- Wait for chunks and the final result without polling
+        while True:
+            wake_up.wait()
+            wake_up.clear()
+            _drain_chunks()
 
-    return q.get()
+            if not result_queue.empty():
+                # -- Chunks queued after the drain above but before the result
+                t.join()
+                _drain_chunks()
+                return result_queue.get_nowait()
+    finally:
+        watcher.stop()
+        watcher.close()
 
 
 class ManifestWorker:
     """ Multithreading powered search in apps dict for openvr_api.dll and executable paths """
     max_workers = min(48, int(max(4, os.cpu_count())))  # Number of maximum concurrent workers
-    chunk_size = 16  # Number of Manifests per worker
+    chunk_size = 16  # Maximum number of Manifests per worker
+    chunks_per_worker = 4  # Aim for this many chunks per worker so idle workers can pick up remaining work
+    bytes_per_dir_estimate = 8 * 1024 * 1024  # Guess directory count from SizeOnDisk for never scanned apps
+    use_scan_index = True  # Only re-list directories that changed since the last scan
+    use_scan_hints = True  # Probe the dll locations of the previous scan before walking the whole app directory
+    default_volume_workers = 4  # Concurrent workers per volume until a better count was measured
+    min_tuning_duration = 1.0  # Minimum scan duration in seconds to record a volume's throughput
 
     @classmethod
-    def update_steam_apps(cls, steam_apps: dict, queue: Queue = None) -> dict:
-        app_id_list = list(steam_apps.keys())
-
-        # -- Split server addresses into chunks for workers
-        manifest_ls_chunks = list()
-        while app_id_list:
-            # -- Create a list of chunk size number of AppIds
-            id_chunk_ls = list()
-            for i in range(min(cls.chunk_size, len(app_id_list))):
-                id_chunk_ls.append(app_id_list.pop())
-
-            # -- Append a list of manifests to search thru in this chunk
-            manifest_ls_chunks.append(
-                [steam_apps.get(app_id) for app_id in id_chunk_ls]
-            )
-
-        logging.debug('Using maximum of %s worker threads to search thru %s Apps in %s chunks.',
-                      cls.max_workers, len(steam_apps.keys()), len(manifest_ls_chunks))
+    def update_steam_apps(cls, steam_apps: dict, queue: Queue = None,
+                          chunk_callback: Optional[Callable[[list], None]] = None,
+                          scan_report: Optional[ScanReport] = None, cached_apps: Optional[dict] = None) -> dict:
+        scan_index = ScanIndex.load() if cls.use_scan_index else None
+        cached_apps = cached_apps if cls.use_scan_hints else None
+        prune_rules = cls.get_prune_rules()
+
+        # -- Group apps by volume and split them into cost balanced chunks per volume
+        volume_apps = dict()
+        for app_id, manifest in steam_apps.items():
+            volume_apps.setdefault(cls.get_volume_id(manifest.get('path')), dict())[app_id] = manifest
+        volume_workers = {v: cls.get_volume_workers(v) for v in volume_apps}
+        volume_chunks = {v: cls.schedule_chunks(apps, scan_index, volume_workers[v])
+                         for v, apps in volume_apps.items()}
+
+        logging.debug('Searching thru %s Apps on %s volumes: %s', len(steam_apps.keys()), len(volume_chunks),
+                      ', '.join(f'{v or "?"} {len(c)} chunks {volume_workers[v]} workers'
+                                for v, c in volume_chunks.items()))
         progress = 0
         progress_update(f'{progress} / {len(steam_apps.keys())}')
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=cls.max_workers) as executor:
-            future_info = {
-                executor.submit(cls.worker, manifest_ls): manifest_ls for manifest_ls in manifest_ls_chunks
-            }
+        # -- Every volume gets its own pool limited to the volume's concurrency
+        with contextlib.ExitStack() as stack:
+            future_info, future_volume, volume_pending, volume_start = dict(), dict(), dict(), dict()
+
+            # -- File system calls the workers actually made per volume, index and hints skip most of a walk
+            volume_work, work_lock = {v: 0 for v in volume_chunks}, threading.Lock()
+
+            def _add_work(volume_id: str, walk_result: WalkResult):
+                with work_lock:
+                    volume_work[volume_id] += walk_result.syscalls
+
+            for volume_id, manifest_ls_chunks in volume_chunks.items():
+                executor = stack.enter_context(
+                    concurrent.futures.ThreadPoolExecutor(max_workers=volume_workers[volume_id]))
+                volume_start[volume_id] = time.perf_counter()
+                volume_pending[volume_id] = len(manifest_ls_chunks)
+
+                for manifest_ls in manifest_ls_chunks:
+                    future = executor.submit(cls.worker, manifest_ls, scan_index, prune_rules, scan_report,
+                                             cached_apps, functools.partial(_add_work, volume_id))
+                    future_info[future], future_volume[future] = manifest_ls, volume_id
 
             for future in concurrent.futures.as_completed(future_info):
                 manifest_chunk = future_info[future]
+
+                # -- Measure volume throughput once all chunks of a volume finished
+                volume_id = future_volume[future]
+                volume_pending[volume_id] -= 1
+                if not volume_pending[volume_id] and not ScanCancelEvent.is_set():
+                    cls.update_volume_throughput(volume_id, volume_workers[volume_id], volume_work[volume_id],
+                                                 time.perf_counter() - volume_start[volume_id])
+
                 try:
                     manifest_ls = future.result()
                 except Exception as exc:
@@ -76,20 +158,181 @@ class ManifestWorker:
                     for manifest in manifest_ls:
                         steam_apps[manifest.get('appid')] = manifest
 
+                    if chunk_callback is not None:
+                        chunk_callback(manifest_ls)
+
                     # -- Update Progress
                     progress += len(manifest_ls)
                     manifest = manifest_ls[-1:][0]
                     progress_update(f'{manifest.get("path", " ")[0:2]} {progress} / {len(steam_apps.keys())}')
 
+        if ScanCancelEvent.is_set():
+            logging.info('Library scan cancelled after %s of %s Apps.', progress, len(steam_apps.keys()))
+
+        if scan_index is not None:
+            scan_index.save()
+
         if queue is not None:
             queue.put(steam_apps)
 
         return steam_apps
 
     @staticmethod
-    def worker(manifest_ls):
-        for manifest in manifest_ls:
+    def get_prune_rules() -> PruneRules:
+        return PruneRules(AppSettings.get_scan_prune_dirs(), AppSettings.scan_max_depth)
+
+    @staticmethod
+    def get_volume_id(path: Optional[str]) -> str:
+        """ Identify the volume an app is installed on by drive letter or device id """
+        drive = os.path.splitdrive(path or '')[0]
+        if drive:
+            return drive.upper()
+
+        try:
+            return str(os.stat(path).st_dev)
+        except (OSError, TypeError, ValueError):
+            return ''
+
+    @classmethod
+    def get_volume_workers(cls, volume_id: str) -> int:
+        """ Number of concurrent workers for a volume. A limit configured in AppSettings wins,
+            otherwise the best measured worker count is used after trying its neighbours once.
+        """
+        if volume_id in AppSettings.scan_volume_workers:
+            return min(cls.max_workers, max(1, int(AppSettings.scan_volume_workers[volume_id])))
+
+        measured = AppSettings.scan_volume_throughput.get(volume_id)
+        if not measured:
+            return min(cls.max_workers, cls.default_volume_workers)
+
+        best = int(max(measured, key=measured.get))
+        for candidate in (best * 2, best // 2):
+            if 1 <= candidate <= cls.max_workers and str(candidate) not in measured:
+                return candidate
+        return best
+
+    @classmethod
+    def update_volume_throughput(cls, volume_id: str, workers: int, work: int, duration: float):
+        """ Remember the throughput in file system calls per second reached with a worker count """
+        if volume_id in AppSettings.scan_volume_workers or duration < cls.min_tuning_duration or not work:
+            return
+
+        throughput = work / duration
+        measured = AppSettings.scan_volume_throughput.setdefault(volume_id, dict())
+        if str(workers) in measured:
+            throughput = (measured[str(workers)] + throughput) / 2
+        measured[str(workers)] = round(throughput, 2)
+        logging.debug('Volume %s scan throughput with %s workers: %.2f calls/s', volume_id, workers, throughput)
+
+    @classmethod
+    def estimate_cost(cls, manifest: dict, scan_index: Optional[ScanIndex] = None) -> float:
+        """ Estimate the scan cost of an app as number of directories to visit. Uses the
+            directory count of the previous scan if available, otherwise the size on disk.
+        """
+        if scan_index is not None and manifest.get('path'):
+            tree = scan_index.get_tree(Path(manifest['path']))
+            if tree:
+                return len(tree)
+
+        try:
+            return max(1.0, int(manifest.get('SizeOnDisk') or 0) / cls.bytes_per_dir_estimate)
+        except (TypeError, ValueError):
+            return 1.0
+
+    @classmethod
+    def schedule_chunks(cls, steam_apps: dict, scan_index: Optional[ScanIndex] = None,
+                        workers: Optional[int] = None) -> List[list]:
+        """ Order manifests by estimated scan cost, largest first, and group them into chunks
+            of similar cost. Expensive apps get a chunk of their own while cheap apps get
+            bundled up to chunk_size manifests. Chunks are returned largest first so the
+            thread pool picks up the long running work before the small chunks.
+
+        :param workers: Number of workers scanning the chunks, defaults to max_workers
+        """
+        costs = {app_id: cls.estimate_cost(m, scan_index) for app_id, m in steam_apps.items()}
+        target_cost = sum(costs.values()) / ((workers or cls.max_workers) * cls.chunks_per_worker)
+
+        manifest_ls_chunks, manifest_ls, chunk_cost = list(), list(), 0.0
+        for app_id in sorted(costs, key=costs.get, reverse=True):
+            manifest_ls.append(steam_apps.get(app_id))
+            chunk_cost += costs[app_id]
+
+            if chunk_cost >= target_cost or len(manifest_ls) >= cls.chunk_size:
+                manifest_ls_chunks.append(manifest_ls)
+                manifest_ls, chunk_cost = list(), 0.0
+
+        if manifest_ls:
+            manifest_ls_chunks.append(manifest_ls)
+
+        return manifest_ls_chunks
+
+    @staticmethod
+    def has_scan_hints(manifest: dict, cached_entry: Optional[dict]) -> bool:
+        """ The previous scan of an unchanged build found openvr_api.dll's, hints only replace a complete walk then """
+        return bool(cached_entry and cached_entry.get('openVrDllPaths') and cached_entry.get('path') == manifest.get(
+            'path') and cached_entry.get('buildid') == manifest.get('buildid'))
+
+    @classmethod
+    def get_scan_hints(cls, manifest: dict, cached_entry: Optional[dict]) -> List[str]:
+        """ Directories relative to the app path expected to contain the openvr_api.dll's. Taken from the
+            previous scan of an unchanged build and the scan_hints of the known apps data. Empty if there
+            is no such previous scan, first scans always walk the whole app directory.
+        """
+        base_path, hints = Path(manifest['path']), list()
+        if not cls.has_scan_hints(manifest, cached_entry):
+            return hints
+
+        for file in cached_entry['openVrDllPaths'] + (cached_entry.get('executablePaths') or list()):
+            try:
+                hints.append(Path(file).parent.relative_to(base_path).as_posix())
+            except ValueError:
+                continue
+
+        hints += KnownApps.get(manifest.get('appid')).get('scan_hints', list())
+
+        # -- Launchers usually live in the installation root
+        hints = [h.strip('/') for h in [''] + hints]
+        return list(dict.fromkeys('' if h == '.' else h for h in hints))
+
+    @classmethod
+    def scan_app_dir(cls, manifest: dict, scan_index: Optional[ScanIndex] = None,
+                     prune_rules: Optional[PruneRules] = None, cached_entry: Optional[dict] = None) -> WalkResult:
+        """ Probe the hinted directories first and walk the whole app directory if they miss an openvr_api.dll
+            or executable found by the previous scan.
+        """
+        base_path = Path(manifest['path'])
+        hints = cls.get_scan_hints(manifest, cached_entry)
+
+        if hints:
+            probe_result = probe_app_dirs(base_path, hints)
+            found_dlls = {p.as_posix() for p in probe_result.open_vr_dll_paths}
+            found_exes = {p.as_posix() for p in probe_result.executable_paths}
+            if set(cached_entry['openVrDllPaths']).issubset(found_dlls) \
+                    and set(cached_entry.get('executablePaths') or list()).issubset(found_exes):
+                probe_result.hint = True
+                return probe_result
+
+        walk_result = walk_app_dir(base_path, scan_index, prune_rules, ScanCancelEvent.event)
+        if hints:
+            walk_result.hint = False
+            walk_result.syscalls += probe_result.syscalls
+        return walk_result
+
+    @classmethod
+    def worker(cls, manifest_ls, scan_index: Optional[ScanIndex] = None, prune_rules: Optional[PruneRules] = None,
+               scan_report: Optional[ScanReport] = None, cached_apps: Optional[dict] = None,
+               work_callback: Optional[Callable[[WalkResult], None]] = None):
+        """ Scan the manifests of a chunk. Stops early if the scan got cancelled and only
+            returns the manifests that have been scanned completely.
+
+        :param work_callback: Called with the result of every app directory scanned, measures the work done
+        """
+        for idx, manifest in enumerate(manifest_ls):
+            if ScanCancelEvent.is_set():
+                return manifest_ls[:idx]
+
             manifest['openVr'] = False
+            start = time.perf_counter()
 
             # -- Test for valid path
             try:
@@ -102,25 +345,32 @@ class ManifestWorker:
 
             progress_update(f'{manifest["path"][0:2]} {Path(manifest["path"]).stem}')
 
-            # -- LookUp OpenVr Api location(s)
+            # -- LookUp OpenVr Api and Executable location(s) in a single pass
             try:
-                open_vr_dll_path_ls = ManifestWorker.find_open_vr_dll(Path(manifest['path']))
-                # -- Add OpenVr path info
-                manifest['openVrDllPaths'] = [p.as_posix() for p in open_vr_dll_path_ls]
-                manifest['openVrDllPathsSelected'] = [p.as_posix() for p in open_vr_dll_path_ls]
+                cached_entry = cached_apps.get(manifest.get('appid')) if cached_apps else None
+                walk_result = cls.scan_app_dir(manifest, scan_index, prune_rules, cached_entry)
             except Exception as e:
-                logging.error('Error locating OpenVR dll for: %s %s', manifest.get('name', 'Unknown'), e)
+                logging.error('Error scanning app directory for: %s %s', manifest.get('name', 'Unknown'), e)
                 continue
 
-            # -- LookUp Executable location(s)
-            try:
-                executable_path_ls = ManifestWorker.find_executables(Path(manifest['path']))
-                # -- Add executables path info
-                manifest['executablePaths'] = [p.as_posix() for p in executable_path_ls]
-                manifest['executablePathsSelected'] = [p.as_posix() for p in executable_path_ls]
-            except Exception as e:
-                logging.error('Error locating Executables for: %s %s', manifest.get('name', 'Unknown'), e)
-                continue
+            if work_callback is not None:
+                work_callback(walk_result)
+            if walk_result.cancelled:
+                return manifest_ls[:idx]
+
+            logging.debug('Scanned %s: %s directories listed, %s restored from index, %s skipped, scan hint %s',
+                          manifest.get('name', 'Unknown'), walk_result.dirs_visited, walk_result.dirs_cached,
+                          walk_result.dirs_pruned, {None: 'none', True: 'hit', False: 'missed'}[walk_result.hint])
+
+            open_vr_dll_path_ls = walk_result.open_vr_dll_paths
+            executable_path_ls = walk_result.executable_paths
+
+            # -- Add OpenVr path info
+            manifest['openVrDllPaths'] = [p.as_posix() for p in open_vr_dll_path_ls]
+            manifest['openVrDllPathsSelected'] = [p.as_posix() for p in open_vr_dll_path_ls]
+            # -- Add executables path info
+            manifest['executablePaths'] = [p.as_posix() for p in executable_path_ls]
+            manifest['executablePathsSelected'] = [p.as_posix() for p in executable_path_ls]
 
             if open_vr_dll_path_ls:
                 manifest['openVr'] = True
@@ -134,20 +384,15 @@ class ManifestWorker:
                         manifest[mod.VAR_NAMES['installed']] = manifest.get(mod.VAR_NAMES['installed'], False)
                         manifest[mod.VAR_NAMES['version']] = manifest.get(mod.VAR_NAMES['version'], '')
 
+            if scan_report is not None:
+                scan_report.add_app(manifest, walk_result, start, time.perf_counter())
+
         return manifest_ls
 
     @staticmethod
     def find_open_vr_dll(base_path: Path) -> List[Optional[Path]]:
-        open_vr_dll_ls: List[Optional[Path]] = list()
-        for file in base_path.glob(f'**/{OPEN_VR_DLL}'):
-            open_vr_dll_ls.append(file)
-
-        return open_vr_dll_ls
+        return walk_app_dir(base_path).open_vr_dll_paths
 
     @staticmethod
     def find_executables(base_path: Path) -> List[Optional[Path]]:
-        executable_ls: List[Optional[Path]] = list()
-        for file in base_path.glob(f'**/{EXE_NAME}'):
-            executable_ls.append(file)
-
-        return executable_ls
+        return walk_app_dir(base_path).executable_paths
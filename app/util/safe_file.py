@@ -0,0 +1,78 @@
+"""
+    Crash-safe writes of settings and cache files. A file is either completely replaced or left as it
+    was, the previous version is kept as last-known-good backup next to it.
+"""
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+from app.util import json_codec
+
+BACKUP_SUFFIX = '.bak'
+
+
+def get_backup_file(file: Path) -> Path:
+    return file.with_name(f'{file.name}{BACKUP_SUFFIX}')
+
+
+def _fsync_dir(directory: Path):
+    """ Persist renames inside directory, not supported on Windows where rename is durable already """
+    if os.name != 'posix':
+        return
+    fd = os.open(directory.as_posix(), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(file: Path, data: str, backup: bool = True):
+    """ Write data to a temporary file in the target directory, flush it to disk and rename it over file.
+        With backup the replaced file becomes the backup file. Raises OSError on failure, the
+        target is unchanged in that case.
+    """
+    fd, tmp_name = tempfile.mkstemp(prefix=f'.{file.name}.', suffix='.tmp', dir=file.parent.as_posix())
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if backup and file.exists():
+            os.replace(file.as_posix(), get_backup_file(file).as_posix())
+        os.replace(tmp_name, file.as_posix())
+        _fsync_dir(file.parent)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def write_json_atomic(file: Path, data: Any, backup: bool = True):
+    write_atomic(file, json_codec.dumps(data), backup)
+
+
+def read_json(file: Path) -> Optional[Any]:
+    """ Contents of file or of its backup if file is missing, truncated or otherwise unreadable.
+        None if neither could be read.
+    """
+    for candidate in (file, get_backup_file(file)):
+        if not candidate.exists():
+            continue
+        try:
+            with open(candidate.as_posix(), 'rb') as f:
+                data = json_codec.loads(f.read())
+        except Exception as e:
+            logging.error('Could not read %s: %s', candidate.as_posix(), e)
+            continue
+
+        if candidate != file:
+            logging.warning('Recovered %s from last-known-good backup.', file.name)
+        return data
+    return None
+
+
+def remove_with_backup(file: Path):
+    file.unlink(missing_ok=True)
+    get_backup_file(file).unlink(missing_ok=True)
@@ -0,0 +1,131 @@
+"""
+    Checkpoint of a running library scan so an interrupted scan resumes where it stopped
+"""
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import app.globals as app_globals
+from app.util import json_codec
+from app.util.safe_file import get_backup_file, remove_with_backup, write_atomic
+
+# -- Manifest keys written by the scan workers, mod settings get rebuilt from disk on restore
+SCAN_RESULT_KEYS = ('appid', 'path', 'scanKey', 'openVr', 'openVrDllPaths', 'openVrDllPathsSelected',
+                    'executablePaths', 'executablePathsSelected')
+
+
+class ScanCheckpoint:
+    """ Remembers the custom libraries and the scan results of the Steam apps a library scan finished so far.
+
+        The checkpoint file holds one JSON object per line, a header with version and custom libraries
+        followed by the scan result of every finished app. Finished apps get appended so a checkpoint
+        costs the size of a chunk instead of the whole scan so far.
+
+        Checkpointed results are only re-used if their scanKey and path still match the
+        current Steam library. The checkpoint gets removed once a scan completes.
+    """
+    def __init__(self, apps: Dict[str, dict] = None, custom_dirs: List[str] = None, version: str = None):
+        self.apps: Dict[str, dict] = apps or dict()
+        self.custom_dirs: List[str] = custom_dirs or list()
+        self.version = version or app_globals.get_version()
+
+    @staticmethod
+    def _get_checkpoint_file() -> Path:
+        return app_globals.get_settings_dir() / app_globals.SCAN_CHECKPOINT_FILE_NAME
+
+    @staticmethod
+    def _read_lines(file: Path) -> List[dict]:
+        """ Objects of every complete line, a line torn by a crash while appending is skipped """
+        lines = list()
+        with open(file.as_posix(), 'rb') as f:
+            for line in f:
+                try:
+                    lines.append(json_codec.loads(line))
+                except ValueError:
+                    logging.warning('Skipping incomplete scan checkpoint entry.')
+        return lines
+
+    @classmethod
+    def load(cls) -> 'ScanCheckpoint':
+        file = cls._get_checkpoint_file()
+
+        try:
+            for candidate in (file, get_backup_file(file)):
+                if not candidate.exists():
+                    continue
+                lines = cls._read_lines(candidate)
+                # -- Re-scan everything between versions
+                if not lines or lines[0].get('version') != app_globals.get_version():
+                    return cls()
+
+                apps = {r['appid']: r for r in lines[1:] if r.get('appid')}
+                return cls(apps, lines[0].get('custom_dirs'), lines[0].get('version'))
+        except Exception as e:
+            logging.error('Could not load scan checkpoint, scanning from the start! %s', e)
+        return cls()
+
+    def save(self) -> bool:
+        """ Rewrite the whole checkpoint """
+        lines = [{'version': self.version, 'custom_dirs': self.custom_dirs}] + list(self.apps.values())
+
+        try:
+            write_atomic(self._get_checkpoint_file(), ''.join(f'{json_codec.dumps(l)}\n' for l in lines))
+        except Exception as e:
+            logging.error('Could not store scan checkpoint to file! %s', e)
+            return False
+        return True
+
+    def _append(self, results: List[dict]) -> bool:
+        file = self._get_checkpoint_file()
+        if not file.exists():
+            return self.save()
+
+        try:
+            with open(file.as_posix(), 'a', encoding='utf-8') as f:
+                f.write(''.join(f'{json_codec.dumps(r)}\n' for r in results))
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            logging.error('Could not append to scan checkpoint file! %s', e)
+            return False
+        return True
+
+    def remove(self):
+        self.apps, self.custom_dirs = dict(), list()
+        file = self._get_checkpoint_file()
+
+        try:
+            remove_with_backup(file)
+        except Exception as e:
+            logging.error('Could not remove scan checkpoint file! %s', e)
+
+    def add_apps(self, manifest_ls: list) -> bool:
+        """ Remember the scan results of finished apps and append them to the checkpoint file """
+        results = [{k: manifest.get(k) for k in SCAN_RESULT_KEYS} for manifest in manifest_ls]
+        for result in results:
+            self.apps[result['appid']] = result
+        return self._append(results)
+
+    def add_custom_dir(self, dir_id: str):
+        if dir_id not in self.custom_dirs:
+            self.custom_dirs.append(dir_id)
+
+    def take_finished_apps(self, steam_apps: dict) -> dict:
+        """ Remove apps already scanned by the interrupted scan from steam_apps and return their
+            manifests updated with the checkpointed scan results, without mod settings.
+        """
+        finished_apps = dict()
+
+        for app_id, result in self.apps.items():
+            entry = steam_apps.get(app_id)
+            if entry is None or not entry.get('scanKey'):
+                continue
+            if entry.get('scanKey') != result.get('scanKey') or entry.get('path') != result.get('path'):
+                continue
+            finished_apps[app_id] = entry
+
+        for app_id in finished_apps:
+            steam_apps.pop(app_id).update(self.apps[app_id])
+
+        return finished_apps
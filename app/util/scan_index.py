@@ -0,0 +1,65 @@
+"""
+    Persistent directory modification time index to make app directory scans incremental
+"""
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import app.globals as app_globals
+from app.util.safe_file import read_json, write_json_atomic
+
+
+class ScanIndex:
+    """ Remembers per app installation directory the modification time, sub directories and
+        matching files of every directory visited by the last walk.
+
+        A directory only changes its modification time if a direct child gets created, removed
+        or renamed. A directory with an unchanged modification time therefore does not need to
+        be listed again, only its sub directories need to be checked.
+
+        Index layout: {base_path: {relative_dir: [mtime_ns, [sub dir names], [matched file names]]}}
+    """
+    def __init__(self, trees: Dict[str, Dict[str, list]] = None):
+        self.trees: Dict[str, Dict[str, list]] = trees or dict()
+
+    @staticmethod
+    def _get_index_file() -> Path:
+        return app_globals.get_settings_dir() / app_globals.SCAN_INDEX_FILE_NAME
+
+    @classmethod
+    def load(cls) -> 'ScanIndex':
+        trees = read_json(cls._get_index_file())
+        if not isinstance(trees, dict):
+            return cls()
+        return cls(trees)
+
+    def save(self) -> bool:
+        self.prune()
+        file = self._get_index_file()
+
+        try:
+            write_json_atomic(file, self.trees)
+        except Exception as e:
+            logging.error('Could not store scan index to file! %s', e)
+            return False
+        return True
+
+    def prune(self) -> List[str]:
+        """ Remove trees of app directories that no longer exist """
+        removed = [base for base in self.trees if not os.path.isdir(base)]
+        for base in removed:
+            self.trees.pop(base, None)
+        return removed
+
+    def get_tree(self, base_path: Path) -> Dict[str, list]:
+        return self.trees.get(base_path.as_posix(), dict())
+
+    def set_tree(self, base_path: Path, tree: Dict[str, list]):
+        """ Replace the tree of base_path. The tree only contains directories visited by
+            the last walk so entries of removed directories disappear with it.
+        """
+        self.trees[base_path.as_posix()] = tree
+
+    def clear(self):
+        self.trees = dict()
@@ -0,0 +1,110 @@
+"""
+    Scan telemetry collected per app to tune pruning and concurrency of library scans
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import app.globals as app_globals
+from app.util.safe_file import read_json, write_json_atomic
+
+
+class ScanReport:
+    """ Collects wall time, directory and file counts of every scanned app and
+        aggregates them into the slowest apps and the throughput per library.
+    """
+    top_n = 20  # Number of slowest apps to report
+
+    def __init__(self):
+        self.created = datetime.now().isoformat(timespec='seconds')
+        self.apps: Dict[str, dict] = dict()
+        self._start = time.perf_counter()
+        self._duration = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_report_file() -> Path:
+        return app_globals.get_settings_dir() / app_globals.SCAN_REPORT_FILE_NAME
+
+    @staticmethod
+    def get_library(manifest: dict) -> str:
+        """ Steam apps report their steamapps/common folder, custom apps their custom library directory """
+        return Path(manifest.get('installdir') or manifest.get('path')).parent.as_posix()
+
+    def add_app(self, manifest: dict, walk_result, start: float, end: float):
+        """ Record the statistics of a single app
+
+        :param dict manifest: The scanned app manifest
+        :param app.util.dir_walker.WalkResult walk_result: Result of the app directory walk
+        :param float start: time.perf_counter() when the app scan started
+        :param float end: time.perf_counter() when the app scan finished
+        """
+        entry = {
+            'appid': manifest.get('appid'), 'name': manifest.get('name'), 'path': manifest.get('path'),
+            'library': self.get_library(manifest), 'duration': round(end - start, 4),
+            'start': start, 'end': end,
+            'dirs_visited': walk_result.dirs_visited, 'dirs_cached': walk_result.dirs_cached,
+            'dirs_pruned': walk_result.dirs_pruned, 'files_examined': walk_result.files_examined,
+            'syscalls': walk_result.syscalls, 'hint': walk_result.hint,
+            'matches': len(walk_result.open_vr_dll_paths) + len(walk_result.dxgi_dll_paths)
+            + len(walk_result.executable_paths),
+        }
+        with self._lock:
+            self.apps[str(manifest.get('appid'))] = entry
+
+    def finish(self):
+        self._duration = time.perf_counter() - self._start
+
+    def to_js(self) -> dict:
+        with self._lock:
+            app_entries = list(self.apps.values())
+
+        totals = {k: sum(e[k] for e in app_entries)
+                  for k in ('dirs_visited', 'dirs_cached', 'dirs_pruned', 'files_examined', 'syscalls', 'matches')}
+
+        # -- Apps located by scan hints against apps whose hints missed and got walked completely
+        totals['hint_hits'] = sum(1 for e in app_entries if e.get('hint') is True)
+        totals['hint_misses'] = sum(1 for e in app_entries if e.get('hint') is False)
+        hinted = totals['hint_hits'] + totals['hint_misses']
+        totals['hint_hit_rate'] = round(totals['hint_hits'] / hinted, 4) if hinted else 0.0
+
+        # -- Throughput per library from the first app start to the last app finished
+        libraries = dict()
+        for e in app_entries:
+            lib = libraries.setdefault(e['library'], {'apps': 0, 'dirs': 0, 'start': e['start'], 'end': e['end']})
+            lib['apps'] += 1
+            lib['dirs'] += e['dirs_visited'] + e['dirs_cached']
+            lib['start'], lib['end'] = min(lib['start'], e['start']), max(lib['end'], e['end'])
+        for lib in libraries.values():
+            duration = lib.pop('end') - lib.pop('start')
+            lib['duration'] = round(duration, 4)
+            lib['dirs_per_second'] = round(lib['dirs'] / duration, 2) if duration > 0 else 0.0
+
+        slowest = sorted(app_entries, key=lambda e: e['duration'], reverse=True)[:self.top_n]
+        slowest = [{k: v for k, v in e.items() if k not in ('start', 'end')} for e in slowest]
+
+        return {'created': self.created, 'duration': round(self._duration, 4), 'apps': len(app_entries),
+                'totals': totals, 'slowest': slowest, 'libraries': libraries}
+
+    def save(self) -> bool:
+        file = self._get_report_file()
+        report = self.to_js()
+
+        try:
+            write_json_atomic(file, report)
+        except Exception as e:
+            logging.error('Could not store scan report to file! %s', e)
+            return False
+
+        logging.info('Scanned %s apps in %.2fs, %s directories listed, %s restored from index, %s skipped',
+                     report['apps'], report['duration'], report['totals']['dirs_visited'],
+                     report['totals']['dirs_cached'], report['totals']['dirs_pruned'])
+        return True
+
+    @classmethod
+    def load(cls) -> Optional[dict]:
+        """ Load the report of the last library scan """
+        return read_json(cls._get_report_file())
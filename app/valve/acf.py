@@ -21,46 +21,171 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
-
+import logging
+import re
+from pathlib import Path
 
 SECTION_START = '{'
 SECTION_END = '}'
+INCLUDE = '#include'
+BASE = '#base'
+
+# Tokens of the KeyValues text format, leading whitespace is skipped.
+_TOKEN_RE = re.compile(r'''\s*(?:
+    "([^"\\]*(?:\\.[^"\\]*)*)"          # "quoted string" with backslash escapes
+    |([{}])                             # section start or end
+    |(//[^\n]*|\[[^\]\n]*\])            # // comment or [$WIN32] platform conditional
+    |([^\s"{}]+)                        # unquoted string
+    |(")                                # unterminated quoted string
+)''', re.VERBOSE | re.DOTALL)
+
+# Tokens between two quoted strings
+_UNQUOTED_TOKEN_RE = re.compile(r'''\s*(?:
+    ([{}])                              # section start or end
+    |(//[^\n]*|\[[^\]\n]*\])            # // comment or [$WIN32] platform conditional
+    |([^\s{}]+)                         # unquoted string
+)''', re.VERBOSE)
+
+# Section start and end tokens, never equal to a string token
+_OPEN, _CLOSE = object(), object()
+_BRACES = {SECTION_START: _OPEN, SECTION_END: _CLOSE}
+
+_ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+_ESCAPE_CHARS = {'n': '\n', 't': '\t', '\\': '\\', '"': '"'}
+_DUMP_ESCAPE_CHARS = {v: f'\\{k}' for k, v in _ESCAPE_CHARS.items()}
+_DUMP_ESCAPE_RE = re.compile('|'.join(re.escape(c) for c in _DUMP_ESCAPE_CHARS))
+
+
+def _unescape(value):
+    return _ESCAPE_RE.sub(lambda m: _ESCAPE_CHARS.get(m.group(1), m.group(0)), value)
+
+
+def _escape(value):
+    return _DUMP_ESCAPE_RE.sub(lambda m: _DUMP_ESCAPE_CHARS[m.group(0)], str(value))
+
 
+def _tokenize(data):
+    """
+    Splits ACF data into string tokens and _OPEN/_CLOSE section tokens.
+
+    Steam files quote every string, so splitting at the quotes yields the strings at odd
+    positions and whitespace or braces in between. Data with escaped quotes or comments,
+    which may contain quotes, gets tokenized by a regular expression instead.
+    :param data: ACF content.
+    :return: A list of tokens.
+    """
+    if '\\"' in data or '//' in data:
+        return _tokenize_regex(data)
+
+    parts = data.split('"')
+    if len(parts) % 2 == 0:
+        raise ValueError('Unterminated string in ACF data')
+
+    tokens = []
+    append = tokens.append
+    for between, quoted in zip(parts[::2], parts[1::2]):
+        if between and not between.isspace():
+            _append_unquoted_tokens(between, append)
+        append(_unescape(quoted) if '\\' in quoted else quoted)
 
-def loads(data, wrapper=dict):
+    if parts[-1] and not parts[-1].isspace():
+        _append_unquoted_tokens(parts[-1], append)
+
+    return tokens
+
+
+def _append_unquoted_tokens(data, append):
+    """
+    Tokenizes the data between two quoted strings.
+    :param data: Part of ACF content without quotes.
+    :param append: Callback to add a token.
+    """
+    stripped = data.strip()
+    if stripped in _BRACES:
+        append(_BRACES[stripped])
+        return
+
+    for brace, _, unquoted in _UNQUOTED_TOKEN_RE.findall(data):
+        if brace:
+            append(_BRACES[brace])
+        elif unquoted:
+            append(unquoted)
+
+
+def _tokenize_regex(data):
+    """
+    Tokenizes ACF data with a regular expression, supports escaped quotes and comments anywhere.
+    :param data: ACF content.
+    :return: A list of tokens.
+    """
+    tokens = []
+    append = tokens.append
+    for quoted, brace, skipped, unquoted, unterminated in _TOKEN_RE.findall(data):
+        if brace:
+            append(_BRACES[brace])
+        elif unquoted:
+            append(unquoted)
+        elif unterminated:
+            raise ValueError('Unterminated string in ACF data')
+        elif not skipped:
+            append(_unescape(quoted) if '\\' in quoted else quoted)
+
+    return tokens
+
+
+def loads(data, wrapper=dict, base_dir=None):
     """
     Loads ACF content into a Python object.
+
+    Tokenizes the data in a single pass and builds nested sections with a section stack.
+    Quoted strings may contain whitespace and the escapes \\n \\t \\\\ and \\". Comments are
+    skipped and platform conditionals are ignored, the last value of a key wins.
+    Top level #include and #base directives are resolved relative to base_dir.
+
     :param data: An UTF-8 encoded content of an ACF file.
     :param wrapper: A wrapping object for key-value pairs.
+    :param base_dir: Directory to resolve #include and #base files from.
     :return: An Ordered Dictionary with ACF data.
     """
     if not isinstance(data, str):
         raise TypeError('can only load a str as an ACF but got ' + type(data).__name__)
 
+    # Skip a byte order mark
+    if data.startswith('\ufeff'):
+        data = data[1:]
+
     parsed = wrapper()
     current_section = parsed
     sections = []
+    directives = []
+    key = None
+
+    for token in _tokenize(data):
+        if token is _OPEN:
+            if key is None:
+                raise ValueError('Section without a key in ACF data')
+            # Start a new section below the current one
+            sections.append(current_section)
+            current_section[key] = current_section = wrapper()
+            key = None
+        elif token is _CLOSE:
+            if key is not None or not sections:
+                raise ValueError('Unexpected section end in ACF data')
+            current_section = sections.pop()
+        elif key is None:
+            key = token
+        elif current_section is parsed and key in (INCLUDE, BASE):
+            directives.append((key, token))
+            key = None
+        else:
+            current_section[key] = token
+            key = None
 
-    lines = (line.strip() for line in data.splitlines())
-
-    for line in lines:
-        try:
-            key, value = line.split(None, 1)
-            key = key.replace('"', '').lstrip()
-            value = value.replace('"', '').rstrip()
-        except ValueError:
-            if line == SECTION_START:
-                # Initialize the last added section.
-                current_section = _prepare_subsection(parsed, sections, wrapper)
-            elif line == SECTION_END:
-                # Remove the last section from the queue.
-                sections.pop()
-            else:
-                # Add a new section to the queue.
-                sections.append(line.replace('"', ''))
-            continue
-
-        current_section[key] = value
+    if sections or key is not None:
+        raise ValueError('Unexpected end of ACF data')
+
+    for directive, file_name in directives:
+        _merge_file(parsed, directive, file_name, wrapper, base_dir)
 
     return parsed
 
@@ -72,7 +197,8 @@ def load(fp, wrapper=dict):
     :param wrapper: A wrapping object for key-value pairs.
     :return: An Ordered Dictionary with ACF data.
     """
-    return loads(fp.read(), wrapper=wrapper)
+    base_dir = Path(fp.name).parent if isinstance(getattr(fp, 'name', None), str) else None
+    return loads(fp.read(), wrapper=wrapper, base_dir=base_dir)
 
 
 def dumps(obj):
@@ -110,7 +236,7 @@ def _dumps(obj, level):
         if isinstance(value, dict):
             # [INDENT]"KEY"
             # [INDENT]{
-            line = indent + '"{}"\n'.format(key) + indent + '{'
+            line = indent + '"{}"\n'.format(_escape(key)) + indent + '{'
             lines.append(line)
             # Increase intendation of the nested dict
             lines.extend(_dumps(value, level + 1))
@@ -118,22 +244,43 @@ def _dumps(obj, level):
             lines.append(indent + '}')
         else:
             # [INDENT]"KEY"[TAB][TAB]"VALUE"
-            lines.append(indent + '"{}"'.format(key) + '\t\t' + '"{}"'.format(value))
+            lines.append(indent + '"{}"'.format(_escape(key)) + '\t\t' + '"{}"'.format(_escape(value)))
 
     return lines
 
 
-def _prepare_subsection(data, sections, wrapper):
+def _merge_file(data, directive, file_name, wrapper, base_dir):
     """
-    Creates a subsection ready to be filled.
-    :param data: Semi-parsed dictionary.
-    :param sections: A list of sections.
+    Merges an included ACF file into the parsed data.
+    :param data: Parsed dictionary of the including file.
+    :param directive: #include appends the file, #base only adds keys not already present.
+    :param file_name: File name relative to base_dir.
     :param wrapper: A wrapping object for key-value pairs.
-    :return: A newly created subsection.
+    :param base_dir: Directory of the including file.
     """
-    current = data
-    for i in sections[:-1]:
-        current = current[i]
+    if base_dir is None:
+        logging.warning('Can not resolve %s %s without the directory of the ACF file.', directive, file_name)
+        return
+
+    try:
+        with open(Path(base_dir, file_name), 'r', encoding='utf-8') as f:
+            included = load(f, wrapper=wrapper)
+    except (OSError, ValueError) as e:
+        logging.warning('Could not read ACF %s %s: %s', directive, file_name, e)
+        return
 
-    current[sections[-1]] = wrapper()
-    return current[sections[-1]]
+    _merge(data, included, override=directive == INCLUDE)
+
+
+def _merge(data, other, override):
+    """
+    Recursively merges other into data.
+    :param data: Dictionary to update.
+    :param other: Dictionary to merge into data.
+    :param override: Replace existing values in data.
+    """
+    for key, value in other.items():
+        if isinstance(value, dict) and isinstance(data.get(key), dict):
+            _merge(data[key], value, override)
+        elif override or key not in data:
+            data[key] = value
@@ -0,0 +1,137 @@
+"""
+    Reader for Valve's binary KeyValues format used by shortcuts.vdf
+
+    The data is read through a memoryview so strings get decoded straight from
+    slices of the view without copying the buffer.
+"""
+import struct
+from typing import List, Union
+
+TYPE_MAP = 0x00
+TYPE_STRING = 0x01
+TYPE_INT32 = 0x02
+TYPE_FLOAT32 = 0x03
+TYPE_POINTER = 0x04
+TYPE_WIDE_STRING = 0x05
+TYPE_COLOR = 0x06
+TYPE_UINT64 = 0x07
+TYPE_MAP_END = 0x08
+TYPE_INT64 = 0x0A
+TYPE_MAP_END_ALT = 0x0B
+
+_INT32 = struct.Struct('<i')
+_FLOAT32 = struct.Struct('<f')
+_UINT64 = struct.Struct('<Q')
+_INT64 = struct.Struct('<q')
+_VALUE_STRUCTS = {TYPE_INT32: _INT32, TYPE_FLOAT32: _FLOAT32, TYPE_POINTER: _INT32, TYPE_COLOR: _INT32,
+                  TYPE_UINT64: _UINT64, TYPE_INT64: _INT64}
+
+BufferType = Union[bytes, bytearray, memoryview]
+
+
+class _Reader:
+    """ Reads binary KeyValues from a memoryview, strings are decoded from slices of the view """
+    def __init__(self, data: BufferType, wrapper=dict):
+        self.view = data if isinstance(data, memoryview) else memoryview(data)
+        self.wrapper = wrapper
+
+        # -- memoryview has no find, search string ends in the underlying buffer
+        obj = self.view.obj
+        if isinstance(obj, (bytes, bytearray)) and self.view.nbytes == len(obj):
+            self.find = obj.find
+        else:
+            self.find = self.view.tobytes().find
+
+    def read_string(self, pos: int):
+        end = self.find(b'\x00', pos)
+        if end < 0:
+            raise ValueError('Unterminated string in binary VDF data')
+        return str(self.view[pos:end], 'utf-8', 'replace'), end + 1
+
+    def read_map(self, pos: int):
+        """ Read map entries starting at pos until the map end marker """
+        view = self.view
+        section = self.wrapper()
+
+        while True:
+            value_type = view[pos]
+            pos += 1
+            if value_type in (TYPE_MAP_END, TYPE_MAP_END_ALT):
+                return section, pos
+
+            key, pos = self.read_string(pos)
+            if value_type == TYPE_MAP:
+                section[key], pos = self.read_map(pos)
+            elif value_type == TYPE_STRING:
+                section[key], pos = self.read_string(pos)
+            elif value_type in _VALUE_STRUCTS:
+                value_struct = _VALUE_STRUCTS[value_type]
+                section[key] = value_struct.unpack_from(view, pos)[0]
+                pos += value_struct.size
+            elif value_type == TYPE_WIDE_STRING:
+                end = pos
+                while view[end] or view[end + 1]:
+                    end += 2
+                section[key] = str(view[pos:end], 'utf-16-le', 'replace')
+                pos = end + 2
+            else:
+                raise ValueError(f'Unknown binary VDF value type {value_type:#x} at offset {pos - 1}')
+
+
+def loads(data: BufferType, wrapper=dict) -> dict:
+    """
+    Loads binary VDF content into a Python object.
+    :param data: Binary VDF content.
+    :param wrapper: A wrapping object for key-value pairs.
+    :return: A Dictionary with the VDF data.
+    """
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        raise TypeError('can only load a bytes-like object as binary VDF but got ' + type(data).__name__)
+
+    try:
+        parsed, _ = _Reader(data, wrapper).read_map(0)
+    except (IndexError, struct.error) as e:
+        raise ValueError(f'Unexpected end of binary VDF data: {e}') from e
+    return parsed
+
+
+def load(fp, wrapper=dict) -> dict:
+    """
+    Loads the contents of a binary VDF file opened in binary mode into a Python object.
+    :param fp: A file object.
+    :param wrapper: A wrapping object for key-value pairs.
+    :return: A Dictionary with the VDF data.
+    """
+    return loads(fp.read(), wrapper=wrapper)
+
+
+def dumps(obj: dict) -> bytes:
+    """
+    Serializes a dictionary into binary VDF data. Integers are stored as int32.
+    :param obj: A dictionary to serialize.
+    :return: Binary VDF data.
+    """
+    if not isinstance(obj, dict):
+        raise TypeError('can only dump a dictionary as binary VDF but got ' + type(obj).__name__)
+
+    return b''.join(_dumps(obj))
+
+
+def _dumps(obj: dict) -> List[bytes]:
+    parts = []
+
+    for key, value in obj.items():
+        key = str(key).encode('utf-8') + b'\x00'
+        if isinstance(value, dict):
+            parts.extend((bytes((TYPE_MAP,)), key))
+            parts.extend(_dumps(value))
+        elif isinstance(value, int):
+            parts.extend((bytes((TYPE_INT32,)), key, _INT32.pack(int(value))))
+        elif isinstance(value, float):
+            parts.extend((bytes((TYPE_FLOAT32,)), key, _FLOAT32.pack(value)))
+        else:
+            parts.extend((bytes((TYPE_STRING,)), key, str(value).encode('utf-8'), b'\x00'))
+
+    parts.append(bytes((TYPE_MAP_END,)))
+    return parts
+
@@ -1,49 +1,80 @@
 """
-    Utilities to read Valve's Steam Library on a Windows Machine
+    Utilities to read Valve's Steam Library
 """
+import bisect
+import concurrent.futures
+import fnmatch
 import logging
-import winreg as registry
-from pathlib import Path, WindowsPath
-from typing import Iterable, List, Optional, Tuple
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
-from . import acf
-from app.globals import KNOWN_APPS
+from . import acf, binary_vdf
+from .steam_locator import SteamLocator, default_locators, get_registry, locate_steam
+from app.util.known_apps import KnownApps
 from app.util.utils import convert_unit, SizeUnit
 
 STEAM_LIBRARY_FOLDERS = 'LibraryFolders'
 STEAM_LIBRARY_FILE = 'libraryfolders.vdf'
 STEAM_APPS_FOLDER = 'steamapps'
 STEAM_APPS_INSTALL_FOLDER = 'common'
+STEAM_USER_DATA_FOLDER = 'userdata'
+STEAM_SHORTCUTS_FILE = 'shortcuts.vdf'
+STEAM_MANIFEST_PATTERN = 'appmanifest*.acf'
 
 
 class SteamApps:
+    manifest_load_workers = 8  # Concurrent threads reading appmanifest files
+    locators: List[SteamLocator] = default_locators()  # Tried in order to find the Steam directory
+
     def __init__(self):
         self.steam_apps, self.known_apps = dict(), dict()
-        self.steam_app_names = {m.get('name'): app_id for app_id, m in self.steam_apps.items() if isinstance(m, dict)}
+        self.steam_app_names: Dict[str, str] = dict()
+        self._sorted_names: List[str] = list()
+        self._app_paths: Dict[str, Path] = dict()
 
     def read_steam_library(self):
         self.steam_apps, self.known_apps = self.find_installed_steam_games()
+        self._build_index()
+
+    def _build_index(self):
+        """ Index app names and resolved installation directories of the last library read """
+        self.steam_app_names, self._app_paths = dict(), dict()
 
-    def find_game_location(self, app_id: int = 0, app_name: str = '') -> Optional[Path]:
-        """ Shorthand method to search installed apps via either id or name """
+        for app_id, m in self.steam_apps.items():
+            if not isinstance(m, dict):
+                continue
+            # -- Keep the first app of duplicate names like the library order did before
+            if m.get('name') and m['name'] not in self.steam_app_names:
+                self.steam_app_names[m['name']] = app_id
+            # -- _add_path resolved installdir to an absolute path if the app was found in a library
+            if m.get('path') and m.get('installdir'):
+                self._app_paths[app_id] = Path(m['installdir'])
+
+        self._sorted_names = sorted(self.steam_app_names)
+
+    def _find_app_name(self, prefix: str) -> Optional[str]:
+        """ Binary search the smallest app name starting with prefix, an exact match always sorts first """
+        idx = bisect.bisect_left(self._sorted_names, prefix)
+        if idx < len(self._sorted_names) and self._sorted_names[idx].startswith(prefix):
+            return self._sorted_names[idx]
+
+    def find_game_location(self, app_id: Union[int, str] = 0, app_name: str = '') -> Optional[Path]:
+        """ Shorthand method to search installed apps via either id or name, answered from the library index """
         if app_name:
-            name_hits = [n for n in self.steam_app_names.keys() if n.startswith(app_name)]
-            if name_hits:
-                app_id = self.steam_app_names.get(name_hits[0])
+            name_hit = self._find_app_name(app_name)
+            if name_hit is not None:
+                app_id = self.steam_app_names.get(name_hit)
 
         if app_id is None or app_id == 0:
             return
 
-        m = self.steam_apps.get(app_id)
-        if not m:
+        app_id = str(app_id)
+        if app_id not in self.steam_apps:
             logging.error('Could not locate Steam app with id %s', app_id)
             return
 
-        for lib_folder in self.steam_apps.get(STEAM_LIBRARY_FOLDERS, list()):
-            app_folder = lib_folder / STEAM_APPS_INSTALL_FOLDER / m.get('installdir')
-
-            if app_folder.exists():
-                return app_folder
+        return self._app_paths.get(app_id)
 
     @staticmethod
     def find_steam_location() -> Optional[str]:
@@ -51,18 +82,17 @@ class SteamApps:
         if hasattr(SteamApps, "STEAM_LOCATION"):
             return SteamApps.STEAM_LOCATION
 
-        try:
-            key = registry.OpenKey(registry.HKEY_CURRENT_USER, "Software\Valve\Steam")
-        except FileNotFoundError as e:
-            logging.error(e)
-            return None
-
-        return registry.QueryValueEx(key, "SteamPath")[0]
+        steam_dir = locate_steam(SteamApps.locators)
+        return steam_dir.as_posix() if steam_dir is not None else None
 
     @classmethod
     def find_steam_libraries(cls) -> Optional[List[Path]]:
         """ Return Steam Library Path's as pathlib.Path objects """
-        steam_apps_dir = Path(cls.find_steam_location()) / STEAM_APPS_FOLDER
+        steam_location = cls.find_steam_location()
+        if not steam_location:
+            return list()
+
+        steam_apps_dir = Path(steam_location) / STEAM_APPS_FOLDER
         steam_lib_file = steam_apps_dir / STEAM_LIBRARY_FILE
         if not steam_lib_file.exists():
             return [steam_apps_dir]
@@ -78,30 +108,111 @@ class SteamApps:
         if STEAM_LIBRARY_FOLDERS.casefold() in lib_data:
             lib_data[STEAM_LIBRARY_FOLDERS] = lib_data.get(STEAM_LIBRARY_FOLDERS.casefold())
 
+        # -- Current libraryfolders.vdf files list the Steam installation itself as library 0
+        known_dirs = {os.path.normcase(os.path.normpath(steam_apps_dir))}
+
         for k, v in lib_data.get(STEAM_LIBRARY_FOLDERS, dict()).items():
             if isinstance(k, str) and k.isdigit():
-                if isinstance(v, str):
-                    lib_dir = Path(v) / STEAM_APPS_FOLDER
-                    if lib_dir.exists():
-                        lib_folders.append(lib_dir)
-                elif isinstance(v, dict):
-                    lib_dir = Path(v.get('path')) / STEAM_APPS_FOLDER
-                    if lib_dir.exists():
-                        lib_folders.append(lib_dir)
+                if isinstance(v, dict):
+                    v = v.get('path')
+                if not isinstance(v, str):
+                    continue
+
+                lib_dir = Path(v) / STEAM_APPS_FOLDER
+                lib_dir_key = os.path.normcase(os.path.normpath(lib_dir))
+                if lib_dir_key not in known_dirs and lib_dir.exists():
+                    known_dirs.add(lib_dir_key)
+                    lib_folders.append(lib_dir)
 
         return lib_folders
 
+    @classmethod
+    def find_shortcuts_files(cls) -> List[Path]:
+        """ Return the shortcuts.vdf files of every Steam user on this machine """
+        steam_location = cls.find_steam_location()
+        if not steam_location:
+            return list()
+        return sorted(Path(steam_location, STEAM_USER_DATA_FOLDER).glob(f'*/config/{STEAM_SHORTCUTS_FILE}'))
+
+    @staticmethod
+    def _strip_quotes(value) -> str:
+        return str(value or '').strip().strip('"')
+
+    @classmethod
+    def read_shortcuts(cls) -> List[dict]:
+        """ Read the non-Steam game shortcuts of every Steam user
+
+        :return: List of shortcuts with name, executable path, start directory and OpenVR flag
+        """
+        shortcuts = list()
+
+        for shortcuts_file in cls.find_shortcuts_files():
+            try:
+                with open(shortcuts_file.as_posix(), 'rb') as f:
+                    data = binary_vdf.load(f)
+            except Exception as e:
+                logging.error('Could not read Steam shortcuts file %s: %s', shortcuts_file.as_posix(), e)
+                continue
+
+            for entry in data.get('shortcuts', dict()).values():
+                if not isinstance(entry, dict):
+                    continue
+                # -- Key case differs between Steam versions
+                entry = {k.casefold(): v for k, v in entry.items()}
+
+                exe = cls._strip_quotes(entry.get('exe'))
+                if not exe:
+                    continue
+                start_dir = cls._strip_quotes(entry.get('startdir')) or Path(exe).parent.as_posix()
+
+                shortcuts.append({
+                    'appid': str(entry.get('appid', 0) & 0xFFFFFFFF),
+                    'name': entry.get('appname') or Path(exe).stem,
+                    'exe': Path(exe).as_posix(),
+                    'startDir': Path(start_dir).as_posix(),
+                    'openVr': bool(entry.get('openvr')),
+                })
+
+        return shortcuts
+
     @staticmethod
-    def _add_path(manifest: dict, lib_folders):
-        """ Create an 'path' key with an absolute path to the installation directory """
+    def _list_install_dirs(lib_folders: List[Path]) -> Dict[Path, Set[str]]:
+        """ List the installation directories of every library once, names are normalized with os.path.normcase """
+        install_dirs = dict()
+
+        for lib_folder in lib_folders:
+            install_dirs[lib_folder] = set()
+            try:
+                with os.scandir(lib_folder / STEAM_APPS_INSTALL_FOLDER) as scandir_it:
+                    for entry in scandir_it:
+                        if entry.is_dir():
+                            install_dirs[lib_folder].add(os.path.normcase(entry.name))
+            except OSError as e:
+                logging.debug('Could not list Steam library %s: %s', lib_folder, e)
+
+        return install_dirs
+
+    @classmethod
+    def _add_path(cls, manifest: dict, lib_folders, install_dirs: Optional[Dict[Path, Set[str]]] = None):
+        """ Create an 'path' key with an absolute path to the installation directory
+
+            Plain installation directory names are looked up in the library listings of install_dirs,
+            absolute or nested installation directories are tested on disk.
+        """
         p = manifest.get('installdir')
         manifest['path'] = ''
+        if not p:
+            return
+
+        if install_dirs is None:
+            install_dirs = cls._list_install_dirs(lib_folders)
+        listed = not Path(p).is_absolute() and len(Path(p).parts) == 1
 
         for lib_folder in lib_folders:
-            if not p:
-                break
             abs_p = lib_folder / STEAM_APPS_INSTALL_FOLDER / p
-            if not abs_p.exists():
+            if listed and os.path.normcase(p) not in install_dirs.get(lib_folder, set()):
+                continue
+            if not listed and not abs_p.exists():
                 continue
 
             manifest['installdir'] = abs_p.as_posix()
@@ -115,51 +226,77 @@ class SteamApps:
             else:
                 manifest['path'] = abs_p.as_posix()
 
+    @staticmethod
+    def get_scan_key(manifest: dict, manifest_file: Path) -> str:
+        """ Key describing the installed state of an app, changes when Steam installs or updates the app """
+        return f"{manifest.get('LastUpdated')}:{manifest.get('buildid')}:{manifest.get('SizeOnDisk')}:" \
+               f"{manifest_file.stat().st_mtime_ns}"
+
+    @classmethod
+    def _load_manifest(cls, manifest_file: Path) -> Optional[dict]:
+        """ Read the AppState of an appmanifest file, called from a thread pool """
+        try:
+            with open(manifest_file.as_posix(), 'r', encoding='utf-8') as f:
+                manifest = acf.load(f).get('AppState')
+        except Exception as e:
+            logging.error('Error reading Steam App manifest: %s %s', manifest_file, e)
+            return None
+
+        # -- Skip invalid manifests
+        if manifest is None:
+            logging.warning('Skipping invalid App entry: %s', manifest_file.as_posix())
+            return None
+
+        try:
+            # -- Add human readable size
+            manifest['sizeGb'] = f"{convert_unit(manifest.get('SizeOnDisk', 0), SizeUnit.GB):.0f} GB"
+
+            # -- Add key to detect unchanged apps between scans
+            manifest['scanKey'] = cls.get_scan_key(manifest, manifest_file)
+        except Exception as e:
+            logging.error('Error reading Steam App manifest: %s %s', manifest_file, e)
+            return None
+
+        return manifest
+
     def find_installed_steam_games(self) -> Tuple[dict, dict]:
-        steam_apps, _known_apps = dict(), KNOWN_APPS
+        steam_apps, known_apps = dict(), dict()
         lib_folders = self.find_steam_libraries()
         if not lib_folders:
-            return steam_apps, _known_apps
+            steam_apps[STEAM_LIBRARY_FOLDERS] = list()
+            return steam_apps, known_apps
 
-        for lib in lib_folders:
-            for manifest_file in lib.glob('appmanifest*.acf'):
-                try:
-                    with open(manifest_file.as_posix(), 'r', encoding='utf-8') as f:
-                        manifest = acf.load(f)
-                        if manifest is not None:
-                            manifest = manifest.get('AppState')
+        # -- Read every manifest concurrently and list the installation directories once
+        manifest_files = [f for lib in lib_folders for f in lib.glob(STEAM_MANIFEST_PATTERN)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.manifest_load_workers) as executor:
+            manifests = list(executor.map(self._load_manifest, manifest_files))
+        install_dirs = self._list_install_dirs(lib_folders)
 
-                            # -- Skip invalid manifests
-                            if manifest is None:
-                                logging.warning('Skipping invalid App entry: %s', manifest_file.as_posix())
-                                continue
-
-                            # -- Add human readable size
-                            manifest['sizeGb'] = f"{convert_unit(manifest.get('SizeOnDisk', 0), SizeUnit.GB):.0f} GB"
+        for manifest_file, manifest in zip(manifest_files, manifests):
+            if manifest is None:
+                continue
 
-                            # -- Add Path information
-                            self._add_path(manifest, lib_folders)
+            app_id = manifest.get('appid')
 
-                            # -- Add known apps entries data
-                            app_id = manifest.get('appid')
+            # -- Skip invalid IDs
+            if app_id is None:
+                logging.warning('Skipping App entry without id: %s', manifest_file.as_posix())
+                continue
 
-                            # -- Skip invalid IDs
-                            if app_id is None:
-                                logging.warning('Skipping App entry without id: %s', manifest_file.as_posix())
-                                continue
+            # -- Add Path information
+            self._add_path(manifest, lib_folders, install_dirs)
 
-                            if app_id in _known_apps:
-                                for k, v in _known_apps[app_id].items():
-                                    manifest[k] = v
+            # -- Overlay known apps entries data, the path stays the installation root
+            manifest = KnownApps.overlay(app_id, manifest)
 
-                            # -- Store Entry
-                            steam_apps[app_id] = manifest
-                except Exception as e:
-                    logging.error('Error reading Steam App manifest: %s %s', manifest_file, e)
+            # -- Store Entry
+            steam_apps[app_id] = manifest
 
-        for app_id, entry_dict in _known_apps.items():
-            if app_id in steam_apps:
-                _known_apps[app_id].update(steam_apps[app_id])
+        # -- Known apps installed by Steam or located by a special method, entries of the registry stay untouched
+        for app_id, known_entry in KnownApps.apps().items():
+            if app_id not in steam_apps and 'simmon_method' not in known_entry:
+                continue
+            entry_dict = {**known_entry, **steam_apps.get(app_id, dict())}
 
             # -- Get install dir with special method for eg. CrewChief non steam app
             if 'simmon_method' in entry_dict.keys():
@@ -173,7 +310,7 @@ class SteamApps:
                             install_dir = Path(entry_dict['installdir'])
                             if not install_dir.is_dir():
                                 install_dir = install_dir.parent
-                            entry_dict['installdir'] = str(WindowsPath(install_dir))
+                            entry_dict['installdir'] = str(Path(install_dir))
                             entry_dict['path'] = Path(install_dir / entry_dict['exe_sub_path']).as_posix()
                         except Exception as e:
                             logging.error('Error locating installation path: %s', e)
@@ -181,10 +318,44 @@ class SteamApps:
                         entry_dict['path'] = ''
 
             # -- Update install dir to an absolute path if not already absolute
-            self._add_path(entry_dict, lib_folders)
+            self._add_path(entry_dict, lib_folders, install_dirs)
+            known_apps[app_id] = entry_dict
 
         steam_apps[STEAM_LIBRARY_FOLDERS] = lib_folders
-        return steam_apps, _known_apps
+        return steam_apps, known_apps
+
+    @staticmethod
+    def get_manifest_app_id(manifest_file: Path) -> Optional[str]:
+        """ App id from an appmanifest_<appid>.acf file name """
+        if not fnmatch.fnmatch(manifest_file.name.casefold(), STEAM_MANIFEST_PATTERN):
+            return None
+        app_id = manifest_file.stem.rpartition('_')[2]
+        return app_id if app_id.isdigit() else None
+
+    def read_app_manifests(self, app_ids: Iterable[str]) -> Tuple[dict, List[str]]:
+        """ Read the manifests of single apps instead of the whole library
+
+        :return: Manifests of the installed apps and ids of apps without a manifest in any library
+        """
+        app_ids = {str(app_id) for app_id in app_ids}
+        lib_folders = self.find_steam_libraries()
+        install_dirs = self._list_install_dirs(lib_folders)
+        steam_apps = dict()
+
+        for lib_folder in lib_folders:
+            for app_id in app_ids.difference(steam_apps):
+                manifest_file = lib_folder / f'appmanifest_{app_id}.acf'
+                if not manifest_file.exists():
+                    continue
+                manifest = self._load_manifest(manifest_file)
+                if manifest is None or manifest.get('appid') != app_id:
+                    continue
+
+                self._add_path(manifest, lib_folders, install_dirs)
+                manifest = KnownApps.overlay(app_id, manifest)
+                steam_apps[app_id] = manifest
+
+        return steam_apps, sorted(app_ids.difference(steam_apps))
 
 
 class KnownAppsMethods:
@@ -194,6 +365,10 @@ class KnownAppsMethods:
 
     @staticmethod
     def find_by_registry_keys(keys: Iterable, key_name: Optional[str], user_reg: bool = False) -> Optional[str]:
+        registry = get_registry()
+        if registry is None:
+            return None
+
         key = None
         reg = registry.HKEY_CURRENT_USER if user_reg else registry.HKEY_LOCAL_MACHINE
 
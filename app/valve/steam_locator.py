@@ -0,0 +1,118 @@
+"""
+    Locators finding the Steam installation directory on Windows, Linux and macOS
+"""
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+STEAM_PATH_ENV = 'OPENVR_FSR_APP_STEAM_PATH'
+STEAM_REGISTRY_KEY = r'Software\Valve\Steam'
+STEAM_REGISTRY_VALUE = 'SteamPath'
+
+
+def get_registry():
+    """ Import winreg on first use, returns None on platforms without a Windows registry """
+    try:
+        import winreg
+    except ImportError:
+        return None
+    return winreg
+
+
+class SteamLocator:
+    """ Finds the Steam installation directory, locate returns None if this locator has no result """
+    name = 'base'
+
+    def locate(self) -> Optional[Path]:
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}()'
+
+
+class ExplicitPathLocator(SteamLocator):
+    """ Steam directory set by the user, eg. from the command line """
+    name = 'explicit'
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def locate(self) -> Optional[Path]:
+        return self.path
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.path.as_posix()})'
+
+
+class EnvironmentLocator(SteamLocator):
+    """ Steam directory set by an environment variable """
+    name = 'environment'
+
+    def __init__(self, env_var: str = STEAM_PATH_ENV):
+        self.env_var = env_var
+
+    def locate(self) -> Optional[Path]:
+        value = os.environ.get(self.env_var)
+        return Path(value) if value else None
+
+
+class RegistryLocator(SteamLocator):
+    """ Steam directory stored in the Windows registry by the Steam installer """
+    name = 'registry'
+
+    def locate(self) -> Optional[Path]:
+        registry = get_registry()
+        if registry is None:
+            return None
+
+        try:
+            key = registry.OpenKey(registry.HKEY_CURRENT_USER, STEAM_REGISTRY_KEY)
+            value = registry.QueryValueEx(key, STEAM_REGISTRY_VALUE)[0]
+        except OSError as e:
+            logging.error('Could not read Steam location from registry: %s', e)
+            return None
+
+        return Path(value) if value else None
+
+
+class HomeDirLocator(SteamLocator):
+    """ Default Steam directories below the user home of Linux and macOS installations """
+    name = 'home'
+    candidates = [
+        '~/.steam/steam', '~/.steam/root', '~/.local/share/Steam',
+        # -- Flatpak installation
+        '~/.var/app/com.valvesoftware.Steam/.local/share/Steam',
+        '~/Library/Application Support/Steam',
+    ]
+
+    def locate(self) -> Optional[Path]:
+        for candidate in self.candidates:
+            steam_dir = Path(candidate).expanduser()
+            if steam_dir.is_dir():
+                return steam_dir.resolve()
+
+
+def default_locators() -> List[SteamLocator]:
+    """ Environment override first, then the platform default """
+    if sys.platform == 'win32':
+        return [EnvironmentLocator(), RegistryLocator()]
+    return [EnvironmentLocator(), HomeDirLocator()]
+
+
+def locate_steam(locators: Iterable[SteamLocator]) -> Optional[Path]:
+    """ Return the first existing Steam directory found by locators """
+    locators = list(locators)
+    for locator in locators:
+        steam_dir = locator.locate()
+        if steam_dir is None:
+            continue
+        if not steam_dir.is_dir():
+            logging.warning('Steam directory of %s locator does not exist: %s', locator.name, steam_dir)
+            continue
+
+        logging.debug('Located Steam with %s locator: %s', locator.name, steam_dir)
+        return steam_dir
+
+    logging.error('Could not locate a Steam installation with locators: %s', locators)
@@ -6,6 +6,7 @@ import gevent
 
 from app import expose_app_methods, CLOSE_EVENT
 from app.app_event_loop import app_event_loop
+from app.app_main import start_library_watcher, stop_library_watcher
 from app.app_settings import AppSettings
 from app.events import register_gevent_error_handler
 from app.globals import FROZEN, get_version
@@ -50,6 +51,9 @@ def start_eel():
         CLOSE_EVENT.set()
         raise RuntimeError(AppExceptionHook.gui_msg)
 
+    # -- Pick up apps installed or removed by Steam without a library re-scan
+    start_library_watcher()
+
     # -- Run until window/tab closed
     logging.debug('Entering event loop')
     start_time = time.time()
@@ -63,8 +67,10 @@ def start_eel():
         CLOSE_EVENT.wait(timeout=1)
 
     # -- Shutdown Greenlets
+    stop_library_watcher()
     AppSettings.previous_version = get_version()
     AppSettings.save()
+    AppSettings.backup_steam_apps()
 
     # -- Shutdown logging
     logging.info(SEP)
@@ -0,0 +1,82 @@
+"""
+    Compare the tokenizing ACF parser against the previous line splitting parser on a
+    large libraryfolders.vdf and a few hundred appmanifest_*.acf files.
+
+    Run from the project root: python -m tests.benchmark.bench_acf
+"""
+import random
+import time
+
+from app.valve import acf
+from tests.benchmark.synthetic_lib import create_app_manifest
+
+LIBRARIES = 16
+APPS = 600
+ROUNDS = 5
+
+
+def legacy_loads(data, wrapper=dict):
+    """ The previous parser: splits lines and re-walks the section path for every section """
+    parsed = wrapper()
+    current_section = parsed
+    sections = []
+
+    for line in (line.strip() for line in data.splitlines()):
+        try:
+            key, value = line.split(None, 1)
+            key = key.replace('"', '').lstrip()
+            value = value.replace('"', '').rstrip()
+        except ValueError:
+            if line == acf.SECTION_START:
+                current = parsed
+                for i in sections[:-1]:
+                    current = current[i]
+                current[sections[-1]] = wrapper()
+                current_section = current[sections[-1]]
+            elif line == acf.SECTION_END:
+                sections.pop()
+            else:
+                sections.append(line.replace('"', ''))
+            continue
+
+        current_section[key] = value
+
+    return parsed
+
+
+def create_library_folders(rnd: random.Random) -> str:
+    folders = dict()
+    for lib in range(LIBRARIES):
+        apps = {str(rnd.randrange(10 ** 6)): str(rnd.randrange(10 ** 10)) for _ in range(APPS // LIBRARIES * 4)}
+        folders[str(lib)] = {'path': f'D:\\SteamLibrary{lib}', 'label': '', 'contentid': str(rnd.randrange(10 ** 18)),
+                             'totalsize': str(rnd.randrange(10 ** 12)), 'apps': apps}
+    return acf.dumps({'libraryfolders': folders})
+
+
+def measure(loads, documents) -> float:
+    best = float('inf')
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for document in documents:
+            loads(document)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rnd = random.Random(0)
+    library_folders = [create_library_folders(rnd)]
+    manifests = [create_app_manifest(rnd, 1000 + i * 10) for i in range(APPS)]
+
+    # -- Both parsers agree on plain manifests, the previous parser kept escaped backslashes in paths
+    assert all(acf.loads(d) == legacy_loads(d) for d in manifests[:20])
+
+    for name, documents in (('libraryfolders.vdf', library_folders), (f'{APPS} appmanifests', manifests)):
+        size = sum(len(d) for d in documents) / 1024
+        legacy, tokenizer = measure(legacy_loads, documents), measure(acf.loads, documents)
+        print(f'{name} ({size:.0f} KiB): line splitting {legacy * 1000:.1f}ms, '
+              f'tokenizer {tokenizer * 1000:.1f}ms ({legacy / tokenizer:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+    Compare the single pass directory walker against the previous two recursive globs
+    and a warm rescan using the directory modification time index.
+
+    Run from the project root: python -m tests.benchmark.bench_dir_walker
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from app.globals import OPEN_VR_DLL, EXE_NAME
+from app.util.dir_walker import walk_app_dir
+from app.util.scan_index import ScanIndex
+from tests.benchmark.synthetic_lib import create_app_tree
+
+
+class SyscallCounter:
+    """ Count os.scandir/os.stat/os.lstat calls while active """
+    names = ('scandir', 'stat', 'lstat')
+
+    def __init__(self):
+        self.count = 0
+        self._originals = dict()
+
+    def _wrap(self, fn):
+        def wrapper(*args, **kwargs):
+            self.count += 1
+            return fn(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        for name in self.names:
+            self._originals[name] = getattr(os, name)
+            setattr(os, name, self._wrap(self._originals[name]))
+        return self
+
+    def __exit__(self, *args):
+        for name, fn in self._originals.items():
+            setattr(os, name, fn)
+
+
+def glob_scan(base_path: Path):
+    open_vr_dll_ls = [f for f in base_path.glob(f'**/{OPEN_VR_DLL}')]
+    executable_ls = [f for f in base_path.glob(f'**/{EXE_NAME}')]
+    return open_vr_dll_ls, executable_ls
+
+
+def walker_scan(base_path: Path):
+    result = walk_app_dir(base_path)
+    return result.open_vr_dll_paths, result.executable_paths
+
+
+def indexed_walker_scan_fn():
+    index = ScanIndex()
+
+    def indexed_walker_scan(base_path: Path):
+        result = walk_app_dir(base_path, index)
+        return result.open_vr_dll_paths, result.executable_paths
+
+    return indexed_walker_scan
+
+
+def run_benchmark(scan_fn, base_path: Path, repeat: int = 5):
+    with SyscallCounter() as counter:
+        scan_fn(base_path)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scan_fn(base_path)
+    wall_time = (time.perf_counter() - start) / repeat
+
+    return wall_time, counter.count
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_path = create_app_tree(Path(tmp_dir) / 'synthetic_app', depth=5, fan_out=4, files_per_dir=8)
+        dir_count = sum(1 for _ in os.walk(base_path))
+        print(f'Synthetic tree with {dir_count} directories')
+
+        indexed_scan = indexed_walker_scan_fn()
+        indexed_scan(base_path)
+
+        for name, scan_fn in (('glob x2', glob_scan), ('walk_app_dir', walker_scan),
+                              ('indexed (warm)', indexed_scan)):
+            wall_time, syscalls = run_benchmark(scan_fn, base_path)
+            print(f'{name:>14}: {wall_time * 1000:8.2f} ms  {syscalls:6d} scandir/stat calls')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+    Compare the installed JSON codecs on a library of 1000 VR apps with complete mod settings:
+    saving and loading the library store, saving and loading the settings file and encoding
+    the eel responses of load_steam_lib_fn, scan_app_lib_fn and update_mod_fn.
+
+    Run from the project root: python -m tests.benchmark.bench_json_codec [--apps 1000]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+import app.mod
+from app.app_fn import reduce_steam_apps_for_export
+from app.app_settings import AppSettings
+from app.util import json_codec
+from app.util.library_store import LibraryStore, STEAM_DIR_ID
+from app.util.safe_file import read_json, write_json_atomic
+
+
+def timed(fn: Callable, repeat: int) -> float:
+    """ Best wall time of repeat runs in seconds """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def create_library(apps: int) -> dict:
+    """ App entries as the FrontEnd holds them, with the complete settings of every mod """
+    steam_apps = dict()
+    for n in range(apps):
+        app_id = str(100000 + n)
+        path = f'C:/Program Files (x86)/Steam/steamapps/common/Synthetic App {n}'
+        entry = {'appid': app_id, 'name': f'Synthetic App {n}', 'path': path, 'openVr': True,
+                 'sizeGb': f'{n % 50}.5 GB', 'SizeOnDisk': str(n * 1024 ** 2), 'scanKey': f'{n}:1',
+                 'buildid': str(n), 'openVrDllPaths': [f'{path}/bin/win64'],
+                 'openVrDllPathsSelected': [f'{path}/bin/win64'],
+                 'executablePaths': [f'{path}/app.exe'], 'executablePathsSelected': [f'{path}/app.exe']}
+        for mod in app.mod.get_available_mods(entry):
+            entry[mod.VAR_NAMES['settings']] = mod.settings.to_js(export=False)
+            entry[mod.VAR_NAMES['installed']] = False
+            entry[mod.VAR_NAMES['version']] = str()
+        steam_apps[app_id] = entry
+    return steam_apps
+
+
+def bench_codec(root: Path, steam_apps: dict, reduced_apps: dict, repeat: int) -> Dict[str, float]:
+    results = dict()
+    store_file = root / 'library.db'
+
+    def _save_store():
+        LibraryStore.close()
+        store_file.unlink(missing_ok=True)
+        LibraryStore.save_apps(STEAM_DIR_ID, reduced_apps)
+
+    results['library save'] = timed(_save_store, repeat)
+    results['library load'] = timed(lambda: LibraryStore.load_apps([STEAM_DIR_ID]), repeat)
+
+    settings_file = root / 'settings.json'
+    settings = AppSettings.to_js_object(AppSettings)
+    results['settings save'] = timed(lambda: write_json_atomic(settings_file, settings), repeat)
+    results['settings load'] = timed(lambda: read_json(settings_file), repeat)
+
+    results['load_steam_lib_fn response'] = timed(
+        lambda: json_codec.dumps({'result': True, 'data': steam_apps, 'reScanRequired': False}), repeat)
+    results['scan_app_lib_fn response'] = timed(
+        lambda: json_codec.dumps({'result': True, 'data': steam_apps}), repeat)
+    results['update_mod_fn responses'] = timed(
+        lambda: [json_codec.dumps({'result': True, 'msg': '', 'manifest': e}) for e in steam_apps.values()], repeat)
+    results['response round trip'] = timed(
+        lambda: json_codec.loads(json_codec.dumps({'result': True, 'data': steam_apps})), repeat)
+
+    LibraryStore.close()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m tests.benchmark.bench_json_codec')
+    parser.add_argument('--apps', type=int, default=1000, help='Number of VR apps in the library')
+    parser.add_argument('--repeat', type=int, default=3, help='Report the best of this many runs')
+    args = parser.parse_args(argv)
+
+    steam_apps = create_library(args.apps)
+    reduced_apps = reduce_steam_apps_for_export(steam_apps)
+    payload = len(json_codec.JsonCodec.dumps({'data': steam_apps}))
+    print(f'{args.apps} apps, {payload / 1024 ** 2:.1f} MB load_steam_lib_fn payload')
+
+    results = dict()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, codec in json_codec.CODECS.items():
+            if not codec.is_available():
+                print(f'{name}: not installed')
+                continue
+            json_codec.set_codec(name)
+            codec_dir = Path(tmp_dir) / name
+            codec_dir.mkdir()
+            LibraryStore.file = codec_dir / 'library.db'
+            results[name] = bench_codec(codec_dir, steam_apps, reduced_apps, args.repeat)
+
+    LibraryStore.file = None
+    names = list(results)
+    print(f'{"":>30}' + ''.join(f'{n:>12}' for n in names))
+    for stage in results[names[0]]:
+        print(f'{stage:>30}' + ''.join(f'{results[n][stage] * 1000:10.1f}ms' for n in names))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
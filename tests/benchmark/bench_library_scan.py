@@ -0,0 +1,127 @@
+"""
+    Time the library scan stages on synthetic Steam and custom libraries of 10, 100 and 1000 apps:
+    reading the Steam library, ManifestWorker.update_steam_apps cold, with the directory index and with
+    scan hints of the previous result, scan_custom_library and a complete scan_app_lib_fn with a
+    repeated scan re-using unchanged apps.
+
+    Run from the project root: python -m tests.benchmark.bench_library_scan [--sizes 10 100 1000]
+    Store results with --save results.json and fail on regressions against them with --compare results.json
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+import app.globals as app_globals
+from app import app_fn
+from app.app_settings import AppSettings
+from app.util.custom_app import scan_custom_library
+from app.util.manifest_worker import ManifestWorker
+from app.util.safe_file import remove_with_backup
+from app.valve.steam import SteamApps, STEAM_LIBRARY_FOLDERS
+from app.valve.steam_locator import ExplicitPathLocator
+from tests.benchmark.synthetic_lib import create_custom_library, create_steam_library
+
+LIBRARIES = 3
+CUSTOM_DIR_ID = '#bench'
+
+
+def timed(fn: Callable, repeat: int = 1) -> float:
+    """ Best wall time of repeat runs in seconds """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def read_steam_apps() -> dict:
+    steam_apps = SteamApps()
+    steam_apps.read_steam_library()
+    apps = dict(steam_apps.steam_apps)
+    apps.pop(STEAM_LIBRARY_FOLDERS)
+    return apps
+
+
+def bench_size(root: Path, apps: int, args) -> Dict[str, float]:
+    steam_path, custom_path = root / f'steam_{apps}', root / f'custom_{apps}'
+    create_steam_library(steam_path, LIBRARIES, apps, args.depth, args.fan_out, args.files_per_dir)
+    create_custom_library(custom_path, max(1, apps // 10), args.depth, args.fan_out, args.files_per_dir)
+
+    # -- Settings, scan index and reports of every size go to their own directory
+    settings_dir = root / f'settings_{apps}'
+    settings_dir.mkdir()
+    app_globals.get_settings_dir = lambda: settings_dir
+    AppSettings.user_app_directories = {CUSTOM_DIR_ID: custom_path.as_posix()}
+    SteamApps.locators = [ExplicitPathLocator(steam_path)]
+
+    results = dict()
+    results['find_installed_steam_games'] = timed(read_steam_apps, args.repeat)
+
+    def _update_steam_apps():
+        ManifestWorker.update_steam_apps(read_steam_apps())
+
+    ManifestWorker.use_scan_index = False
+    results['update_steam_apps (cold)'] = timed(_update_steam_apps, args.repeat)
+    ManifestWorker.use_scan_index = True
+    cached_apps = ManifestWorker.update_steam_apps(read_steam_apps())
+    results['update_steam_apps (indexed)'] = timed(_update_steam_apps, args.repeat)
+    results['update_steam_apps (hinted)'] = timed(
+        lambda: ManifestWorker.update_steam_apps(read_steam_apps(), cached_apps=cached_apps), args.repeat)
+
+    results['scan_custom_library'] = timed(lambda: scan_custom_library(CUSTOM_DIR_ID, custom_path), args.repeat)
+
+    # -- First full scan finds no cached apps, the second one re-uses every unchanged app
+    remove_with_backup(settings_dir / app_globals.SCAN_INDEX_FILE_NAME)
+    results['scan_app_lib_fn (first)'] = timed(app_fn.scan_app_lib_fn)
+    AppSettings.previous_version = app_globals.get_version()
+    results['scan_app_lib_fn (repeat)'] = timed(app_fn.scan_app_lib_fn, args.repeat)
+
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """ Report stages slower than the baseline by more than tolerance """
+    passed = True
+    for size, stages in results.items():
+        for stage, duration in stages.items():
+            previous = baseline.get(size, dict()).get(stage)
+            if previous and duration > previous * (1 + tolerance):
+                print(f'REGRESSION {size} apps {stage}: {previous * 1000:.1f}ms -> {duration * 1000:.1f}ms')
+                passed = False
+    return passed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m tests.benchmark.bench_library_scan')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='Number of apps per run')
+    parser.add_argument('--depth', type=int, default=2, help='Directory depth of every app')
+    parser.add_argument('--fan-out', type=int, default=4, help='Sub directories per directory')
+    parser.add_argument('--files-per-dir', type=int, default=2, help='Dummy files per directory')
+    parser.add_argument('--repeat', type=int, default=3, help='Report the best of this many runs')
+    parser.add_argument('--save', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Compare against results written by --save')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown against --compare')
+    args = parser.parse_args(argv)
+
+    results = dict()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for apps in args.sizes:
+            results[str(apps)] = bench_size(Path(tmp_dir), apps, args)
+            print(f'{apps} apps in {LIBRARIES} libraries')
+            for stage, duration in results[str(apps)].items():
+                print(f'  {stage:>28}: {duration * 1000:9.1f} ms')
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+    if args.compare:
+        return 0 if compare(results, json.loads(Path(args.compare).read_text()), args.tolerance) else 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
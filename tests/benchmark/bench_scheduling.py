@@ -0,0 +1,75 @@
+"""
+    Compare the makespan of the cost balanced ManifestWorker scheduling against
+    fixed 16 manifest chunks on a skewed synthetic library with one huge app.
+
+    Run from the project root: python -m tests.benchmark.bench_scheduling
+"""
+import concurrent.futures
+import heapq
+import tempfile
+import time
+from pathlib import Path
+
+from app.util.dir_walker import walk_app_dir
+from app.util.manifest_worker import ManifestWorker
+from app.util.scan_index import ScanIndex
+from tests.benchmark.synthetic_lib import create_app_tree
+
+MAX_WORKERS = 4
+
+
+def fixed_chunks(steam_apps: dict, chunk_size: int = 16):
+    """ The previous chunking: chunk_size manifests per chunk in dict order """
+    app_id_list = list(steam_apps.keys())
+    chunks = list()
+    while app_id_list:
+        chunks.append([steam_apps[app_id_list.pop()] for _ in range(min(chunk_size, len(app_id_list)))])
+    return chunks
+
+
+def simulated_makespan(chunks, costs: dict) -> float:
+    """ Greedy assignment of chunks in submission order to the next idle worker """
+    workers = [0.0] * MAX_WORKERS
+    for chunk in chunks:
+        heapq.heapreplace(workers, workers[0] + sum(costs[m['appid']] for m in chunk))
+    return max(workers)
+
+
+def scan_chunk(manifest_ls):
+    for manifest in manifest_ls:
+        walk_app_dir(Path(manifest['path']))
+
+
+def measured_makespan(chunks) -> float:
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for future in [executor.submit(scan_chunk, chunk) for chunk in chunks]:
+            future.result()
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        steam_apps = dict()
+        for i in range(64):
+            # -- One huge flight sim among many small apps
+            depth = 6 if i == 31 else 3
+            path = create_app_tree(Path(tmp_dir) / f'app_{i}', depth=depth, fan_out=4, files_per_dir=2, seed=i)
+            steam_apps[str(i)] = {'appid': str(i), 'name': f'App {i}', 'path': path.as_posix(), 'SizeOnDisk': 0}
+
+        # -- Index the library once so the scheduler knows the directory counts
+        index = ScanIndex()
+        for manifest in steam_apps.values():
+            walk_app_dir(Path(manifest['path']), index)
+        costs = {app_id: ManifestWorker.estimate_cost(m, index) for app_id, m in steam_apps.items()}
+
+        ManifestWorker.max_workers = MAX_WORKERS
+        for name, chunks in (('fixed chunks', fixed_chunks(steam_apps)),
+                             ('cost balanced', ManifestWorker.schedule_chunks(steam_apps, index))):
+            wall_time = min(measured_makespan(chunks) for _ in range(3))
+            print(f'{name:>14}: {len(chunks):3d} chunks  simulated makespan {simulated_makespan(chunks, costs):7.0f} '
+                  f'dirs  measured {wall_time * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
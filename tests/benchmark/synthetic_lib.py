@@ -0,0 +1,93 @@
+"""
+    Create synthetic app installation trees and Steam libraries to benchmark the library scanner
+"""
+import random
+from pathlib import Path
+from typing import List
+
+from app.globals import OPEN_VR_DLL, DXGI_DLL
+from app.valve import acf
+from app.valve.steam import STEAM_APPS_FOLDER, STEAM_APPS_INSTALL_FOLDER, STEAM_LIBRARY_FILE
+
+
+def create_app_tree(base_path: Path, depth: int = 4, fan_out: int = 4, files_per_dir: int = 8,
+                    seed: int = 0) -> Path:
+    """ Create a directory tree of depth levels with fan_out sub directories per level
+        and files_per_dir dummy asset files per directory. A few executables and
+        OpenVR/dxgi dll's are sprinkled into the tree.
+    """
+    rnd = random.Random(seed)
+    base_path.mkdir(parents=True, exist_ok=True)
+    (base_path / 'Game.exe').touch()
+
+    dir_ls = [base_path]
+    for level in range(depth):
+        next_level = list()
+        for parent in dir_ls:
+            for i in range(fan_out):
+                d = parent / f'dir_{level}_{i}'
+                d.mkdir(exist_ok=True)
+                for f in range(files_per_dir):
+                    (d / f'asset_{f}.pak').touch()
+                next_level.append(d)
+        dir_ls = next_level
+
+    for d in rnd.sample(dir_ls, min(3, len(dir_ls))):
+        (d / OPEN_VR_DLL).touch()
+        (d / DXGI_DLL).touch()
+        (d / 'Launcher.exe').touch()
+
+    return base_path
+
+
+def create_app_manifest(rnd: random.Random, app_id: int) -> str:
+    """ appmanifest content with the keys and depot sections of a real Steam install """
+    depots = {str(app_id + d): {'manifest': str(rnd.randrange(10 ** 18)), 'size': str(rnd.randrange(10 ** 10))}
+              for d in range(rnd.randint(1, 6))}
+    return acf.dumps({'AppState': {
+        'appid': str(app_id), 'universe': '1', 'name': f'Synthetic App {app_id}', 'StateFlags': '4',
+        'installdir': f'Synthetic App {app_id}', 'LastUpdated': str(rnd.randrange(10 ** 9)),
+        'SizeOnDisk': str(rnd.randrange(10 ** 11)), 'buildid': str(rnd.randrange(10 ** 7)),
+        'InstalledDepots': depots, 'SharedDepots': {'228983': '228980', '228990': '228980'},
+        'UserConfig': {'language': 'english'}, 'MountedConfig': {'language': 'english'},
+    }})
+
+
+def create_steam_library(steam_path: Path, libraries: int = 2, apps: int = 10, depth: int = 2, fan_out: int = 4,
+                         files_per_dir: int = 2, seed: int = 0) -> List[Path]:
+    """ Create a Steam installation in steam_path with libraries library folders listed in its
+        libraryfolders.vdf and apps installed apps spread round-robin over the libraries.
+        Every app gets an appmanifest and an installation tree created by create_app_tree.
+
+    :return: The steamapps folders of every library
+    """
+    rnd = random.Random(seed)
+    lib_paths = [steam_path] + [steam_path.parent / f'{steam_path.name}_library_{i}' for i in range(1, libraries)]
+    lib_folders = [p / STEAM_APPS_FOLDER for p in lib_paths]
+    for lib_folder in lib_folders:
+        (lib_folder / STEAM_APPS_INSTALL_FOLDER).mkdir(parents=True, exist_ok=True)
+
+    library_apps = {str(i): dict() for i in range(libraries)}
+    for i in range(apps):
+        app_id, lib_idx = 100000 + i * 10, i % libraries
+        lib_folder = lib_folders[lib_idx]
+        manifest = create_app_manifest(rnd, app_id)
+        (lib_folder / f'appmanifest_{app_id}.acf').write_text(manifest, encoding='utf-8')
+        create_app_tree(lib_folder / STEAM_APPS_INSTALL_FOLDER / f'Synthetic App {app_id}', depth=depth,
+                        fan_out=fan_out, files_per_dir=files_per_dir, seed=seed + i)
+        library_apps[str(lib_idx)][str(app_id)] = str(rnd.randrange(10 ** 10))
+
+    folders = {str(i): {'path': lib_paths[i].as_posix(), 'label': '', 'contentid': str(rnd.randrange(10 ** 18)),
+                        'totalsize': '0', 'apps': library_apps[str(i)]} for i in range(libraries)}
+    (lib_folders[0] / STEAM_LIBRARY_FILE).write_text(acf.dumps({'libraryfolders': folders}), encoding='utf-8')
+
+    return lib_folders
+
+
+def create_custom_library(path: Path, apps: int = 10, depth: int = 2, fan_out: int = 4, files_per_dir: int = 2,
+                          seed: int = 0) -> Path:
+    """ Create a custom library directory with one installation tree per app """
+    for i in range(apps):
+        create_app_tree(path / f'Custom App {i}', depth=depth, fan_out=fan_out, files_per_dir=files_per_dir,
+                        seed=seed + i)
+    return path
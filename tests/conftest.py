@@ -2,7 +2,7 @@ import shutil
 from typing import Tuple
 
 import pytest
-from pathlib import Path, WindowsPath
+from pathlib import Path
 from distutils.dir_util import copy_tree, remove_tree
 
 import app
@@ -112,7 +112,7 @@ def steam_apps_obj(steam_test_path):
     # -- Define Steam Library path in test input dir
     with open(steam_test_path / app.steam.STEAM_APPS_FOLDER / app.steam.STEAM_LIBRARY_FILE, 'w') as f:
         f.write(
-            libraryfolders_content.format(path=str(WindowsPath(steam_test_path)))
+            libraryfolders_content.format(path=str(Path(steam_test_path)))
         )
 
     # -- Re-route Steam Location to test directory
@@ -3,7 +3,10 @@ import logging
 from pathlib import Path
 
 from app import app_fn
+from app.events import ScanCancelEvent
 from app.mod import FsrMod, FoveatedMod, VRPerfKitMod
+from app.util.manifest_worker import ManifestWorker
+from app.util.scan_checkpoint import ScanCheckpoint
 from tests.conftest import test_app_path, user_app_path, test_user_app_id
 
 LOGGER = logging.getLogger(__name__)
@@ -84,3 +87,111 @@ def test_save_lib_fn(steam_apps_obj, custom_lib_path):
     # -- Load
     result_dict = json.loads(app_fn.load_steam_lib_fn())
     assert result_dict['result'] is True
+
+
+def test_reuse_unchanged_apps(steam_apps_obj, monkeypatch):
+    monkeypatch.setattr(app_fn.AppSettings, 'previous_version', app_fn.app.globals.get_version())
+    cached_apps = app_fn.reduce_steam_apps_for_export(steam_apps_obj.steam_apps)
+    cached_apps['123']['openVrDllPaths'] = ['cached/openvr_api.dll']
+    cached_apps['124']['scanKey'] = 'outdated'
+
+    steam_apps = dict(steam_apps_obj.steam_apps)
+    unchanged_apps = app_fn._reuse_unchanged_apps(steam_apps, cached_apps)
+
+    # -- Unchanged app re-uses cached scan results
+    assert '123' in unchanged_apps and '123' not in steam_apps
+    assert unchanged_apps['123']['openVrDllPaths'] == ['cached/openvr_api.dll']
+    # -- Updated app needs to be scanned
+    assert '124' in steam_apps and '124' not in unchanged_apps
+
+
+def test_scan_app_lib_fn_stream(steam_apps_obj, monkeypatch):
+    chunks = list()
+    monkeypatch.setattr(app_fn.eel, 'scan_chunk', lambda c: chunks.append(json.loads(c)), raising=False)
+
+    result_dict = json.loads(app_fn.scan_app_lib_fn(stream=True))
+    streamed_apps = {app_id: entry for chunk in chunks for app_id, entry in chunk['data'].items()}
+
+    assert result_dict['result'] is True
+    assert 'data' not in result_dict
+    assert result_dict['summary']['apps'] == len(streamed_apps)
+    assert streamed_apps['123']['name'] == 'Test App'
+
+
+def test_get_scan_report_fn(steam_apps_obj):
+    json.loads(app_fn.scan_app_lib_fn())
+    result_dict = json.loads(app_fn.get_scan_report_fn())
+
+    assert result_dict['result'] is True
+    report = result_dict['data']
+    assert report['apps'] == len(report['slowest'])
+    assert report['totals']['syscalls'] >= report['totals']['dirs_visited'] + report['totals']['dirs_cached'] > 0
+    assert sum(lib['apps'] for lib in report['libraries'].values()) == report['apps']
+
+
+def test_scan_app_lib_fn_resume(steam_apps_obj, monkeypatch):
+    # -- Version never matching get_version so unchanged apps are not re-used from the cache
+    monkeypatch.setattr(app_fn.AppSettings, 'previous_version', '-1')
+
+    # -- Checkpoint of an interrupted scan that finished app 124
+    checkpoint = ScanCheckpoint()
+    checkpoint.add_apps([dict(steam_apps_obj.steam_apps['124'], openVrDllPaths=['checkpoint/openvr_api.dll'])])
+    checkpoint.save()
+
+    result_dict = json.loads(app_fn.scan_app_lib_fn())
+
+    assert result_dict['result'] is True
+    assert result_dict['data']['124']['openVrDllPaths'] == ['checkpoint/openvr_api.dll']
+    assert result_dict['data']['123']['openVrDllPaths']
+    # -- Finished scans remove the checkpoint
+    assert ScanCheckpoint.load().apps == dict()
+
+
+def test_scan_checkpoint_append(steam_apps_obj):
+    checkpoint = ScanCheckpoint()
+    checkpoint.remove()
+    checkpoint.add_custom_dir('custom')
+    checkpoint.add_apps([dict(steam_apps_obj.steam_apps['123'], settings=[{'key': 0}])])
+    checkpoint.add_apps([steam_apps_obj.steam_apps['124']])
+
+    # -- Only scan results get appended, a line torn by a crash is skipped
+    file = ScanCheckpoint._get_checkpoint_file()
+    with open(file, 'a') as f:
+        f.write('{"appid": "125", "pa')
+    loaded = ScanCheckpoint.load()
+    assert loaded.custom_dirs == ['custom']
+    assert list(loaded.apps) == ['123', '124'] and 'settings' not in loaded.apps['123']
+    checkpoint.remove()
+
+
+def test_cancel_scan(steam_apps_obj):
+    manifest_ls = [dict(m) for m in steam_apps_obj.steam_apps.values()]
+
+    app_fn.cancel_scan_fn()
+    try:
+        assert ManifestWorker.worker(manifest_ls) == list()
+    finally:
+        ScanCancelEvent.reset()
+
+
+def test_load_steam_app_fn(steam_apps_obj):
+    json.loads(app_fn.scan_app_lib_fn())
+
+    # -- Summaries without paths or mod settings
+    summary = json.loads(app_fn.load_steam_lib_fn())['data']['123']
+    assert summary['summary'] is True and summary['name'] == 'Test App'
+    assert FsrMod.VAR_NAMES['installed'] in summary
+    assert 'openVrDllPaths' not in summary and FsrMod.VAR_NAMES['settings'] not in summary
+
+    # -- Complete entry on demand
+    entry = json.loads(app_fn.load_steam_app_fn('123'))['data']
+    assert entry['path'] == test_app_path.as_posix()
+    assert FsrMod.VAR_NAMES['settings'] in entry and 'summary' not in entry
+    assert json.loads(app_fn.load_steam_app_fn('unknown'))['result'] is False
+
+    # -- Single entries are saved, summaries are refused
+    entry['name'] = 'Renamed App'
+    assert json.loads(app_fn.save_steam_app_fn(entry))['result'] is True
+    assert json.loads(app_fn.save_steam_app_fn(summary))['result'] is False
+    steam_apps = app_fn.AppSettings.load_steam_apps()
+    assert steam_apps['123']['name'] == 'Renamed App' and '124' in steam_apps
@@ -0,0 +1,54 @@
+from app import cli
+from app.util.scan_checkpoint import ScanCheckpoint
+
+
+def _run(*argv) -> dict:
+    args = cli.create_parser().parse_args(argv)
+    return args.func(args)
+
+
+def test_cli_scan_and_list(steam_apps_obj):
+    output = _run('scan', '--repeat', '2')
+
+    assert output['result'] is True
+    assert len(output['runs']) == 2
+    assert output['report']['apps'] >= 0
+
+    output = _run('list', '--vr')
+    assert output['result'] is True
+    assert '123' in {a['appid'] for a in output['data']}
+    assert all(a['openVr'] for a in output['data'])
+
+
+def test_cli_unknown_app(steam_apps_obj):
+    output = _run('install', 'non-existing-id', '--mod', 'fsr')
+    assert output['result'] is False
+
+
+def test_cli_set_unknown_setting(steam_apps_obj):
+    _run('scan')
+    output = _run('set', '123', '--mod', 'fsr', 'nonExistingKey=1')
+
+    assert output['result'] is False
+    assert 'nonExistingKey' in output['msg']
+
+
+def test_cli_scan_cold(steam_apps_obj, monkeypatch):
+    monkeypatch.setattr(cli.AppSettings, 'previous_version', cli.app_fn.app.globals.get_version())
+    monkeypatch.setattr(cli.ManifestWorker, 'use_scan_index', True)
+    monkeypatch.setattr(cli.ManifestWorker, 'use_scan_hints', True)
+    _run('scan')
+    warm_apps = _run('scan')['report']['apps']
+
+    # -- Checkpoint of an interrupted scan that finished app 124
+    checkpoint = ScanCheckpoint()
+    checkpoint.add_apps([dict(steam_apps_obj.steam_apps['124'], openVrDllPaths=['checkpoint/openvr_api.dll'])])
+    checkpoint.save()
+
+    # -- Unchanged apps and the checkpoint are ignored, every app gets scanned again
+    output = _run('scan', '--cold', '--full')
+
+    assert output['result'] is True
+    assert output['data']['124']['openVrDllPaths'] != ['checkpoint/openvr_api.dll']
+    assert output['report']['apps'] > warm_apps
+    assert ScanCheckpoint.load().apps == dict()
@@ -1,7 +1,10 @@
 import json
 from pathlib import Path
 
+import gevent
+
 from app import app_fn
+from app.events import ScanCancelEvent
 from test_app.test_app_fn import test_keys
 
 
@@ -63,3 +66,21 @@ def test_scan_custom_lib(app_settings, custom_lib_path, custom_dir_id, custom_ap
     assert test_keys.difference(set(apps[custom_app_id].keys())) == set()
 
     app_settings.user_app_directories.pop(custom_dir_id)
+
+
+def test_add_custom_library_waits_for_scan(app_settings, custom_lib_path, custom_dir_id):
+    app_settings.user_app_directories.pop(custom_dir_id, None)
+
+    # -- A cancel requested during a running scan is not cleared by a custom library scan
+    app_fn.SCAN_LOCK.acquire()
+    try:
+        app_fn.cancel_scan_fn()
+        greenlet = gevent.spawn(app_fn.add_custom_dir_fn, custom_lib_path.as_posix())
+        gevent.sleep(0.1)
+        assert not greenlet.ready() and ScanCancelEvent.is_set()
+    finally:
+        ScanCancelEvent.reset()
+        app_fn.SCAN_LOCK.release()
+
+    assert json.loads(greenlet.get())['result'] is True
+    app_settings.user_app_directories.pop(custom_dir_id)
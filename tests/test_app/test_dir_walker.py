@@ -0,0 +1,125 @@
+import threading
+from pathlib import Path
+
+import app.globals as app_globals
+from app.app_settings import AppSettings
+from app.util.dir_walker import PruneRules, walk_app_dir
+from app.util.manifest_worker import ManifestWorker
+from app.util.scan_index import ScanIndex
+
+
+def test_walk_app_dir(custom_lib_path):
+    app_path = custom_lib_path / 'custom_app_writeable'
+    result = walk_app_dir(app_path)
+
+    assert [p.name for p in result.open_vr_dll_paths] == ['openvr_api.dll']
+    assert {p.name for p in result.executable_paths} == {'Another Binary.exe', 'Binary.EXE'}
+    assert result.dxgi_dll_paths == list()
+    assert result.dirs_visited == 2
+    assert result.files_examined == 3
+
+
+def test_walk_non_existing_dir(custom_lib_path):
+    result = walk_app_dir(Path(custom_lib_path / 'non-existing'))
+
+    assert result.open_vr_dll_paths == list()
+    assert result.executable_paths == list()
+    assert result.dirs_visited == 0
+
+
+def test_walk_app_dir_with_index(tmp_path):
+    app_path = tmp_path / 'indexed_app'
+    (app_path / 'bin' / 'win64').mkdir(parents=True)
+    (app_path / 'bin' / 'win64' / 'openvr_api.dll').touch()
+    (app_path / 'Game.exe').touch()
+    index = ScanIndex()
+
+    # -- Cold walk lists every directory
+    result = walk_app_dir(app_path, index)
+    assert result.dirs_visited == 3
+    assert result.dirs_cached == 0
+    assert len(index.get_tree(app_path)) == 3
+
+    # -- Unchanged tree is restored from the index
+    result = walk_app_dir(app_path, index)
+    assert result.dirs_visited == 0
+    assert result.dirs_cached == 3
+    assert [p.name for p in result.open_vr_dll_paths] == ['openvr_api.dll']
+    assert [p.name for p in result.executable_paths] == ['Game.exe']
+
+    # -- Removed directories disappear from the index
+    (app_path / 'bin' / 'win64' / 'openvr_api.dll').unlink()
+    (app_path / 'bin' / 'win64').rmdir()
+    result = walk_app_dir(app_path, index)
+    assert result.open_vr_dll_paths == list()
+    assert 'bin/win64' not in index.get_tree(app_path)
+
+    # -- Removed apps are pruned
+    index.set_tree(tmp_path / 'removed_app', {'': [0, [], []]})
+    assert index.prune() == [(tmp_path / 'removed_app').as_posix()]
+
+
+def test_walk_app_dir_prune_rules(tmp_path):
+    app_path = tmp_path / 'pruned_app'
+    for d in ('Game_Data/Plugins/x86_64', 'Game_Data/StreamingAssets/aa', 'Game/Content/Paks', 'a/b/c/d'):
+        (app_path / d).mkdir(parents=True)
+    (app_path / 'Game_Data' / 'Plugins' / 'x86_64' / 'openvr_api.dll').touch()
+    (app_path / 'Game_Data' / 'StreamingAssets' / 'aa' / 'openvr_api.dll').touch()
+    (app_path / 'a' / 'b' / 'c' / 'd' / 'Deep.exe').touch()
+
+    result = walk_app_dir(app_path, prune_rules=PruneRules(['*_data/streamingassets', 'Content/Paks'], 3))
+
+    assert [p.parent.name for p in result.open_vr_dll_paths] == ['x86_64']
+    assert result.executable_paths == list()
+    # -- StreamingAssets, Content/Paks and a/b/c/d skipped
+    assert result.dirs_pruned == 3
+
+
+def test_walk_app_dir_default_prune_rules(tmp_path, monkeypatch):
+    """ Binaries of typical Unity and Unreal VR titles survive the default prune rules """
+    app_path = tmp_path / 'vr_app'
+    binaries = ['Game.exe', 'Game_Data/Plugins/x86_64/openvr_api.dll', 'UnrealGame.exe',
+                'UnrealGame/Binaries/Win64/UnrealGame-Win64-Shipping.exe',
+                'Engine/Binaries/ThirdParty/OpenVR/OpenVRv1_5_17/Win64/openvr_api.dll',
+                'Movies/Launcher.exe']
+    assets = ['_CommonRedist/vcredist/2019/VC_redist.x64.exe', 'Game_Data/StreamingAssets/Tool.exe',
+              'UnrealGame/Content/Paks/openvr_api.dll', 'UnrealGame/Content/Movies/Intro.exe']
+    for file in binaries + assets:
+        (app_path / file).parent.mkdir(parents=True, exist_ok=True)
+        (app_path / file).touch()
+
+    monkeypatch.setattr(AppSettings, 'scan_prune_dirs', list())
+    monkeypatch.setattr(AppSettings, 'scan_prune_dirs_removed', list())
+    result = walk_app_dir(app_path, prune_rules=ManifestWorker.get_prune_rules())
+
+    found = {p.relative_to(app_path).as_posix() for p in result.open_vr_dll_paths + result.executable_paths}
+    assert found == set(binaries)
+
+
+def test_get_scan_prune_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(AppSettings, 'SETTINGS_FILE_OVR', (tmp_path / 'settings.json').as_posix())
+    monkeypatch.setattr(AppSettings, 'scan_prune_dirs', ['Extras', 'shadercache'])
+    monkeypatch.setattr(AppSettings, 'scan_prune_dirs_removed', ['_CommonRedist'])
+    prune_dirs = AppSettings.get_scan_prune_dirs()
+
+    assert 'Extras' in prune_dirs and '_CommonRedist' not in prune_dirs
+    assert len(prune_dirs) == len(app_globals.SCAN_PRUNE_DIRS)
+
+    # -- Only the overrides are saved, the defaults are merged at load time
+    AppSettings.save()
+    AppSettings.scan_prune_dirs, AppSettings.scan_prune_dirs_removed = list(), list()
+    AppSettings.load()
+    assert AppSettings.scan_prune_dirs == ['Extras', 'shadercache']
+    assert AppSettings.get_scan_prune_dirs() == prune_dirs
+
+
+def test_walk_app_dir_cancelled(custom_lib_path):
+    app_path = custom_lib_path / 'custom_app_writeable'
+    index, cancel_event = ScanIndex(), threading.Event()
+    cancel_event.set()
+
+    result = walk_app_dir(app_path, index, cancel_event=cancel_event)
+
+    assert result.cancelled is True
+    assert result.dirs_visited == 0
+    assert index.get_tree(app_path) == dict()
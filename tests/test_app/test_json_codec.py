@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from app.util import json_codec
+
+
+@pytest.fixture
+def restore_codec():
+    codec = json_codec.get_codec()
+    yield
+    json_codec.set_codec(codec.name)
+
+
+@pytest.mark.parametrize('codec', [c for c in json_codec.CODECS.values() if c.is_available()], ids=lambda c: c.name)
+def test_json_codec_compatible(codec):
+    data = {'b': [1, 2.5, None, True], 'a': 'Spiel ü', 0: {'nested': 'dict'}}
+
+    encoded = codec.dumps(data)
+    assert isinstance(encoded, str)
+    assert json.loads(encoded) == json.loads(json.dumps(data))
+    assert codec.loads(json.dumps(data)) == codec.loads(encoded.encode('utf-8'))
+
+    assert codec.dumps({'b': 1, 'a': 2}, sort_keys=True).index('"a"') < codec.dumps({'b': 1, 'a': 2}).index('"a"')
+    assert 'PosixPath' in codec.dumps({'p': object()}, default=lambda o: 'PosixPath')
+
+
+def test_set_codec(restore_codec):
+    assert json_codec.set_codec('json') is json_codec.JsonCodec
+    assert json_codec.dumps({1: 2}) == '{"1": 2}'
+    assert json_codec.set_codec('unknown').is_available()
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from app import app_fn
+from app.globals import RF2_APPID
+from app.util.known_apps import KnownApps
+from app.util.manifest_worker import ManifestWorker
+from tests.conftest import test_app_path
+
+
+@pytest.fixture
+def known_apps_file(tmp_path, monkeypatch):
+    file = tmp_path / 'known_apps.json'
+    file.write_text(json.dumps({'version': 1, 'apps': {
+        '123': {'_name': 'Test App', 'fsr_compatible': False, 'scan_hints': ['bin'], 'exe_sub_path': 'sub dir/'},
+    }}))
+    monkeypatch.setattr(KnownApps, 'file', file)
+    KnownApps.reset()
+    yield file
+    KnownApps.reset()
+
+
+def test_known_apps_data_file():
+    KnownApps.reset()
+    assert KnownApps.get(RF2_APPID)['exe_sub_path'] == 'Bin64/'
+    assert KnownApps.get('546560')['fsr_compatible'] is False
+    assert '_name' not in KnownApps.get('546560')
+
+    # -- Known hints only add to the hints of a previous scan
+    manifest = {'appid': RF2_APPID, 'path': 'C:/Games/rFactor 2', 'buildid': '1'}
+    assert ManifestWorker.get_scan_hints(manifest, None) == list()
+    cached_entry = dict(manifest, openVrDllPaths=['C:/Games/rFactor 2/Bin64/openvr_api.dll'])
+    assert ManifestWorker.get_scan_hints(manifest, cached_entry) == ['', 'Bin64']
+
+
+def test_known_apps_overlay(known_apps_file):
+    assert dict(KnownApps.get('123')) == {'fsr_compatible': False, 'scan_hints': ['bin'], 'exe_sub_path': 'sub dir/'}
+    assert KnownApps.get('unknown') == dict()
+
+    with pytest.raises(TypeError):
+        KnownApps.get('123')['fsr_compatible'] = True
+
+    entry = {'appid': '123', 'fsr_compatible': True}
+    assert KnownApps.overlay('123', entry)['fsr_compatible'] is False
+    assert entry['fsr_compatible'] is True
+
+
+def test_known_apps_export(known_apps_file, steam_apps_obj):
+    assert steam_apps_obj.steam_apps['123']['fsr_compatible'] is False
+    # -- Overlaid after the path is resolved, Steam apps keep their installation root
+    assert steam_apps_obj.steam_apps['123']['path'] == test_app_path.as_posix()
+    assert 'fsr_compatible' not in steam_apps_obj.read_app_manifests(['124'])[0]['124']
+    assert steam_apps_obj.read_app_manifests(['123'])[0]['123']['path'] == test_app_path.as_posix()
+
+    steam_apps = {'123': {'appid': '123', 'openVr': True}, '124': {'appid': '124', 'openVr': True}}
+    reduced = app_fn.reduce_steam_apps_for_export(steam_apps)
+    assert reduced['123']['fsr_compatible'] is False
+    assert reduced['124']['fsr_compatible'] is True
+    assert 'fsr_compatible' not in steam_apps['123']
@@ -0,0 +1,129 @@
+import json
+import sqlite3
+
+import pytest
+
+from app import app_fn
+from app.app_settings import AppSettings
+from app.util.library_store import LibraryStore, STEAM_DIR_ID
+
+
+@pytest.fixture
+def library_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(LibraryStore, 'file', tmp_path / 'library.db')
+    LibraryStore.close()
+    yield LibraryStore
+    LibraryStore.close()
+
+
+def _entry(app_id: str, **kwargs) -> dict:
+    entry = {'appid': app_id, 'name': f'App {app_id}', 'path': f'C:/Games/{app_id}', 'openVr': True,
+             'openVrDllPaths': ['C:/Games/a', 'C:/Games/b'], 'openVrDllPathsSelected': ['C:/Games/b'],
+             'executablePaths': list(), 'executablePathsSelected': None,
+             'scanKey': 'key', 'buildid': '42', 'SizeOnDisk': '1024', 'sizeGb': 0.1,
+             'settings': [{'key': 'enabled', 'value': True}], 'fsrInstalled': False, 'fsrVersion': '',
+             'fsr_compatible': True}
+    entry.update(kwargs)
+    return entry
+
+
+def test_library_store_round_trip(library_store):
+    apps = {'1': _entry('1'), '2': _entry('2', openVr=False)}
+    assert library_store.save_apps(STEAM_DIR_ID, apps) == 2
+    assert library_store.load_apps([STEAM_DIR_ID]) == apps
+
+    # -- A changed setting writes a single app, apps missing in a save are removed
+    apps['1']['settings'][0]['value'] = False
+    assert library_store.save_apps(STEAM_DIR_ID, apps) == 1
+    assert library_store.save_apps(STEAM_DIR_ID, apps) == 0
+    assert library_store.save_apps(STEAM_DIR_ID, {'1': apps['1']}) == 0
+    assert library_store.load_apps([STEAM_DIR_ID]) == {'1': apps['1']}
+
+    # -- Rows are normalized
+    conn = sqlite3.connect(library_store.get_file().as_posix())
+    assert conn.execute('SELECT COUNT(*) FROM app_paths').fetchone()[0] == 3
+    assert conn.execute('SELECT installed, version FROM mod_settings').fetchall() == [(0, '')]
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    conn.close()
+
+    assert library_store.remove_dir(STEAM_DIR_ID) == 1
+    assert library_store.load_apps([STEAM_DIR_ID]) == dict()
+
+
+def test_library_store_remove_apps_rollback(library_store):
+    library_store.save_apps(STEAM_DIR_ID, {'1': _entry('1'), '2': _entry('2')})
+
+    def _app_ids():
+        yield '1'
+        raise ValueError('Invalid app id')
+
+    # -- A failed removal leaves no transaction open and removes nothing
+    with pytest.raises(ValueError):
+        library_store.remove_apps(_app_ids())
+    assert library_store.remove_apps(['2']) == 1
+    assert list(library_store.load_apps([STEAM_DIR_ID])) == ['1']
+
+
+def test_library_store_migrate(library_store, tmp_path):
+    steam_file, custom_file = tmp_path / 'steam_apps.json', tmp_path / '#1_apps.json'
+    steam_file.write_text(json.dumps({'1': _entry('1')}))
+    custom_file.write_text(json.dumps({'#1_app': _entry('#1_app')}))
+
+    library_store.migrate({STEAM_DIR_ID: steam_file, '#1': custom_file})
+    assert library_store.load_apps([STEAM_DIR_ID]) == {'1': _entry('1')}
+    assert list(library_store.load_apps(['#1'])) == ['#1_app']
+
+    # -- Files are imported only once
+    library_store.save_apps(STEAM_DIR_ID, dict())
+    LibraryStore.close()
+    library_store.migrate({STEAM_DIR_ID: steam_file})
+    assert library_store.load_apps([STEAM_DIR_ID]) == dict()
+
+
+def test_save_steam_lib_delta(steam_apps_obj, monkeypatch):
+    json.loads(app_fn.scan_app_lib_fn())
+    steam_apps = app_fn._load_steam_apps_with_mod_settings(AppSettings.load_steam_apps())
+    app_fn.save_steam_lib(steam_apps)
+
+    reduced, saved_dirs = list(), list()
+    reduce_fn, save_fn = app_fn.reduce_steam_apps_for_export, LibraryStore.save_apps
+    monkeypatch.setattr(app_fn, 'reduce_steam_apps_for_export',
+                        lambda apps: reduced.append(sorted(apps)) or reduce_fn(apps))
+    monkeypatch.setattr(LibraryStore, 'save_apps',
+                        lambda d, apps, **kw: saved_dirs.append(d) or save_fn(d, apps, **kw))
+
+    # -- Unchanged apps are saved without being reduced or written
+    app_fn.save_steam_lib(steam_apps)
+    assert reduced == [list()] and saved_dirs == list()
+
+    # -- A single changed app is reduced and written, other directories are untouched
+    steam_apps['123']['name'] = 'Renamed App'
+    app_fn.save_steam_lib(steam_apps)
+    assert reduced[-1] == ['123'] and saved_dirs == [STEAM_DIR_ID]
+    assert AppSettings.load_steam_apps()['123']['name'] == 'Renamed App'
+
+    # -- Apps written by another path since are saved again
+    save_fn(STEAM_DIR_ID, {'123': dict(steam_apps['123'], name='Scanned App')}, replace=False)
+    app_fn.save_steam_lib(steam_apps)
+    assert reduced[-1] == ['123']
+    assert AppSettings.load_steam_apps()['123']['name'] == 'Renamed App'
+
+    # -- Removed apps are deleted
+    steam_apps.pop('124')
+    app_fn.save_steam_lib(steam_apps)
+    assert '124' not in AppSettings.load_steam_apps()
+
+
+def test_repeat_scan_saves_nothing(steam_apps_obj, monkeypatch):
+    monkeypatch.setattr(app_fn.AppSettings, 'previous_version', app_fn.app.globals.get_version())
+    json.loads(app_fn.scan_app_lib_fn())
+
+    reduced = list()
+    reduce_fn = app_fn.reduce_steam_apps_for_export
+    monkeypatch.setattr(app_fn, 'reduce_steam_apps_for_export',
+                        lambda apps: reduced.append(sorted(apps)) or reduce_fn(apps))
+
+    # -- Re-used apps keep their reduced settings and are not written again
+    result_dict = json.loads(app_fn.scan_app_lib_fn())
+    assert result_dict['data']['123']['summary'] is True
+    assert reduced == [list()]
@@ -0,0 +1,84 @@
+import json
+import os
+
+from app import app_fn
+from app.app_settings import AppSettings
+from app.util.library_watcher import LibraryWatcher, PollingBackend
+from tests.conftest import test_app_path
+
+
+def _write(file, content: str, mtime_ns: int):
+    file.write_text(content)
+    os.utime(file, ns=(mtime_ns, mtime_ns))
+
+
+def test_library_watcher_polling(tmp_path):
+    lib = tmp_path / 'steamapps'
+    lib.mkdir()
+    _write(lib / 'appmanifest_1.acf', '"AppState" {}', 1_000_000_000)
+    _write(lib / 'appmanifest_2.acf', '"AppState" {}', 1_000_000_000)
+
+    changes = list()
+    watcher = LibraryWatcher(changes.extend, PollingBackend(), interval=5.0, find_libraries=lambda: [lib])
+    watcher.start()
+    assert watcher.check(now=0.0) == list()
+
+    # -- Changed and removed manifests wait until they settled, other files are ignored
+    _write(lib / 'appmanifest_1.acf', '"AppState" { "a" "b" }', 2_000_000_000)
+    (lib / 'appmanifest_2.acf').unlink()
+    (lib / 'downloading.txt').write_text('')
+    assert watcher.check(now=10.0) == list()
+
+    # -- A manifest written again restarts its settle time
+    _write(lib / 'appmanifest_1.acf', '"AppState" { "a" "c" }', 3_000_000_000)
+    assert watcher.check(now=15.0) == ['2']
+    assert watcher.check(now=20.0) == ['1']
+    assert changes == ['2', '1']
+
+    # -- Busy watchers keep changes pending
+    watcher.is_busy = lambda: True
+    _write(lib / 'appmanifest_3.acf', '"AppState" {}', 1_000_000_000)
+    watcher.check(now=30.0)
+    assert watcher.check(now=40.0) == list()
+    assert '3' in watcher.pending
+
+
+def test_update_changed_apps_fn(steam_apps_obj, monkeypatch):
+    updates = list()
+    monkeypatch.setattr(app_fn.eel, 'library_update', lambda u: updates.append(json.loads(u)), raising=False)
+    json.loads(app_fn.scan_app_lib_fn())
+
+    # -- Cached app without manifest got uninstalled
+    steam_apps = AppSettings.load_steam_apps()
+    steam_apps['999'] = {'appid': '999', 'name': 'Uninstalled App', 'path': ''}
+    app_fn.save_steam_lib(steam_apps)
+
+    reduced = list()
+    reduce_fn = app_fn.reduce_steam_apps_for_export
+    monkeypatch.setattr(app_fn, 'reduce_steam_apps_for_export',
+                        lambda apps: reduced.append(sorted(apps)) or reduce_fn(apps))
+
+    result_dict = json.loads(app_fn.update_changed_apps_fn(['123', '999']))
+
+    # -- Only the changed app gets reduced and stored
+    assert reduced == [['123']]
+    assert result_dict['result'] is True
+    assert result_dict['data']['123']['path'] == test_app_path.as_posix()
+    assert result_dict['removed'] == ['999']
+    assert updates[0]['removed'] == ['999'] and '123' in updates[0]['data']
+
+    steam_apps = AppSettings.load_steam_apps()
+    assert '999' not in steam_apps and '123' in steam_apps and '124' in steam_apps
+
+
+def test_update_changed_apps_fn_after_cancel(steam_apps_obj):
+    json.loads(app_fn.scan_app_lib_fn())
+    dll_paths = AppSettings.load_steam_apps()['124']['openVrDllPaths']
+    assert dll_paths
+
+    # -- A cancelled scan does not cancel later updates
+    app_fn.cancel_scan_fn()
+    result_dict = json.loads(app_fn.update_changed_apps_fn(['124']))
+
+    assert result_dict['result'] is True
+    assert AppSettings.load_steam_apps()['124']['openVrDllPaths'] == dll_paths
@@ -0,0 +1,92 @@
+from pathlib import Path
+
+from app.app_settings import AppSettings
+from app.util.manifest_worker import ManifestWorker, run_update_steam_apps
+from app.util.scan_report import ScanReport
+from tests.benchmark.synthetic_lib import create_app_tree
+
+
+def test_run_update_steam_apps(steam_apps_obj):
+    chunks = list()
+    steam_apps = run_update_steam_apps(dict(steam_apps_obj.steam_apps), chunks.append)
+
+    assert {m.get('appid') for chunk in chunks for m in chunk} == set(steam_apps_obj.steam_apps.keys())
+    assert steam_apps['123']['openVr'] is True
+    assert steam_apps['123']['openVrDllPaths']
+
+
+def test_schedule_chunks():
+    gb = 1024 ** 3
+    steam_apps = {str(i): {'appid': str(i), 'SizeOnDisk': str(gb)} for i in range(40)}
+    steam_apps['big'] = {'appid': 'big', 'SizeOnDisk': str(200 * gb)}
+
+    chunks = ManifestWorker.schedule_chunks(steam_apps)
+
+    # -- Largest app is scheduled first and alone
+    assert [m['appid'] for m in chunks[0]] == ['big']
+    # -- Every app is scheduled exactly once
+    assert sorted(m['appid'] for chunk in chunks for m in chunk) == sorted(steam_apps.keys())
+    assert max(len(chunk) for chunk in chunks) <= ManifestWorker.chunk_size
+
+    # -- Fewer workers on a volume get fewer, larger chunks
+    steam_apps.pop('big')
+    assert len(ManifestWorker.schedule_chunks(steam_apps, workers=1)) < len(
+        ManifestWorker.schedule_chunks(steam_apps, workers=16))
+
+
+def test_volume_workers(monkeypatch):
+    monkeypatch.setattr(AppSettings, 'scan_volume_workers', {'D:': 2})
+    monkeypatch.setattr(AppSettings, 'scan_volume_throughput', dict())
+    monkeypatch.setattr(ManifestWorker, 'max_workers', 16)
+
+    # -- User configured limit
+    assert ManifestWorker.get_volume_workers('D:') == 2
+    ManifestWorker.update_volume_throughput('D:', 2, 1000, 2.0)
+    assert 'D:' not in AppSettings.scan_volume_throughput
+
+    # -- Auto tuning tries neighbours of the best measured worker count
+    assert ManifestWorker.get_volume_workers('C:') == ManifestWorker.default_volume_workers
+    ManifestWorker.update_volume_throughput('C:', 4, 1000, 2.0)
+    assert ManifestWorker.get_volume_workers('C:') == 8
+    ManifestWorker.update_volume_throughput('C:', 8, 1000, 4.0)
+    assert ManifestWorker.get_volume_workers('C:') == 2
+    ManifestWorker.update_volume_throughput('C:', 2, 1000, 3.0)
+    assert ManifestWorker.get_volume_workers('C:') == 4
+
+    # -- Scans without file system work measure nothing
+    ManifestWorker.update_volume_throughput('E:', 4, 0, 2.0)
+    assert 'E:' not in AppSettings.scan_volume_throughput
+
+
+def test_scan_hints(tmp_path):
+    app_path = create_app_tree(tmp_path / 'hinted_app', depth=3, fan_out=3, files_per_dir=1)
+    manifest = {'appid': '1', 'path': app_path.as_posix(), 'buildid': '10'}
+
+    cached_entry = run_update_steam_apps({'1': dict(manifest)})['1']
+    full_walk = ManifestWorker.scan_app_dir(dict(manifest))
+    assert cached_entry['openVrDllPaths'] and full_walk.hint is None
+
+    # -- Unchanged build is located by listing the previous dll and executable directories only
+    hinted = ManifestWorker.scan_app_dir(dict(manifest), cached_entry=cached_entry)
+    assert hinted.hint is True
+    assert hinted.dirs_visited < full_walk.dirs_visited
+    assert sorted(p.as_posix() for p in hinted.open_vr_dll_paths) == sorted(cached_entry['openVrDllPaths'])
+
+    # -- Executables of the previous scan outside of the probed directories need a complete walk
+    moved_exe = dict(cached_entry, executablePaths=cached_entry['executablePaths'] + [f'{app_path.as_posix()}/x/y.exe'])
+    assert ManifestWorker.scan_app_dir(dict(manifest), cached_entry=moved_exe).hint is False
+
+    # -- Changed build walks the whole tree
+    assert ManifestWorker.scan_app_dir(dict(manifest, buildid='11'), cached_entry=cached_entry).hint is None
+
+    # -- Missing dll's fall back to a complete walk
+    Path(cached_entry['openVrDllPaths'][0]).unlink()
+    missed = ManifestWorker.scan_app_dir(dict(manifest), cached_entry=cached_entry)
+    assert missed.hint is False
+    assert missed.dirs_visited == full_walk.dirs_visited
+
+    # -- Scan report hit rate
+    scan_report = ScanReport()
+    scan_report.add_app(manifest, hinted, 0.0, 1.0)
+    scan_report.add_app(dict(manifest, appid='2'), missed, 0.0, 1.0)
+    assert scan_report.to_js()['totals']['hint_hit_rate'] == 0.5
@@ -1,4 +1,4 @@
-from pathlib import WindowsPath
+from pathlib import Path
 
 from app.mod import BaseModType
 from app.mod.mod_utils import update_mod_data_dirs
@@ -9,7 +9,7 @@ def test_get_mod_data_dirs(app_settings, open_vr_fsr_test_mod_dir):
     test_dirs = dict()
     for mod_type in BaseModType.mod_types.keys():
         data_dir_name = BaseModType.mod_data_dir_names[mod_type]
-        test_dirs[mod_type] = str(WindowsPath(get_data_dir() / data_dir_name))
+        test_dirs[mod_type] = str(Path(get_data_dir() / data_dir_name))
 
     # -- Test default paths
     mod_dirs = update_mod_data_dirs()
@@ -17,7 +17,7 @@ def test_get_mod_data_dirs(app_settings, open_vr_fsr_test_mod_dir):
         assert test_dirs[key] == value
 
     # -- Test custom path
-    test_dir = str(WindowsPath(open_vr_fsr_test_mod_dir))
+    test_dir = str(Path(open_vr_fsr_test_mod_dir))
     app_settings.mod_data_dirs[0] = test_dir
     mod_dirs = update_mod_data_dirs()
     assert mod_dirs[0 == test_dir]
@@ -0,0 +1,75 @@
+import json
+import os
+
+import pytest
+
+from app.app_settings import AppSettings
+from app.util import safe_file
+from app.util.library_store import LibraryStore, STEAM_DIR_ID
+from app.util.safe_file import get_backup_file, read_json, write_json_atomic
+
+
+def test_write_atomic(tmp_path, monkeypatch):
+    file = tmp_path / 'cache.json'
+    write_json_atomic(file, {'a': 1})
+    write_json_atomic(file, {'a': 2})
+    assert read_json(file) == {'a': 2}
+    assert json.loads(get_backup_file(file).read_text()) == {'a': 1}
+
+    # -- A failing write leaves the target and no temporary file behind
+    def _fail(fd):
+        raise OSError('disk full')
+    monkeypatch.setattr(safe_file.os, 'fsync', _fail)
+    with pytest.raises(OSError):
+        write_json_atomic(file, {'a': 3})
+    assert read_json(file) == {'a': 2}
+    assert sorted(f.name for f in tmp_path.iterdir()) == ['cache.json', 'cache.json.bak']
+
+
+def test_read_json_recovers_backup(tmp_path):
+    file = tmp_path / 'cache.json'
+    write_json_atomic(file, {'a': 1})
+    write_json_atomic(file, {'a': 2})
+
+    # -- Truncated by a crash of an earlier version writing in place
+    file.write_text('{"a": ')
+    assert read_json(file) == {'a': 1}
+
+    file.unlink()
+    assert read_json(file) == {'a': 1}
+    get_backup_file(file).unlink()
+    assert read_json(file) is None
+
+
+def test_settings_recover_backup(tmp_path, monkeypatch):
+    file = tmp_path / 'settings.json'
+    monkeypatch.setattr(AppSettings, 'SETTINGS_FILE_OVR', file.as_posix())
+    monkeypatch.setattr(AppSettings, 'previous_version', '1.0.0')
+    monkeypatch.setattr(AppSettings, 'mod_data_dirs', dict())
+
+    assert AppSettings.save() and AppSettings.save()
+    file.write_text('')
+    AppSettings.previous_version = ''
+
+    assert AppSettings.load() is True
+    assert AppSettings.previous_version == '1.0.0'
+
+
+def test_library_store_recover_backup(tmp_path, monkeypatch):
+    monkeypatch.setattr(LibraryStore, 'file', tmp_path / 'library.db')
+    LibraryStore.close()
+
+    LibraryStore.save_apps(STEAM_DIR_ID, {'1': {'appid': '1', 'name': 'App'}})
+    assert LibraryStore.backup()
+    LibraryStore.save_apps(STEAM_DIR_ID, {'2': {'appid': '2', 'name': 'New App'}})
+    LibraryStore.close()
+
+    # -- Damaged store is set aside and the backup restored
+    for suffix in ('-wal', '-shm'):
+        tmp_path.joinpath(f'library.db{suffix}').unlink(missing_ok=True)
+    with open(tmp_path / 'library.db', 'r+b') as f:
+        f.write(os.urandom(4096))
+
+    assert list(LibraryStore.load_apps([STEAM_DIR_ID])) == ['1']
+    assert tmp_path.joinpath('library.db.damaged').exists()
+    LibraryStore.close()
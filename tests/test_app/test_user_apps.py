@@ -3,6 +3,8 @@ import json
 from pathlib import Path
 
 from app import app_fn
+from app.valve import binary_vdf
+from app.valve.steam import SteamApps
 from tests.conftest import user_app_path
 
 LOGGER = logging.getLogger(__name__)
@@ -24,3 +26,32 @@ def test_remove_custom_app_fn(app_settings, user_app):
     result_dict = json.loads(app_fn.remove_custom_app_fn(user_app))
 
     assert result_dict['result'] is True
+
+
+def test_import_steam_shortcuts_fn(app_settings, custom_lib_path, tmp_path, monkeypatch):
+    app_path = custom_lib_path / 'custom_app_writeable'
+    shortcuts = {'shortcuts': {
+        '0': {'appid': -12345, 'AppName': 'VR Shortcut', 'Exe': f'"{(app_path / "Another Binary.exe").as_posix()}"',
+              'StartDir': f'"{app_path.as_posix()}"', 'OpenVR': 1, 'tags': {'0': 'VR'}},
+        '1': {'appid': 54321, 'AppName': 'Flat Shortcut', 'Exe': '"C:/Games/Flat/Flat.exe"',
+              'StartDir': '"C:/Games/Flat"', 'OpenVR': 0, 'tags': {}},
+    }}
+    shortcuts_file = tmp_path / 'userdata' / '1234' / 'config' / 'shortcuts.vdf'
+    shortcuts_file.parent.mkdir(parents=True)
+    shortcuts_file.write_bytes(binary_vdf.dumps(shortcuts))
+    monkeypatch.setattr(SteamApps, 'STEAM_LOCATION', tmp_path, raising=False)
+
+    result_dict = json.loads(app_fn.import_steam_shortcuts_fn())
+    assert result_dict['result'] is True
+    assert len(result_dict['data']) == 1
+
+    user_apps = app_settings.load_custom_dir_apps()
+    entry = user_apps[result_dict['data'][0]]
+    assert entry['name'] == 'VR Shortcut'
+    assert (app_path / 'Another Binary.exe').as_posix() in entry['executablePaths']
+
+    # -- Shortcuts are only imported once
+    result_dict = json.loads(app_fn.import_steam_shortcuts_fn())
+    assert result_dict['result'] is False
+
+    app_fn.remove_custom_app_fn(entry)
@@ -0,0 +1,63 @@
+import pytest
+
+from app.valve import acf
+
+ACF_DATA = r'''// Comment before the root section
+"AppState"
+{
+	"appid"		"123"
+	"name"		"Game: \"The Sequel\""
+	"installdir"		"C:\\Program Files (x86)\\Steam\\steamapps\\common\\Game"
+	"InstalledDepots"
+	{
+		"211501"
+		{
+			"manifest"		"2814928209702370209"
+		}
+	}
+	"LastOwner"		"1234"	// Key after a closed section
+	UnquotedKey		value
+	"launch"		"game.exe" [$WIN32]
+}
+'''
+
+
+def test_loads():
+    data = acf.loads(ACF_DATA)['AppState']
+
+    assert data['name'] == 'Game: "The Sequel"'
+    assert data['installdir'] == r'C:\Program Files (x86)\Steam\steamapps\common\Game'
+    assert data['InstalledDepots'] == {'211501': {'manifest': '2814928209702370209'}}
+    assert data['LastOwner'] == '1234'
+    assert data['UnquotedKey'] == 'value'
+    assert data['launch'] == 'game.exe'
+
+
+def test_dumps_round_trip():
+    data = acf.loads(ACF_DATA)
+    assert acf.loads(acf.dumps(data)) == data
+
+
+def test_loads_include(tmp_path):
+    (tmp_path / 'base.vdf').write_text('"Root" { "a" "base" "b" "base" }', encoding='utf-8')
+    (tmp_path / 'include.vdf').write_text('"Root" { "c" "include" "a" "include" }', encoding='utf-8')
+    file = tmp_path / 'main.vdf'
+    file.write_text('#base "base.vdf"\n#include "include.vdf"\n"Root" { "a" "main" }', encoding='utf-8')
+
+    with open(file, 'r', encoding='utf-8') as f:
+        data = acf.load(f)
+
+    assert data == {'Root': {'a': 'include', 'b': 'base', 'c': 'include'}}
+
+
+@pytest.mark.parametrize('data', ['"a" { "b" "c"', '"a" "b" }', '"a" { "b" "c }', '{ "a" "b" }'])
+def test_loads_invalid(data):
+    with pytest.raises(ValueError):
+        acf.loads(data)
+
+
+def test_tokenizers_agree(steam_test_path):
+    data = (steam_test_path / 'steamapps' / 'appmanifest_123.acf').read_text(encoding='utf-8')
+    data += '"Extra" { Unquoted value "path" "C:\\\\Steam" "cond" "1" [$WIN32] }'
+
+    assert acf._tokenize(data) == acf._tokenize_regex(data)
@@ -0,0 +1,25 @@
+import pytest
+
+from app.valve import binary_vdf
+
+SHORTCUTS = {'shortcuts': {
+    '0': {'appid': -1553006602, 'AppName': 'VR Game', 'Exe': '"C:\\Games\\VR Game\\Game.exe"',
+          'StartDir': '"C:\\Games\\VR Game\\"', 'OpenVR': 1, 'LastPlayTime': 1700000000, 'tags': {'0': 'VR'}},
+}}
+
+
+def test_loads_shortcuts():
+    data = binary_vdf.loads(binary_vdf.dumps(SHORTCUTS))
+
+    assert data == SHORTCUTS
+    assert data['shortcuts']['0']['StartDir'] == '"C:\\Games\\VR Game\\"'
+
+
+def test_loads_invalid():
+    data = binary_vdf.dumps(SHORTCUTS)
+
+    with pytest.raises(ValueError):
+        binary_vdf.loads(data[:len(data) // 2])
+    with pytest.raises(TypeError):
+        binary_vdf.loads('shortcuts')
+
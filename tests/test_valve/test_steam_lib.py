@@ -1,6 +1,10 @@
 import logging
 from pathlib import Path
 
+import pytest
+
+from app.valve.steam import SteamApps, STEAM_LIBRARY_FOLDERS
+from tests.benchmark.synthetic_lib import create_steam_library
 from tests.conftest import test_app_path
 
 LOGGER = logging.getLogger(__name__)
@@ -13,3 +17,44 @@ def test_load_steam_lib(steam_apps_obj, steam_test_path):
     assert '123' in steam_apps_obj.steam_apps
     assert 'Test App' == steam_apps_obj.steam_apps['123']['name']
     assert test_app_path == Path(steam_apps_obj.steam_apps['123']['path'])
+
+
+def test_add_path(steam_test_path):
+    lib_folders = [steam_test_path / 'non_existing_lib', steam_test_path / 'steamapps']
+    install_dirs = SteamApps._list_install_dirs(lib_folders)
+
+    manifest = {'installdir': 'test_app'}
+    SteamApps._add_path(manifest, lib_folders, install_dirs)
+    assert Path(manifest['path']) == test_app_path
+
+    # -- Absolute installation directories are tested on disk
+    manifest = {'installdir': test_app_path.as_posix()}
+    SteamApps._add_path(manifest, lib_folders, install_dirs)
+    assert Path(manifest['path']) == test_app_path
+
+    manifest = {'installdir': 'not_installed'}
+    SteamApps._add_path(manifest, lib_folders, install_dirs)
+    assert manifest['path'] == ''
+
+
+def test_find_game_location(steam_apps_obj, monkeypatch):
+    # -- Lookups are answered from the index without touching the disk
+    monkeypatch.setattr(Path, 'exists', lambda *args: pytest.fail('find_game_location accessed the disk'))
+
+    assert steam_apps_obj.find_game_location(app_id=123) == test_app_path
+    assert steam_apps_obj.find_game_location(app_id='123') == test_app_path
+    assert steam_apps_obj.find_game_location(app_name='Test App') == test_app_path
+    assert steam_apps_obj.find_game_location(app_name='Test A') == test_app_path
+
+    assert steam_apps_obj.find_game_location(app_name='Unknown App') is None
+    assert steam_apps_obj.find_game_location(app_id=999) is None
+
+
+def test_find_installed_steam_games_libraries(tmp_path, monkeypatch):
+    lib_folders = create_steam_library(tmp_path / 'Steam', libraries=3, apps=7, depth=1, fan_out=2)
+    monkeypatch.setattr(SteamApps, 'STEAM_LOCATION', tmp_path / 'Steam', raising=False)
+
+    steam_apps, _ = SteamApps().find_installed_steam_games()
+
+    assert steam_apps[STEAM_LIBRARY_FOLDERS] == lib_folders
+    assert len([a for a in steam_apps if a != STEAM_LIBRARY_FOLDERS and Path(steam_apps[a]['path']).is_dir()]) == 7
@@ -0,0 +1,43 @@
+from app.valve import steam_locator
+from app.valve.steam import SteamApps, STEAM_APPS_FOLDER
+from app.valve.steam_locator import EnvironmentLocator, ExplicitPathLocator, HomeDirLocator, RegistryLocator, \
+    locate_steam
+
+
+def test_locate_steam_order(tmp_path, monkeypatch):
+    env_dir, explicit_dir = tmp_path / 'env_steam', tmp_path / 'explicit_steam'
+    env_dir.mkdir()
+    explicit_dir.mkdir()
+    monkeypatch.setenv(steam_locator.STEAM_PATH_ENV, env_dir.as_posix())
+
+    assert locate_steam([EnvironmentLocator(), ExplicitPathLocator(explicit_dir)]) == env_dir
+    assert locate_steam([ExplicitPathLocator(explicit_dir), EnvironmentLocator()]) == explicit_dir
+
+    # -- Locators pointing to missing directories are skipped
+    assert locate_steam([ExplicitPathLocator(tmp_path / 'missing'), EnvironmentLocator()]) == env_dir
+    monkeypatch.delenv(steam_locator.STEAM_PATH_ENV)
+    assert locate_steam([EnvironmentLocator()]) is None
+
+
+def test_home_dir_locator(tmp_path, monkeypatch):
+    steam_dir = tmp_path / '.local' / 'share' / 'Steam'
+    steam_dir.mkdir(parents=True)
+    monkeypatch.setenv('HOME', tmp_path.as_posix())
+
+    assert HomeDirLocator().locate() == steam_dir.resolve()
+
+
+def test_registry_locator_without_registry(monkeypatch):
+    monkeypatch.setattr(steam_locator, 'get_registry', lambda: None)
+    assert RegistryLocator().locate() is None
+
+
+def test_find_steam_libraries_with_locators(steam_test_path, monkeypatch):
+    monkeypatch.delattr(SteamApps, 'STEAM_LOCATION', raising=False)
+    monkeypatch.setattr(SteamApps, 'locators', [ExplicitPathLocator(steam_test_path)])
+
+    lib_folders = SteamApps.find_steam_libraries()
+    assert lib_folders[0] == steam_test_path / STEAM_APPS_FOLDER
+
+    monkeypatch.setattr(SteamApps, 'locators', list())
+    assert SteamApps.find_steam_libraries() == list()